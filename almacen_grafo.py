@@ -0,0 +1,571 @@
+from nodo import Nodo
+from conexion import Conexion
+from cache_rutas import CacheRutas
+from grafo_compacto import GrafoCompacto, INFINITO
+from pesos_conexiones import PesosConexiones
+from array import array
+from sys import intern
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+MAGICO = b'EDPGRAF\0'
+FORMATO = 1
+ALINEACION = 8
+BLOQUE_ESCRITURA = 1 << 20   # registros por escritura al construir
+EXPANSIONES_POR_CONTROL = 1024   # nodos expandidos entre controles de memoria durante una búsqueda
+
+# Columnas de las conexiones: una sección de ancho fijo por campo, en orden CSR
+COLUMNAS = (
+    ('origen', 'i'), ('destino', 'i'), ('modo', 'b'), ('distancia', 'd'),
+    ('restriccion', 'i'), ('peso_max', 'd'), ('velocidad_max', 'd'),
+    ('prob_mal_tiempo', 'd'), ('maritimo', 'B'), ('prototipo', 'i'),
+    ('tiempo_nominal', 'd'), ('costo_vehiculo', 'd'), ('capacidad', 'd')
+)
+
+def _alinear(posicion):
+    return -(-posicion // ALINEACION) * ALINEACION
+
+def _tamanos():
+    return {codigo: array(codigo).itemsize for codigo in 'bBidq'}
+
+def _memoria_residente():
+    """Bytes residentes del proceso (Linux), o None si no se pueden leer"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _ValoresDispersos(dict):
+    """Valor por nodo para una búsqueda: solo guarda los nodos que se tocaron"""
+    __slots__ = ('valor',)
+
+    def __init__(self, valor):
+        super().__init__()
+        self.valor = valor
+
+    def __missing__(self, clave):
+        return self.valor
+
+
+class _MarcasDispersas(_ValoresDispersos):
+    """Marcas de visita de una búsqueda: cada nodo marcado cuenta como expansión (ver controlar_memoria)"""
+    __slots__ = ('almacen',)
+
+    def __init__(self, almacen):
+        super().__init__(0)
+        self.almacen = almacen
+
+    def __setitem__(self, clave, valor):
+        dict.__setitem__(self, clave, valor)
+        self.almacen.contar_expansion()
+
+
+class _NodosAlmacen:
+    """Secuencia {id: Nodo} que crea los nodos al pedirlos (con una LRU acotada)"""
+
+    def __init__(self, almacen, capacidad):
+        self.almacen = almacen
+        self.cache = CacheRutas(capacidad)
+
+    def __getitem__(self, i):
+        self.almacen.contar_expansion()   # las búsquedas multimodales piden el nodo de cada estado
+        nodo = self.cache.obtener(i)
+        if nodo is None:
+            nodo = Nodo(self.almacen.nombre(i))
+            self.cache.guardar(i, nodo)
+        return nodo
+
+    def __len__(self):
+        return self.almacen.cantidad_nodos
+
+
+class _NodosPorNombre:
+    """Mapeo {nombre: Nodo} de solo lectura sobre el almacén (como SistemaTransporte.nodos)"""
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+
+    def get(self, nombre, defecto=None):
+        try:
+            return self.almacen.nodos[self.almacen.id_nodo(nombre)]
+        except KeyError:
+            return defecto
+
+    def __getitem__(self, nombre):
+        return self.almacen.nodos[self.almacen.id_nodo(nombre)]
+
+    def __contains__(self, nombre):
+        return self.get(nombre) is not None
+
+    def __iter__(self):
+        return (self.almacen.nombre(i) for i in range(self.almacen.cantidad_nodos))
+
+    def __len__(self):
+        return self.almacen.cantidad_nodos
+
+
+class _ConexionesAlmacen:
+    """Secuencia {id: Conexion} que crea las conexiones al pedirlas (con una LRU acotada)"""
+
+    def __init__(self, almacen, capacidad):
+        self.almacen = almacen
+        self.cache = CacheRutas(capacidad)
+
+    def __getitem__(self, e):
+        conexion = self.cache.obtener(e)
+        if conexion is None:
+            almacen = self.almacen
+            if not 0 <= e < almacen.cantidad_conexiones:
+                raise IndexError(e)
+            conexion = Conexion.sin_validar(almacen.nodos[almacen.origen[e]], almacen.nodos[almacen.destino[e]],
+                                            almacen.modos[almacen.modo[e]], almacen.distancia[e],
+                                            *almacen.restricciones[almacen.restriccion[e]])
+            if almacen.vehiculos is not None:
+                conexion.vehiculo = almacen.vehiculos[e]
+            self.cache.guardar(e, conexion)
+        return conexion
+
+    def __len__(self):
+        return self.almacen.cantidad_conexiones
+
+
+class _VehiculosAlmacen:
+    """Vehículo prototipo de cada conexión a partir de la columna 'prototipo'"""
+
+    def __init__(self, prototipo, prototipos):
+        self.prototipo = prototipo
+        self.prototipos = prototipos
+
+    def __getitem__(self, e):
+        indice = self.prototipo[e]
+        return self.prototipos[indice] if indice >= 0 else None
+
+    def __len__(self):
+        return len(self.prototipo)
+
+
+class AlmacenGrafo:
+    """
+    Red compilada guardada en disco para planificar sobre redes que no
+    entran en memoria. Ofrece la misma interfaz que GrafoCompacto, así el
+    Planificador la recorre sin cambios (ver SistemaEnDisco).
+    - Las conexiones se guardan en orden CSR (agrupadas por origen, respetando
+      el orden de carga) como columnas de ancho fijo: origen, destino, modo,
+      distancia, restricciones compiladas y coeficientes de PesosConexiones.
+      La adyacencia de todos los modos es directamente la columna destino.
+    - Los nombres de los nodos van en un bloque de texto con sus desplazamientos
+      y un índice ordenado por nombre para buscarlos por bisección.
+    - El archivo se mapea en memoria (mmap): una búsqueda solo lee las páginas
+      de los nodos y conexiones que toca. Los objetos Nodo y Conexion se crean
+      al pedirlos y se guardan en LRUs acotadas; los Nodo no llevan su lista
+      de conexiones (la adyacencia se recorre en el almacén).
+    - controlar_memoria() mantiene la memoria residente del proceso por debajo
+      de presupuesto_mb: si se pasa, devuelve al sistema las páginas mapeadas
+      y vacía las LRUs. Se llama al pedir el grafo y, durante una búsqueda,
+      cada EXPANSIONES_POR_CONTROL nodos expandidos. El estado de cada
+      búsqueda guarda solo los nodos visitados.
+    """
+
+    def __init__(self, archivo, presupuesto_mb=256, capacidad_objetos=4096, intervalo_control=0.05):
+        self.archivo = archivo
+        self.presupuesto = presupuesto_mb * 2**20
+        self.intervalo_control = intervalo_control
+        self._ultimo_control = 0.0
+        self._expansiones = 0
+        self.liberaciones = 0
+
+        encabezado, inicio = self._leer_encabezado(archivo)
+        if encabezado is None:
+            raise ValueError(f"{archivo} no es un almacén de grafo")
+        if (encabezado['formato'] != FORMATO or encabezado['orden_bytes'] != sys.byteorder
+                or encabezado['tamanos'] != _tamanos()):
+            raise ValueError(f"{archivo}: almacén de otro formato o de otra plataforma, hay que volver a construirlo")
+
+        with open(archivo, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        vista = memoryview(self._mapa)
+        self._secciones = {}
+        for nombre, (desplazamiento, codigo, cantidad) in encabezado['secciones'].items():
+            tamano = cantidad * array(codigo).itemsize
+            self._secciones[nombre] = vista[inicio + desplazamiento:inicio + desplazamiento + tamano].cast(codigo)
+
+        self.version = 1   # el almacén no cambia: una sola versión de la red
+        self.cantidad_nodos = encabezado['nodos']
+        self.cantidad_conexiones = encabezado['conexiones']
+        self.modos = tuple(intern(modo) for modo in encabezado['modos'])
+        self.restricciones = [(intern(restriccion) if restriccion else restriccion,
+                               intern(valor) if isinstance(valor, str) else valor)
+                              for restriccion, valor in encabezado['restricciones']]
+        self._umbrales = encabezado['umbrales']
+        self._modos_pesos = set(encabezado['modos_pesos'])
+        self._primeras_prototipo = encabezado['prototipos']   # primera conexión de cada prototipo
+
+        for nombre, _ in COLUMNAS:
+            setattr(self, nombre, self._secciones[nombre])
+        self._desplazamientos = self._secciones['desplazamientos']
+        self._textos = self._secciones['nombres']
+        self._orden = self._secciones['orden']
+
+        self.adyacencias = {None: (self._secciones['csr_inicio'], self.destino, range(self.cantidad_conexiones))}
+        for i, modo in enumerate(self.modos):
+            self.adyacencias[modo] = tuple(self._secciones[f'csr{i}_{parte}']
+                                           for parte in ('inicio', 'destinos', 'aristas'))
+
+        self.vehiculos = None   # _VehiculosAlmacen, al pedir los pesos
+        self.nodos = _NodosAlmacen(self, capacidad_objetos)
+        self.conexiones = _ConexionesAlmacen(self, capacidad_objetos)
+        self.nodos_por_nombre = _NodosPorNombre(self)
+
+    @staticmethod
+    def _leer_encabezado(archivo):
+        """(encabezado, inicio de los datos) o (None, 0) si el archivo no es un almacén"""
+        try:
+            with open(archivo, 'rb') as f:
+                if f.read(len(MAGICO)) != MAGICO:
+                    return None, 0
+                largo, = struct.unpack('<Q', f.read(8))
+                encabezado = json.loads(f.read(largo).decode('utf-8'))
+        except (OSError, ValueError, struct.error):
+            return None, 0
+        return encabezado, _alinear(len(MAGICO) + 8 + largo)
+
+    # --- Interfaz de GrafoCompacto ---
+
+    def nombre(self, i):
+        """Nombre del nodo i"""
+        return bytes(self._textos[self._desplazamientos[i]:self._desplazamientos[i + 1]]).decode('utf-8')
+
+    def _nombre_en_bytes(self, i):
+        return self._textos[self._desplazamientos[i]:self._desplazamientos[i + 1]].tobytes()
+
+    def id_nodo(self, nodo):
+        """Id entero de un nodo (acepta el Nodo o su nombre); KeyError si no existe"""
+        nombre = nodo if isinstance(nodo, str) else nodo.nombre
+        clave = nombre.encode('utf-8')
+        bajo, alto = 0, self.cantidad_nodos
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self._nombre_en_bytes(self._orden[medio]) < clave:
+                bajo = medio + 1
+            else:
+                alto = medio
+        if bajo < self.cantidad_nodos and self._nombre_en_bytes(self._orden[bajo]) == clave:
+            return self._orden[bajo]
+        raise KeyError(nombre)
+
+    def umbrales_peso(self):
+        """{modo: pesos máximos distintos de sus conexiones, ordenados} (calculados al construir)"""
+        return {modo: list(valores) for modo, valores in self._umbrales.items()}
+
+    def valores_por_nodo(self, valor):
+        """Valor por nodo para una búsqueda; solo ocupa memoria por los nodos modificados"""
+        return _ValoresDispersos(valor)
+
+    def marcas_por_nodo(self):
+        """Marca 0/1 por nodo para una búsqueda; solo ocupa memoria por los nodos marcados"""
+        return _MarcasDispersas(self)
+
+    def ids_de_conexiones(self, conexiones):
+        """
+        Ids de una secuencia de objetos Conexion del almacén. Los objetos
+        pueden haber salido de la LRU, así que se buscan por sus datos entre
+        las conexiones que salen de su origen (entre conexiones idénticas se
+        toma la primera: tienen los mismos pesos).
+        """
+        inicio = self.adyacencias[None][0]
+        ids = []
+        for conexion in conexiones:
+            v = self.id_nodo(conexion.origen)
+            w = self.id_nodo(conexion.destino)
+            par = (conexion.restriccion, conexion.valorRestriccion)
+            for e in range(inicio[v], inicio[v + 1]):
+                if (self.destino[e] == w and self.modos[self.modo[e]] == conexion.tipo
+                        and self.distancia[e] == conexion.distancia and self.restricciones[self.restriccion[e]] == par):
+                    ids.append(e)
+                    break
+            else:
+                raise KeyError(f"Conexión inexistente en el almacén: {conexion}")
+        return ids
+
+    def obtener_pesos(self, crear_vehiculo, modos):
+        """
+        PesosConexiones con los coeficientes guardados al construir. Solo se
+        crean los vehículos prototipo (pocos); el de cada conexión sale de
+        la columna 'prototipo'. Los modos tienen que ser los del almacén.
+        """
+        if set(modos) != self._modos_pesos:
+            raise ValueError(f"El almacén tiene pesos para {sorted(self._modos_pesos)}, no para {sorted(modos)}")
+        prototipos = [crear_vehiculo(self.conexiones[e]) for e in self._primeras_prototipo]
+        self.vehiculos = _VehiculosAlmacen(self.prototipo, prototipos)
+        self.conexiones.cache.limpiar()   # las conexiones ya creadas no tenían vehículo
+        return PesosConexiones.desde_arrays(self, crear_vehiculo, modos, self._secciones, vehiculos=self.vehiculos)
+
+    # --- Memoria ---
+
+    def contar_expansion(self):
+        """Cuenta un nodo expandido; cada EXPANSIONES_POR_CONTROL controla la memoria"""
+        self._expansiones += 1
+        if not self._expansiones % EXPANSIONES_POR_CONTROL:
+            self.controlar_memoria()
+
+    def controlar_memoria(self, forzar=False):
+        """
+        Si la memoria residente del proceso supera el presupuesto, devuelve
+        al sistema las páginas del archivo mapeado (se vuelven a leer del
+        disco cuando se necesiten) y vacía las LRUs de nodos y conexiones.
+        Se mide como mucho cada intervalo_control segundos.
+        Devuelve la memoria residente medida (None si no se midió).
+        """
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultimo_control < self.intervalo_control:
+            return None
+        self._ultimo_control = ahora
+        residente = _memoria_residente()
+        if residente is not None and (forzar or residente > self.presupuesto):
+            self.liberar()
+            residente = _memoria_residente()
+        return residente
+
+    def liberar(self):
+        """Devuelve las páginas mapeadas al sistema y vacía las LRUs de objetos"""
+        if hasattr(mmap, 'MADV_DONTNEED'):
+            self._mapa.madvise(mmap.MADV_DONTNEED)
+        self.nodos.cache.limpiar()
+        self.conexiones.cache.limpiar()
+        self.liberaciones += 1
+
+    def memoria_estimada(self):
+        """Bytes de las secciones del archivo (lo que ocuparía tenerlo todo en memoria)"""
+        return sum(seccion.nbytes for seccion in self._secciones.values())
+
+    def obtener_reporte(self):
+        """Tamaño de la red, del archivo y memoria residente del proceso"""
+        memoria = self.memoria_estimada()
+        return {
+            'nodos': self.cantidad_nodos,
+            'conexiones': self.cantidad_conexiones,
+            'modos': self.modos,
+            'memoria_bytes': memoria,
+            'bytes_por_conexion': memoria / self.cantidad_conexiones if self.cantidad_conexiones else 0.0,
+            'residente_bytes': _memoria_residente(),
+            'presupuesto_bytes': self.presupuesto,
+            'liberaciones': self.liberaciones
+        }
+
+    def __repr__(self):
+        return (f"AlmacenGrafo({self.archivo!r}, nodos={self.cantidad_nodos}, "
+                f"conexiones={self.cantidad_conexiones}, modos={len(self.modos)})")
+
+    # --- Construcción ---
+
+    @classmethod
+    def construir(cls, archivo_nodos, archivo_conexiones, archivo_almacen, crear_vehiculo=None, modos=None,
+                  tamano_bloque=100000, mostrar_progreso=True):
+        """
+        Lee los CSV por bloques (ver CargadorMasivo) y escribe el almacén sin
+        crear objetos Nodo ni Conexion: en memoria quedan solo el índice de
+        nombres y las columnas compactas de las conexiones.
+        crear_vehiculo y modos son los del planificador (por defecto los de Planificador).
+        Devuelve el cargador, con el reporte de filas y errores.
+        """
+        from cargador_masivo import CargadorMasivo
+        if crear_vehiculo is None or modos is None:
+            from planificador import Planificador
+            planificador = Planificador(None)
+            crear_vehiculo = crear_vehiculo or planificador._crear_vehiculo_para_conexion
+            modos = modos or set(planificador.vehiculos_disponibles)
+        modos = set(modos)
+        cargador = CargadorMasivo(None, tamano_bloque, mostrar_progreso=mostrar_progreso)
+
+        # Nodos: {nombre: id} en el orden del archivo
+        indice = {}
+        for nombres in cargador.leer_nodos(archivo_nodos, indice):
+            for nombre in nombres:
+                indice.setdefault(nombre, len(indice))
+
+        # Conexiones en el orden de carga, como columnas compactas
+        indice_modo = {}
+        indice_restriccion = {}   # {(restricción, valor): índice}
+        origen, destino = array('i'), array('i')
+        modo, distancia, restriccion = array('b'), array('d'), array('i')
+        for validas in cargador.leer_conexiones(archivo_conexiones, indice.get):
+            if not validas:
+                continue
+            origenes, destinos, tipos, distancias, pares = zip(*validas)
+            for tipo in dict.fromkeys(tipos):
+                indice_modo.setdefault(tipo, len(indice_modo))
+            for par in dict.fromkeys(pares):
+                indice_restriccion.setdefault(par, len(indice_restriccion))
+            origen.extend(origenes)
+            destino.extend(destinos)
+            modo.extend(map(indice_modo.__getitem__, tipos))
+            distancia.extend(distancias)
+            restriccion.extend(map(indice_restriccion.__getitem__, pares))
+
+        cls._escribir(archivo_almacen, list(indice), list(indice_modo), list(indice_restriccion),
+                      (origen, destino, modo, distancia, restriccion), crear_vehiculo, modos)
+        if mostrar_progreso:
+            print(f"Almacén guardado en {archivo_almacen} ({os.path.getsize(archivo_almacen) / 2**20:.1f} MiB)")
+        return cargador
+
+    @staticmethod
+    def _escribir(archivo, nombres, modos, restricciones, columnas, crear_vehiculo, modos_pesos):
+        """Escribe el almacén a partir de las columnas en orden de carga"""
+        origen, destino, modo, distancia, restriccion = columnas
+        n, m = len(nombres), len(origen)
+
+        # Orden CSR estable por origen: orden[j] es la conexión (en orden de carga) guardada en j
+        inicio = array('i', [0]) * (n + 1)
+        for v in origen:
+            inicio[v + 1] += 1
+        for v in range(n):
+            inicio[v + 1] += inicio[v]
+        posicion = array('i', inicio)
+        orden = array('i', [0]) * m
+        for e, v in enumerate(origen):
+            orden[posicion[v]] = e
+            posicion[v] += 1
+        del posicion
+
+        # Restricciones compiladas y prototipo por (modo, restricción), que se
+        # repiten en toda la red. Los prototipos se crean en orden de carga, como en PesosConexiones
+        claves = list(dict.fromkeys(zip(modo, restriccion)))
+        indice_clave = {clave: k for k, clave in enumerate(claves)}
+        clave_de = array('i', map(indice_clave.__getitem__, zip(modo, restriccion)))
+        primera_carga = {}
+        for e, k in enumerate(clave_de):
+            if k not in primera_carga:
+                primera_carga[k] = e
+                if len(primera_carga) == len(claves):
+                    break
+        compiladas = []   # por clave: [peso_max, velocidad_max, prob_mal_tiempo, maritimo, prototipo]
+        prototipos = []   # vehículo de cada prototipo
+        primeras = []     # primera conexión (id del almacén) de cada prototipo
+        for k, (indice_modo, indice_restriccion) in enumerate(claves):
+            tipo = modos[indice_modo]
+            par = restricciones[indice_restriccion]
+            prototipo = -1
+            if tipo in modos_pesos:
+                e = primera_carga[k]
+                prototipo = len(prototipos)
+                prototipos.append(crear_vehiculo(Conexion.sin_validar(None, None, tipo, distancia[e], *par)))
+                primeras.append(orden.index(e))
+            compiladas.append(GrafoCompacto.restriccion_compilada(tipo, *par) + [prototipo])
+
+        umbrales = {}
+        for (indice_modo, _), (peso_max, *_resto) in zip(claves, compiladas):
+            if not INFINITO <= peso_max:
+                umbrales.setdefault(modos[indice_modo], set()).add(peso_max)
+
+        # Coeficientes de PesosConexiones (en orden de carga); sin vehículo, los valores por defecto
+        tiempo_nominal, costo_vehiculo, capacidad = array('d', [0.0]) * m, array('d', [0.0]) * m, array('d', [1.0]) * m
+        prototipo_de = [fila[4] for fila in compiladas]
+        for e, k in enumerate(clave_de):
+            if prototipo_de[k] >= 0:
+                tiempo_nominal[e], costo_vehiculo[e], capacidad[e] = PesosConexiones.coeficientes(
+                    prototipos[prototipo_de[k]], distancia[e])
+
+        fuentes = {'origen': origen, 'destino': destino, 'modo': modo, 'distancia': distancia,
+                   'restriccion': restriccion, 'tiempo_nominal': tiempo_nominal,
+                   'costo_vehiculo': costo_vehiculo, 'capacidad': capacidad}
+        campos_compilados = ('peso_max', 'velocidad_max', 'prob_mal_tiempo', 'maritimo', 'prototipo')
+
+        def columna(nombre):
+            """Valores de la columna en orden CSR, por bloques"""
+            for a in range(0, m, BLOQUE_ESCRITURA):
+                parte = orden[a:a + BLOQUE_ESCRITURA]
+                if nombre in fuentes:
+                    yield map(fuentes[nombre].__getitem__, parte)
+                else:
+                    i = campos_compilados.index(nombre)
+                    por_clave = [fila[i] for fila in compiladas]
+                    yield map(por_clave.__getitem__, map(clave_de.__getitem__, parte))
+
+        # Nombres: texto, desplazamientos e índice ordenado por nombre
+        textos = [nombre.encode('utf-8') for nombre in nombres]
+        desplazamientos = array('q', [0]) * (n + 1)
+        for i, texto in enumerate(textos):
+            desplazamientos[i + 1] = desplazamientos[i] + len(texto)
+        ordenados = array('i', sorted(range(n), key=textos.__getitem__))
+
+        # Adyacencia por modo sobre los ids del almacén (que ya están agrupados por origen)
+        aristas_modo = [array('i') for _ in modos]
+        for j, k in enumerate(map(modo.__getitem__, orden)):
+            aristas_modo[k].append(j)
+        csr_modos = []
+        for aristas in aristas_modo:
+            originales = array('i', map(orden.__getitem__, aristas))
+            inicio_modo = array('i', [0]) * (n + 1)
+            for v in map(origen.__getitem__, originales):
+                inicio_modo[v + 1] += 1
+            for v in range(n):
+                inicio_modo[v + 1] += inicio_modo[v]
+            csr_modos.append((inicio_modo, array('i', map(destino.__getitem__, originales)), aristas))
+
+        # Secciones: (nombre, código, cantidad, bloques de valores o datos)
+        secciones = [('nombres', 'B', desplazamientos[n], [b''.join(textos)]),
+                     ('desplazamientos', 'q', n + 1, [desplazamientos]),
+                     ('orden', 'i', n, [ordenados]),
+                     ('csr_inicio', 'i', n + 1, [inicio])]
+        secciones += [(nombre, codigo, m, columna(nombre)) for nombre, codigo in COLUMNAS]
+        for k, csr in enumerate(csr_modos):
+            secciones += [(f'csr{k}_{parte}', 'i', len(datos), [datos])
+                          for parte, datos in zip(('inicio', 'destinos', 'aristas'), csr)]
+
+        tabla = {}
+        desplazamiento = 0
+        for nombre, codigo, cantidad, _ in secciones:
+            tabla[nombre] = [desplazamiento, codigo, cantidad]
+            desplazamiento = _alinear(desplazamiento + cantidad * array(codigo).itemsize)
+
+        encabezado = {
+            'formato': FORMATO,
+            'orden_bytes': sys.byteorder,
+            'tamanos': _tamanos(),
+            'nodos': n,
+            'conexiones': m,
+            'modos': modos,
+            'restricciones': [list(par) for par in restricciones],
+            'umbrales': {tipo: sorted(valores) for tipo, valores in umbrales.items()},
+            'modos_pesos': sorted(modos_pesos),
+            'prototipos': primeras,
+            'secciones': tabla
+        }
+        texto = json.dumps(encabezado).encode('utf-8')
+        inicio_datos = _alinear(len(MAGICO) + 8 + len(texto))
+
+        temporal = f"{archivo}.tmp{os.getpid()}"
+        with open(temporal, 'wb') as f:
+            f.write(MAGICO)
+            f.write(struct.pack('<Q', len(texto)))
+            f.write(texto)
+            for nombre, codigo, _, bloques in secciones:
+                f.write(b'\0' * (inicio_datos + tabla[nombre][0] - f.tell()))
+                for bloque in bloques:
+                    f.write(bloque if isinstance(bloque, (array, bytes)) else array(codigo, bloque))
+        os.replace(temporal, archivo)
+
+
+# Código de prueba
+if __name__ == "__main__":
+    from sistema_en_disco import SistemaEnDisco
+    from solicitud_transporte import SolicitudTransporte
+    from planificador import Planificador
+
+    os.makedirs('output', exist_ok=True)
+    archivo = os.path.join('output', 'red.grafo')
+    AlmacenGrafo.construir('nodos.csv', 'conexiones.csv', archivo)
+
+    sistema = SistemaEnDisco(archivo, presupuesto_mb=64)
+    print(sistema.almacen)
+    planificador = Planificador(sistema)
+    solicitud = SolicitudTransporte("PRUEBA", 10000, sistema.nodos["Zarate"], sistema.nodos["Mar_del_Plata"])
+    mejor, por_modo = planificador.encontrar_ruta_optima(solicitud, kpi="tiempo")
+    print(mejor)
+    print(sistema.almacen.obtener_reporte())
@@ -0,0 +1,347 @@
+from nodo import Nodo
+from conexion import Conexion
+from solicitud_transporte import SolicitudTransporte
+from validaciones import validar_texto, validar_mayor_cero, validar_origen_destino, validar_modo_transporte
+from sys import intern
+import sqlite3
+
+ESQUEMA = 1
+
+TABLAS = """
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor
+);
+CREATE TABLE IF NOT EXISTS nodos (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE,
+    nombre_normalizado TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_nodos_normalizado ON nodos (nombre_normalizado);
+CREATE TABLE IF NOT EXISTS conexiones (
+    id INTEGER PRIMARY KEY,
+    origen INTEGER NOT NULL REFERENCES nodos (id),
+    destino INTEGER NOT NULL REFERENCES nodos (id),
+    tipo TEXT NOT NULL,
+    distancia REAL NOT NULL,
+    restriccion TEXT,
+    valor_restriccion
+);
+CREATE INDEX IF NOT EXISTS idx_conexiones_ruta ON conexiones (origen, destino, tipo);
+CREATE INDEX IF NOT EXISTS idx_conexiones_destino ON conexiones (destino);
+CREATE TABLE IF NOT EXISTS solicitudes (
+    id_carga TEXT PRIMARY KEY,
+    peso_kg REAL NOT NULL,
+    origen INTEGER NOT NULL REFERENCES nodos (id),
+    destino INTEGER NOT NULL REFERENCES nodos (id)
+);
+"""
+
+CONSULTA_CONEXIONES = """
+SELECT o.nombre, d.nombre, c.tipo, c.distancia, c.restriccion, c.valor_restriccion
+FROM conexiones c JOIN nodos o ON o.id = c.origen JOIN nodos d ON d.id = c.destino
+"""
+
+CONSULTA_SOLICITUDES = """
+SELECT s.id_carga, s.peso_kg, o.nombre, d.nombre
+FROM solicitudes s JOIN nodos o ON o.id = s.origen JOIN nodos d ON d.id = s.destino
+"""
+
+class BaseDatosRed:
+    """
+    Red de transporte guardada en una base SQLite (solo biblioteca estándar).
+    - Índices por nombre de nodo (exacto y sin distinguir mayúsculas), por
+      (origen, destino, tipo) y por destino de las conexiones, y por id de
+      solicitud.
+    - Permite agregar y actualizar nodos, conexiones y solicitudes de a uno,
+      con las mismas validaciones que las clases del dominio, o importar
+      CSV grandes por bloques (ver CargadorMasivo).
+    - Las consultas leen solo las filas que necesitan: se puede abrir una
+      red grande y consultarla sin cargarla entera. Para planificar,
+      cargar_en() arma un SistemaTransporte en el orden de carga original.
+    - version aumenta con cada cambio (sirve para invalidar caches).
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.conexion = sqlite3.connect(archivo)
+        self.conexion.execute("PRAGMA foreign_keys = ON")
+        self.conexion.executescript(TABLAS)
+        with self.conexion:
+            self.conexion.execute("INSERT OR IGNORE INTO meta VALUES ('esquema', ?)", (ESQUEMA,))
+            self.conexion.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)")
+        esquema = self._meta('esquema')
+        if esquema != ESQUEMA:
+            raise ValueError(f"{archivo}: base de datos con esquema {esquema}, se esperaba {ESQUEMA}")
+
+    def _meta(self, clave):
+        fila = self.conexion.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return fila[0] if fila else None
+
+    def _registrar_cambio(self):
+        """Avanza la versión (dentro de la transacción del cambio)"""
+        self.conexion.execute("UPDATE meta SET valor = valor + 1 WHERE clave = 'version'")
+
+    @property
+    def version(self):
+        return self._meta('version')
+
+    def _id_nodo(self, nombre):
+        """Id del nodo (acepta el Nodo o su nombre); ValueError si no existe"""
+        nombre = nombre if isinstance(nombre, str) else nombre.nombre
+        fila = self.conexion.execute("SELECT id FROM nodos WHERE nombre = ?", (nombre.strip(),)).fetchone()
+        if fila is None:
+            raise ValueError(f"Nodo no encontrado: {nombre}")
+        return fila[0]
+
+    # --- Altas y modificaciones ---
+
+    def agregar_nodo(self, nombre):
+        """Agrega el nodo si no existe. Devuelve True si se agregó"""
+        nombre = validar_texto(nombre)
+        with self.conexion:
+            cursor = self.conexion.execute(
+                "INSERT OR IGNORE INTO nodos (nombre, nombre_normalizado) VALUES (?, ?)", (nombre, nombre.lower()))
+            if cursor.rowcount:
+                self._registrar_cambio()
+        return cursor.rowcount == 1
+
+    def agregar_conexion(self, origen, destino, tipo, distancia, restriccion=None, valor_restriccion=None):
+        """Agrega una conexión entre nodos existentes (validada como Conexion)"""
+        conexion = Conexion(Nodo(origen if isinstance(origen, str) else origen.nombre),
+                            Nodo(destino if isinstance(destino, str) else destino.nombre),
+                            tipo, distancia, restriccion, valor_restriccion)
+        with self.conexion:
+            self.conexion.execute(
+                "INSERT INTO conexiones (origen, destino, tipo, distancia, restriccion, valor_restriccion) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self._id_nodo(conexion.origen), self._id_nodo(conexion.destino), conexion.tipo,
+                 float(conexion.distancia), conexion.restriccion, conexion.valorRestriccion))
+            self._registrar_cambio()
+
+    def actualizar_conexion(self, origen, destino, tipo, distancia, restriccion=None, valor_restriccion=None):
+        """
+        Reemplaza distancia y restricción de las conexiones origen -> destino
+        del tipo dado. Devuelve cuántas se actualizaron (0 si no existía ninguna).
+        """
+        conexion = Conexion(Nodo(origen if isinstance(origen, str) else origen.nombre),
+                            Nodo(destino if isinstance(destino, str) else destino.nombre),
+                            tipo, distancia, restriccion, valor_restriccion)
+        with self.conexion:
+            cursor = self.conexion.execute(
+                "UPDATE conexiones SET distancia = ?, restriccion = ?, valor_restriccion = ? "
+                "WHERE origen = ? AND destino = ? AND tipo = ?",
+                (float(conexion.distancia), conexion.restriccion, conexion.valorRestriccion,
+                 self._id_nodo(conexion.origen), self._id_nodo(conexion.destino), conexion.tipo))
+            if cursor.rowcount:
+                self._registrar_cambio()
+        return cursor.rowcount
+
+    def eliminar_conexion(self, origen, destino, tipo):
+        """Elimina las conexiones origen -> destino del tipo dado. Devuelve cuántas se eliminaron"""
+        with self.conexion:
+            cursor = self.conexion.execute(
+                "DELETE FROM conexiones WHERE origen = ? AND destino = ? AND tipo = ?",
+                (self._id_nodo(origen), self._id_nodo(destino), validar_modo_transporte(tipo)))
+            if cursor.rowcount:
+                self._registrar_cambio()
+        return cursor.rowcount
+
+    def guardar_solicitud(self, id_carga, peso_kg, origen, destino):
+        """Agrega la solicitud o, si el id ya existe, la actualiza"""
+        id_carga = validar_texto(id_carga)
+        peso_kg = validar_mayor_cero(peso_kg)
+        origen, destino = validar_origen_destino(self._id_nodo(origen), self._id_nodo(destino))
+        with self.conexion:
+            self._guardar_solicitudes([(id_carga, peso_kg, origen, destino)])
+            self._registrar_cambio()
+
+    def _guardar_solicitudes(self, filas):
+        self.conexion.executemany(
+            "INSERT INTO solicitudes (id_carga, peso_kg, origen, destino) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (id_carga) DO UPDATE SET peso_kg = excluded.peso_kg, "
+            "origen = excluded.origen, destino = excluded.destino", filas)
+
+    # --- Carga en bloque ---
+
+    def importar_csv(self, archivo_nodos, archivo_conexiones, archivo_solicitudes=None, **opciones):
+        """
+        Agrega a la base el contenido de los CSV, por bloques y en una sola
+        transacción (ver CargadorMasivo). Los nodos repetidos se ignoran y las
+        solicitudes con un id existente se actualizan.
+        opciones: tamano_bloque, max_ejemplos, mostrar_progreso
+        Devuelve el cargador, con el reporte de filas y errores.
+        """
+        from cargador_masivo import CargadorMasivo
+        cargador = CargadorMasivo(None, **opciones)
+        ids = dict(self.conexion.execute("SELECT nombre, id FROM nodos"))
+        siguiente = self.conexion.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM nodos").fetchone()[0]
+
+        with self.conexion:
+            for nombres in cargador.leer_nodos(archivo_nodos, ids):
+                nuevos = []
+                for nombre in nombres:
+                    if nombre not in ids:
+                        ids[nombre] = siguiente
+                        nuevos.append((siguiente, nombre, nombre.lower()))
+                        siguiente += 1
+                self.conexion.executemany(
+                    "INSERT INTO nodos (id, nombre, nombre_normalizado) VALUES (?, ?, ?)", nuevos)
+
+            for validas in cargador.leer_conexiones(archivo_conexiones, ids.get):
+                self.conexion.executemany(
+                    "INSERT INTO conexiones (origen, destino, tipo, distancia, restriccion, valor_restriccion) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(origen, destino, tipo, distancia, *par) for origen, destino, tipo, distancia, par in validas])
+
+            if archivo_solicitudes:
+                for validas in cargador.leer_solicitudes(archivo_solicitudes, ids.get):
+                    self._guardar_solicitudes(validas)
+            self._registrar_cambio()
+        return cargador
+
+    def guardar_sistema(self, sistema):
+        """Reemplaza el contenido de la base por la red y las solicitudes del SistemaTransporte"""
+        with self.conexion:
+            for tabla in ('solicitudes', 'conexiones', 'nodos'):
+                self.conexion.execute(f"DELETE FROM {tabla}")
+            ids = {nombre: i for i, nombre in enumerate(sistema.nodos, 1)}
+            self.conexion.executemany("INSERT INTO nodos (id, nombre, nombre_normalizado) VALUES (?, ?, ?)",
+                                      ((i, nombre, nombre.lower()) for nombre, i in ids.items()))
+            self.conexion.executemany(
+                "INSERT INTO conexiones (origen, destino, tipo, distancia, restriccion, valor_restriccion) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((ids[c.origen.nombre], ids[c.destino.nombre], c.tipo, float(c.distancia),
+                  c.restriccion, c.valorRestriccion) for c in sistema.conexiones))
+            self._guardar_solicitudes((s.id_carga, s.peso_kg, ids[s.origen.nombre], ids[s.destino.nombre])
+                                      for s in sistema.solicitudes)
+            self._registrar_cambio()
+
+    def cargar_en(self, sistema, solicitudes=True):
+        """
+        Carga la red (y las solicitudes) en un SistemaTransporte vacío, en el
+        orden en que se agregaron a la base. Los datos ya se validaron al guardarlos.
+        """
+        if sistema.nodos or sistema.conexiones or sistema.solicitudes:
+            raise ValueError("La base de datos se carga en un sistema vacío")
+        for nombre, in self.conexion.execute("SELECT nombre FROM nodos ORDER BY id"):
+            nodo = Nodo(nombre)
+            sistema.nodos[nodo.nombre] = nodo
+
+        nodos = sistema.nodos
+        # Las cadenas repetidas se comparten, como en Conexion
+        for origen, destino, tipo, distancia, restriccion, valor in self.conexion.execute(
+                CONSULTA_CONEXIONES + "ORDER BY c.id"):
+            conexion = Conexion.sin_validar(nodos[origen], nodos[destino], intern(tipo),
+                                            distancia, restriccion and intern(restriccion),
+                                            intern(valor) if isinstance(valor, str) else valor)
+            nodos[origen].agregarConexiones(conexion)
+            sistema.conexiones.append(conexion)
+        sistema._invalidar_preprocesamiento()
+
+        if solicitudes:
+            for id_carga, peso, origen, destino in self.conexion.execute(CONSULTA_SOLICITUDES + "ORDER BY s.rowid"):
+                sistema.solicitudes.append(SolicitudTransporte(id_carga, peso, nodos[origen], nodos[destino]))
+        return sistema
+
+    # --- Consultas ---
+
+    def buscar_nodo(self, nombre):
+        """Nodo por nombre (sin distinguir mayúsculas), sin sus conexiones, o None"""
+        fila = self.conexion.execute("SELECT nombre FROM nodos WHERE nombre_normalizado = ? ORDER BY id LIMIT 1",
+                                     (nombre.strip().lower(),)).fetchone()
+        return Nodo(fila[0]) if fila else None
+
+    def _conexiones(self, condicion, parametros):
+        nodos = {}
+        def nodo(nombre):
+            if nombre not in nodos:
+                nodos[nombre] = Nodo(nombre)
+            return nodos[nombre]
+        return [Conexion.sin_validar(nodo(origen), nodo(destino), tipo, distancia, restriccion, valor)
+                for origen, destino, tipo, distancia, restriccion, valor in self.conexion.execute(
+                    CONSULTA_CONEXIONES + f"WHERE {condicion} ORDER BY c.id", parametros)]
+
+    def conexiones_desde(self, origen, tipo=None):
+        """Conexiones que salen del nodo (de un tipo, si se indica)"""
+        if tipo is None:
+            return self._conexiones("c.origen = ?", (self._id_nodo(origen),))
+        return self._conexiones("c.origen = ? AND c.tipo = ?", (self._id_nodo(origen), validar_modo_transporte(tipo)))
+
+    def conexiones_hacia(self, destino):
+        """Conexiones que llegan al nodo"""
+        return self._conexiones("c.destino = ?", (self._id_nodo(destino),))
+
+    def conexiones_entre(self, origen, destino, tipo=None):
+        """Conexiones directas origen -> destino (de un tipo, si se indica)"""
+        if tipo is None:
+            return self._conexiones("c.origen = ? AND c.destino = ?", (self._id_nodo(origen), self._id_nodo(destino)))
+        return self._conexiones("c.origen = ? AND c.destino = ? AND c.tipo = ?",
+                                (self._id_nodo(origen), self._id_nodo(destino), validar_modo_transporte(tipo)))
+
+    def obtener_solicitud(self, id_carga):
+        """SolicitudTransporte con ese id, o None"""
+        fila = self.conexion.execute(CONSULTA_SOLICITUDES + "WHERE s.id_carga = ?", (id_carga.strip(),)).fetchone()
+        if fila is None:
+            return None
+        id_carga, peso, origen, destino = fila
+        return SolicitudTransporte(id_carga, peso, Nodo(origen), Nodo(destino))
+
+    def iterar_solicitudes(self):
+        """Genera las solicitudes en orden de carga, sin tenerlas todas en memoria"""
+        for id_carga, peso, origen, destino in self.conexion.execute(CONSULTA_SOLICITUDES + "ORDER BY s.rowid"):
+            yield SolicitudTransporte(id_carga, peso, Nodo(origen), Nodo(destino))
+
+    def contar(self):
+        """Cantidad de nodos, conexiones y solicitudes"""
+        return {tabla: self.conexion.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+                for tabla in ('nodos', 'conexiones', 'solicitudes')}
+
+    def validar_integridad(self):
+        """
+        Mismos controles que SistemaTransporte.validar_integridad. Las claves
+        foráneas ya impiden conexiones y solicitudes con nodos inexistentes;
+        los nodos aislados se buscan con los índices de origen y destino.
+        """
+        errores = []
+        aislados = [nombre for nombre, in self.conexion.execute(
+            "SELECT nombre FROM nodos n WHERE NOT EXISTS (SELECT 1 FROM conexiones WHERE origen = n.id) "
+            "AND NOT EXISTS (SELECT 1 FROM conexiones WHERE destino = n.id) ORDER BY id")]
+        if aislados:
+            errores.append(f"Nodos aislados (sin conexiones): {', '.join(aislados)}")
+        return errores
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def __repr__(self):
+        return f"BaseDatosRed({self.archivo!r})"
+
+
+# Código de prueba
+if __name__ == "__main__":
+    import os
+    from sistema_transporte import SistemaTransporte
+
+    os.makedirs('output', exist_ok=True)
+    archivo = os.path.join('output', 'red.sqlite')
+    if os.path.exists(archivo):
+        os.remove(archivo)
+
+    base = BaseDatosRed(archivo)
+    base.importar_csv('nodos.csv', 'conexiones.csv', 'solicitudes.csv').mostrar_errores()
+    print(base.contar())
+    print(base.buscar_nodo("zarate"))
+    for conexion in base.conexiones_desde("Zarate", "Automotor"):
+        print(conexion)
+
+    base.agregar_nodo("Rosario")
+    base.agregar_conexion("Zarate", "Rosario", "Automotor", 180, "peso_max", 20000)
+    base.actualizar_conexion("Zarate", "Rosario", "Automotor", 175)
+    print(base.conexiones_entre("Zarate", "Rosario"))
+    print("Integridad:", base.validar_integridad() or "OK")
+
+    sistema = base.cargar_en(SistemaTransporte())
+    print(f"Sistema: {len(sistema.nodos)} nodos, {len(sistema.conexiones)} conexiones, "
+          f"{len(sistema.solicitudes)} solicitudes (versión de la base {base.version})")
+    base.cerrar()
@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import time
+
+FORMATO = 2   # Cambia si cambia el formato de los valores guardados
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor
+);
+CREATE TABLE IF NOT EXISTS entradas (
+    huella TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    valor TEXT NOT NULL,
+    tamano INTEGER NOT NULL,
+    usado REAL NOT NULL,
+    PRIMARY KEY (huella, clave)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entradas_usado ON entradas (usado);
+"""
+
+class CacheDisco:
+    """
+    Cache persistente de resultados del planificador, compartida entre
+    ejecuciones y entre procesos (SQLite, solo biblioteca estándar).
+    - Cada entrada se guarda bajo la huella de la red (ver
+      Planificador.huella_red) y una clave. Si la red cambia, cambia la
+      huella: las entradas viejas no se vuelven a usar y son las primeras
+      que se desalojan, sin invalidarlas a mano.
+    - El tamaño está acotado: al pasar max_mb se desalojan primero las
+      entradas de otras huellas y después las usadas hace más tiempo, hasta
+      quedar en el 90%.
+    - Varios procesos pueden usar el mismo archivo: la base está en modo WAL,
+      cada escritura es una transacción que toma el bloqueo de escritura
+      (esperando hasta espera segundos) y la conexión se reabre en los
+      procesos hijos (fork).
+    Las claves y los valores se guardan como JSON (ids de conexiones, no objetos;
+    las evaluaciones llevan también las horas sorteadas por el clima).
+    """
+
+    def __init__(self, archivo, max_mb=64, espera=30.0):
+        if not max_mb > 0:
+            raise ValueError("max_mb debe ser mayor a cero")
+        self.archivo = archivo
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.espera = espera
+        self._conexion = None
+        self._pid = None
+        self.aciertos = 0
+        self.fallos = 0
+        self.escrituras = 0
+        self.desalojos = 0
+
+        formato = self.conexion.execute("SELECT valor FROM meta WHERE clave = 'formato'").fetchone()
+        if formato is not None and formato[0] != FORMATO:
+            # Valores de otro formato: no se pueden leer, se descartan
+            self.limpiar()
+        with self._escribir() as conexion:
+            conexion.execute("INSERT OR REPLACE INTO meta VALUES ('formato', ?)", (FORMATO,))
+            conexion.execute("INSERT OR IGNORE INTO meta VALUES ('bytes', 0)")
+
+    @property
+    def conexion(self):
+        """Conexión de este proceso (una conexión SQLite no debe cruzar un fork)"""
+        if self._pid != os.getpid():
+            self._conexion = sqlite3.connect(self.archivo, timeout=self.espera, isolation_level=None)
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("PRAGMA synchronous=NORMAL")
+            self._conexion.executescript(ESQUEMA)
+            self._pid = os.getpid()
+        return self._conexion
+
+    def _escribir(self):
+        """Transacción de escritura (BEGIN IMMEDIATE: toma el bloqueo antes de leer)"""
+        return _Transaccion(self.conexion)
+
+    def obtener(self, huella, clave):
+        """Valor guardado para la huella y la clave, o None"""
+        clave = json.dumps(clave)
+        fila = self.conexion.execute("SELECT valor, usado FROM entradas WHERE huella = ? AND clave = ?",
+                                     (huella, clave)).fetchone()
+        if fila is None:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        ahora = time.time()
+        # La antigüedad solo ordena el desalojo: no hace falta escribir en cada lectura
+        if ahora - fila[1] > 60:
+            with self._escribir() as conexion:
+                conexion.execute("UPDATE entradas SET usado = ? WHERE huella = ? AND clave = ?", (ahora, huella, clave))
+        return json.loads(fila[0])
+
+    def guardar(self, huella, clave, valor):
+        """Guarda (o reemplaza) un valor; si se pasa del tamaño máximo desaloja"""
+        clave = json.dumps(clave)
+        valor = json.dumps(valor, separators=(',', ':'))
+        tamano = len(huella) + len(clave) + len(valor)
+        with self._escribir() as conexion:
+            anterior = conexion.execute("SELECT tamano FROM entradas WHERE huella = ? AND clave = ?",
+                                        (huella, clave)).fetchone()
+            conexion.execute("INSERT OR REPLACE INTO entradas VALUES (?, ?, ?, ?, ?)",
+                             (huella, clave, valor, tamano, time.time()))
+            total = self._sumar_bytes(conexion, tamano - (anterior[0] if anterior else 0))
+            if total > self.max_bytes:
+                self._desalojar(conexion, huella, total)
+        self.escrituras += 1
+
+    @staticmethod
+    def _sumar_bytes(conexion, diferencia):
+        conexion.execute("UPDATE meta SET valor = valor + ? WHERE clave = 'bytes'", (diferencia,))
+        return conexion.execute("SELECT valor FROM meta WHERE clave = 'bytes'").fetchone()[0]
+
+    def _desalojar(self, conexion, huella, total):
+        """Borra entradas (otras huellas primero, después las menos usadas) hasta el 90% del máximo"""
+        objetivo = self.max_bytes * 0.9
+        while total > objetivo:
+            victimas = conexion.execute(
+                "SELECT huella, clave, tamano FROM entradas ORDER BY huella = ?, usado LIMIT 256", (huella,)).fetchall()
+            if not victimas:
+                break
+            for huella_victima, clave, tamano in victimas:
+                conexion.execute("DELETE FROM entradas WHERE huella = ? AND clave = ?", (huella_victima, clave))
+                total -= tamano
+                self.desalojos += 1
+                if total <= objetivo:
+                    break
+        conexion.execute("UPDATE meta SET valor = ? WHERE clave = 'bytes'", (max(total, 0),))
+
+    def limpiar(self):
+        """Vacía la cache (las estadísticas se conservan)"""
+        with self._escribir() as conexion:
+            conexion.execute("DELETE FROM entradas")
+            conexion.execute("INSERT OR REPLACE INTO meta VALUES ('bytes', 0)")
+
+    def obtener_estadisticas(self):
+        """Aciertos, fallos, escrituras y desalojos de este proceso; entradas y bytes del archivo"""
+        entradas, = self.conexion.execute("SELECT COUNT(*) FROM entradas").fetchone()
+        total, = self.conexion.execute("SELECT valor FROM meta WHERE clave = 'bytes'").fetchone()
+        consultas = self.aciertos + self.fallos
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'escrituras': self.escrituras,
+            'desalojos': self.desalojos,
+            'entradas': entradas,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0
+        }
+
+    def cerrar(self):
+        """Cierra la conexión de este proceso"""
+        if self._conexion is not None and self._pid == os.getpid():
+            self._conexion.close()
+        self._conexion = None
+        self._pid = None
+
+    def __len__(self):
+        return self.conexion.execute("SELECT COUNT(*) FROM entradas").fetchone()[0]
+
+    def __repr__(self):
+        return f"CacheDisco({self.archivo!r}, max_bytes={self.max_bytes}, aciertos={self.aciertos}, fallos={self.fallos})"
+
+
+class _Transaccion:
+    """with: BEGIN IMMEDIATE ... COMMIT (o ROLLBACK si hubo un error)"""
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+
+    def __enter__(self):
+        self.conexion.execute("BEGIN IMMEDIATE")
+        return self.conexion
+
+    def __exit__(self, tipo, valor, traza):
+        self.conexion.execute("COMMIT" if tipo is None else "ROLLBACK")
+        return False
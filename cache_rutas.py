@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+class CacheRutas:
+    """
+    Cache LRU acotada de rutas ya resueltas por el planificador.
+    Guarda las conexiones elegidas (no los itinerarios): al reutilizarlas
+    el planificador vuelve a calcular tiempo y costo con la carga real.
+    """
+
+    def __init__(self, capacidad=1024):
+        if not isinstance(capacidad, int) or capacidad < 0:
+            raise ValueError("La capacidad debe ser un entero >= 0")
+        self.capacidad = capacidad
+        self.entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave):
+        """Devuelve el valor guardado (y lo marca como reciente) o None"""
+        valor = self.entradas.get(clave)
+        if valor is None:
+            self.fallos += 1
+            return None
+        self.entradas.move_to_end(clave)
+        self.aciertos += 1
+        return valor
+
+    def guardar(self, clave, valor):
+        """Guarda un valor; si se supera la capacidad descarta el menos usado"""
+        if self.capacidad == 0:
+            return
+        self.entradas[clave] = valor
+        self.entradas.move_to_end(clave)
+        while len(self.entradas) > self.capacidad:
+            self.entradas.popitem(last=False)
+            self.desalojos += 1
+
+    def limpiar(self):
+        """Vacía la cache (las estadísticas se conservan)"""
+        self.entradas.clear()
+
+    def obtener_estadisticas(self):
+        """Aciertos, fallos, desalojos, tamaño y tasa de aciertos"""
+        consultas = self.aciertos + self.fallos
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+            'tamano': len(self.entradas),
+            'capacidad': self.capacidad,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0
+        }
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def __repr__(self):
+        return f"CacheRutas(tamano={len(self.entradas)}, capacidad={self.capacidad}, aciertos={self.aciertos}, fallos={self.fallos})"
@@ -0,0 +1,351 @@
+from nodo import Nodo
+from conexion import Conexion
+from solicitud_transporte import SolicitudTransporte
+from validaciones import validar_modo_transporte, validar_restriccion_conexion
+from validaciones import validar_texto, validar_mayor_cero, validar_origen_destino
+from itertools import islice
+from sys import intern
+import csv
+import gc
+import time
+
+COLUMNAS_NODOS = ['nombre']
+COLUMNAS_CONEXIONES = ['origen', 'destino', 'tipo', 'distancia_km']
+COLUMNAS_SOLICITUDES = ['id_carga', 'peso_kg', 'origen', 'destino']
+
+def _a_numero(texto):
+    """float del texto, o None si no es un número"""
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+def _a_numeros(columna):
+    """floats de una columna; None en los valores que no son números"""
+    try:
+        return list(map(float, columna))
+    except ValueError:
+        return [_a_numero(texto) for texto in columna]
+
+class CargadorMasivo:
+    """
+    Carga de archivos grandes de nodos, conexiones y solicitudes.
+    - Lee el CSV por bloques de filas y valida cada columna del bloque de una
+      vez; los valores que se repiten (modos, restricciones) se validan una
+      sola vez.
+    - Las filas con problemas se cuentan por categoría y solo se guardan los
+      primeros ejemplos (max_ejemplos) en lugar de imprimir cada una.
+    - Muestra el avance y las filas por segundo de cada bloque.
+    - El recolector de basura se pausa mientras se crean los objetos.
+    Con archivos válidos el SistemaTransporte queda igual que con sus
+    cargar_nodos, cargar_conexiones y cargar_solicitudes.
+    """
+
+    def __init__(self, sistema_transporte, tamano_bloque=100000, max_ejemplos=20, mostrar_progreso=True):
+        self.sistema = sistema_transporte
+        self.tamano_bloque = tamano_bloque
+        self.max_ejemplos = max_ejemplos
+        self.mostrar_progreso = mostrar_progreso
+        self.archivos = {}      # {'conexiones': {'filas', 'agregadas', 'con_errores', 'segundos'}}
+        self.errores = {}       # {categoría: filas}
+        self.ejemplos = []      # [(archivo, fila, categoría, detalle)], como mucho max_ejemplos
+
+    # --- Lectura por bloques ---
+
+    def _leer_bloques(self, archivo_csv, columnas, opcionales=()):
+        """
+        Genera (primera_fila, columnas) por cada bloque: una tupla de valores
+        por columna pedida, en ese orden (las filas cortas se completan con '',
+        igual que las columnas opcionales que no están en el archivo).
+        primera_fila es el número de fila del archivo (la del encabezado es la 1).
+        """
+        with open(archivo_csv, newline='', encoding='utf-8') as f:
+            lector = csv.reader(f)
+            encabezado = next(lector, None)
+            if encabezado is None:
+                return
+            faltantes = [columna for columna in columnas if columna not in encabezado]
+            if faltantes:
+                raise ValueError(f"{archivo_csv}: faltan las columnas {', '.join(faltantes)}")
+            indices = [encabezado.index(columna) for columna in columnas]
+            indices += [encabezado.index(columna) if columna in encabezado else None for columna in opcionales]
+            ancho = len(encabezado)
+
+            primera = 2
+            while True:
+                bloque = list(islice(lector, self.tamano_bloque))
+                if not bloque:
+                    return
+                if min(map(len, bloque)) < ancho:
+                    bloque = [fila if len(fila) >= ancho else fila + [''] * (ancho - len(fila)) for fila in bloque]
+                todas = list(zip(*bloque))
+                vacia = ('',) * len(bloque)
+                yield primera, [todas[i] if i is not None else vacia for i in indices]
+                primera += len(bloque)
+
+    def _sin_recolector(self, carga, archivo_csv):
+        """Ejecuta carga(archivo_csv) con el recolector de basura pausado"""
+        activo = gc.isenabled()
+        gc.disable()
+        try:
+            return carga(archivo_csv)
+        finally:
+            if activo:
+                gc.enable()
+
+    def _registrar_error(self, archivo, fila, categoria, detalle):
+        self.errores[categoria] = self.errores.get(categoria, 0) + 1
+        if len(self.ejemplos) < self.max_ejemplos:
+            self.ejemplos.append((archivo, fila, categoria, detalle))
+
+    def _avance(self, nombre, filas, inicio):
+        if self.mostrar_progreso:
+            segundos = time.perf_counter() - inicio
+            print(f"  {nombre}: {filas:,} filas ({filas / segundos if segundos else 0:,.0f} filas/s)")
+
+    def _terminar(self, nombre, filas, agregadas, con_errores, inicio):
+        segundos = time.perf_counter() - inicio
+        self.archivos[nombre] = {
+            'filas': filas,
+            'agregadas': agregadas,
+            'con_errores': con_errores,
+            'segundos': segundos,
+            'filas_por_segundo': filas / segundos if segundos else 0.0
+        }
+        if self.mostrar_progreso:
+            print(f"Cargadas {agregadas} {nombre} en {segundos:.2f}s "
+                  f"({self.archivos[nombre]['filas_por_segundo']:,.0f} filas/s, {con_errores} filas con errores)")
+
+    # --- Archivos ---
+
+    def cargar_nodos(self, archivo_csv):
+        """Carga los nodos (columna 'nombre'); los repetidos se ignoran como en cargar_nodos"""
+        return self._sin_recolector(self._cargar_nodos, archivo_csv)
+
+    def cargar_conexiones(self, archivo_csv):
+        """Carga las conexiones con las mismas validaciones que Conexion, por columna"""
+        return self._sin_recolector(self._cargar_conexiones, archivo_csv)
+
+    def cargar_solicitudes(self, archivo_csv):
+        """Carga las solicitudes cuyos nodos existen en la red"""
+        return self._sin_recolector(self._cargar_solicitudes, archivo_csv)
+
+    def _cargar_nodos(self, archivo_csv):
+        nodos = self.sistema.nodos
+        for nombres in self.leer_nodos(archivo_csv, nodos):
+            for nombre in nombres:
+                if nombre not in nodos:
+                    nodo = Nodo(nombre)
+                    nodos[nodo.nombre] = nodo
+        self.sistema._invalidar_preprocesamiento()
+        return self.archivos['nodos']['agregadas']
+
+    def leer_nodos(self, archivo_csv, existentes):
+        """
+        Genera, por bloque, los nombres válidos del archivo que no están en
+        existentes. Quien los consume agrega los nuevos a existentes (que
+        pueden repetirse dentro del bloque); los agregados se cuentan por
+        lo que creció existentes.
+        """
+        if self.mostrar_progreso:
+            print(f"Cargando nodos desde {archivo_csv}...")
+        inicio = time.perf_counter()
+        filas = agregadas = con_errores = 0
+
+        for primera, (nombres,) in self._leer_bloques(archivo_csv, COLUMNAS_NODOS):
+            nuevos = []
+            for j, nombre in enumerate(map(str.strip, nombres)):
+                if nombre in existentes:
+                    continue
+                if not nombre:
+                    self._registrar_error(archivo_csv, primera + j, 'nombre_vacio', "nombre vacío")
+                    con_errores += 1
+                    continue
+                nuevos.append(nombre)
+            antes = len(existentes)
+            yield nuevos
+            agregadas += len(existentes) - antes
+            filas += len(nombres)
+            self._avance("nodos", filas, inicio)
+
+        self._terminar("nodos", filas, agregadas, con_errores, inicio)
+
+    def _cargar_conexiones(self, archivo_csv):
+        nodos = self.sistema.nodos
+        conexiones = self.sistema.conexiones
+        for bloque in self.leer_conexiones(archivo_csv, nodos.get):
+            for origen, destino, modo, distancia, restriccion in bloque:
+                conexion = Conexion.sin_validar(origen, destino, modo, distancia, *restriccion)
+                origen.agregarConexiones(conexion)
+                conexiones.append(conexion)
+        self.sistema._invalidar_preprocesamiento()
+        return self.archivos['conexiones']['agregadas']
+
+    def leer_conexiones(self, archivo_csv, buscar_nodo):
+        """
+        Genera, por bloque, las conexiones válidas del archivo sin crear
+        objetos: listas de (origen, destino, modo, distancia, (restricción, valor))
+        con origen y destino según buscar_nodo(nombre) (None si no existe).
+        Las filas con problemas quedan en el reporte.
+        """
+        if self.mostrar_progreso:
+            print(f"Cargando conexiones desde {archivo_csv}...")
+        modos = {}           # {texto del archivo: modo normalizado o None}
+        restricciones = {}   # {(restricción, valor): (restricción, valor validado) o None}
+        inicio = time.perf_counter()
+        filas = agregadas = con_errores = 0
+
+        for primera, columnas in self._leer_bloques(archivo_csv, COLUMNAS_CONEXIONES,
+                                                    ('restriccion', 'valor_restriccion')):
+            origenes, destinos, tipos, distancias, nombres_restriccion, valores = columnas
+
+            # Validación por columna: los valores repetidos se validan una vez
+            nodos_origen = list(map(buscar_nodo, map(str.strip, origenes)))
+            nodos_destino = list(map(buscar_nodo, map(str.strip, destinos)))
+            numeros = _a_numeros(distancias)
+            tipos = list(map(str.strip, tipos))
+            for tipo in set(tipos).difference(modos):
+                try:
+                    modos[tipo] = validar_modo_transporte(tipo)
+                except ValueError:
+                    modos[tipo] = None
+            pares = list(zip([restriccion.strip() or None for restriccion in nombres_restriccion],
+                             [valor.strip() or None for valor in valores]))
+            for par in set(pares).difference(restricciones):
+                restricciones[par] = self._validar_restriccion(*par)
+
+            validas = []
+            for j, (origen, destino, distancia, tipo, par) in enumerate(
+                    zip(nodos_origen, nodos_destino, numeros, tipos, pares)):
+                modo = modos[tipo]
+                restriccion = restricciones[par]
+                if (origen is None or destino is None or modo is None or restriccion is None
+                        or distancia is None or distancia < 0 or distancia == 0):
+                    self._error_conexion(archivo_csv, primera + j, columnas, j, distancia, modo, restriccion)
+                    con_errores += 1
+                    continue
+                validas.append((origen, destino, modo, distancia, restriccion))
+            yield validas
+            agregadas += len(validas)
+            filas += len(origenes)
+            self._avance("conexiones", filas, inicio)
+
+        self._terminar("conexiones", filas, agregadas, con_errores, inicio)
+
+    def _error_conexion(self, archivo_csv, fila, columnas, j, distancia, modo, restriccion):
+        """Registra el primer problema de la fila j (en el orden en que valida Conexion)"""
+        origen, destino, tipo, texto_distancia, nombre_restriccion, valor = (columna[j] for columna in columnas)
+        if distancia is None or distancia < 0 or distancia == 0:
+            self._registrar_error(archivo_csv, fila, 'distancia', f"distancia inválida: {texto_distancia!r}")
+        elif modo is None:
+            self._registrar_error(archivo_csv, fila, 'modo', f"modo inválido: {tipo!r}")
+        elif restriccion is None:
+            self._registrar_error(archivo_csv, fila, 'restriccion',
+                                  f"restricción inválida: {nombre_restriccion.strip()} = {valor.strip()!r}")
+        else:
+            self._registrar_error(archivo_csv, fila, 'nodo_desconocido', f"{origen.strip()} -> {destino.strip()}")
+
+    def _validar_restriccion(self, restriccion, valor):
+        """(restricción, valor) como los deja Conexion, o None si el valor no es válido"""
+        if restriccion is None:
+            return None, (intern(valor) if valor else valor)
+        restriccion = intern(restriccion)
+        if valor:
+            try:
+                valor = validar_restriccion_conexion(restriccion, valor)
+            except ValueError:
+                return None
+        if isinstance(valor, str):
+            valor = intern(valor)
+        return restriccion, valor
+
+    def _cargar_solicitudes(self, archivo_csv):
+        solicitudes = self.sistema.solicitudes
+        for validas in self.leer_solicitudes(archivo_csv, self.sistema.nodos.get):
+            solicitudes.extend(SolicitudTransporte(*fila) for fila in validas)
+        return self.archivos['solicitudes']['agregadas']
+
+    def leer_solicitudes(self, archivo_csv, buscar_nodo):
+        """
+        Genera, por bloque, las solicitudes válidas del archivo como
+        (id_carga, peso_kg, origen, destino), con las mismas validaciones
+        que SolicitudTransporte y los nodos según buscar_nodo(nombre)
+        (None si no existe).
+        """
+        if self.mostrar_progreso:
+            print(f"Cargando solicitudes desde {archivo_csv}...")
+        inicio = time.perf_counter()
+        filas = agregadas = con_errores = 0
+
+        for primera, (ids, pesos, origenes, destinos) in self._leer_bloques(archivo_csv, COLUMNAS_SOLICITUDES):
+            ids = list(map(str.strip, ids))
+            numeros = _a_numeros(pesos)
+            origenes = list(map(str.strip, origenes))
+            destinos = list(map(str.strip, destinos))
+            nodos_origen = list(map(buscar_nodo, origenes))
+            nodos_destino = list(map(buscar_nodo, destinos))
+
+            validas = []
+            for j, (id_carga, peso, origen, destino) in enumerate(zip(ids, numeros, nodos_origen, nodos_destino)):
+                if peso is None:
+                    self._registrar_error(archivo_csv, primera + j, 'peso', f"{id_carga}: peso inválido {pesos[j]!r}")
+                    con_errores += 1
+                    continue
+                if origen is None or destino is None:
+                    self._registrar_error(archivo_csv, primera + j, 'nodo_desconocido',
+                                          f"{id_carga}: {origenes[j]} -> {destinos[j]}")
+                    con_errores += 1
+                    continue
+                try:
+                    validas.append((validar_texto(id_carga), validar_mayor_cero(peso),
+                                    *validar_origen_destino(origen, destino)))
+                except (ValueError, TypeError) as e:
+                    self._registrar_error(archivo_csv, primera + j, 'solicitud_invalida', f"{id_carga}: {e}")
+                    con_errores += 1
+            yield validas
+            agregadas += len(validas)
+            filas += len(ids)
+            self._avance("solicitudes", filas, inicio)
+
+        self._terminar("solicitudes", filas, agregadas, con_errores, inicio)
+
+    # --- Reporte ---
+
+    def obtener_reporte(self):
+        """Filas, tiempos y errores de los archivos cargados"""
+        return {
+            'archivos': dict(self.archivos),
+            'errores': dict(self.errores),
+            'ejemplos': list(self.ejemplos),
+            'ejemplos_omitidos': sum(self.errores.values()) - len(self.ejemplos)
+        }
+
+    def mostrar_errores(self):
+        """Imprime el resumen de filas con errores y los primeros ejemplos"""
+        if not self.errores:
+            print("Carga sin errores")
+            return
+        print("Filas con errores:")
+        for categoria, cantidad in sorted(self.errores.items()):
+            print(f"  {categoria}: {cantidad}")
+        for archivo, fila, categoria, detalle in self.ejemplos:
+            print(f"  {archivo}, fila {fila} ({categoria}): {detalle}")
+        omitidos = sum(self.errores.values()) - len(self.ejemplos)
+        if omitidos > 0:
+            print(f"  ... y {omitidos} más")
+
+    def __repr__(self):
+        return f"CargadorMasivo(archivos={list(self.archivos)}, errores={sum(self.errores.values())})"
+
+
+# Código de prueba
+if __name__ == "__main__":
+    from sistema_transporte import SistemaTransporte
+
+    sistema = SistemaTransporte()
+    cargador = CargadorMasivo(sistema)
+    cargador.cargar_nodos('nodos.csv')
+    cargador.cargar_conexiones('conexiones.csv')
+    cargador.cargar_solicitudes('solicitudes.csv')
+    cargador.mostrar_errores()
+    print(cargador)
@@ -1,10 +1,11 @@
 from validaciones import *
+from sys import intern
 
 class Conexion:
     '''Represnta una ruta entre dos nodos con posibles restricciones.
     Incluye información de distancia, tipo de transporte y limitaciones'''
+    __slots__ = ('origen', 'destino', 'tipo', 'distancia', 'restriccion', 'valorRestriccion', 'vehiculo')
 
-    
     def __init__(self, origen, destino, tipo: str, distancia: int, restriccion=None, valorRestriccion=None):
         self.origen = origen
         self.destino = destino
@@ -12,12 +13,32 @@ class Conexion:
         self.distancia = validar_mayor_cero(distancia)
         
         '''Procesamiento de restricciones opcionales'''
-        self.restriccion = restriccion.strip() if restriccion and restriccion.strip() else None
+        self.restriccion = intern(restriccion.strip()) if restriccion and restriccion.strip() else None
         self.valorRestriccion = valorRestriccion
 
         if self.restriccion and valorRestriccion:
             self.valorRestriccion=validar_restriccion_conexion(self.restriccion, valorRestriccion)
 
+        '''Los nombres de restricción y los valores de texto se repiten en toda la red: se comparten'''
+        if isinstance(self.valorRestriccion, str):
+            self.valorRestriccion = intern(self.valorRestriccion)
+
+        '''Vehículo prototipo que asigna el planificador (ver PesosConexiones)'''
+        self.vehiculo = None
+
+    @classmethod
+    def sin_validar(cls, origen, destino, tipo, distancia, restriccion=None, valorRestriccion=None):
+        '''Crea la conexión con valores ya validados y normalizados (ver CargadorMasivo)'''
+        conexion = cls.__new__(cls)
+        conexion.origen = origen
+        conexion.destino = destino
+        conexion.tipo = tipo
+        conexion.distancia = distancia
+        conexion.restriccion = restriccion
+        conexion.valorRestriccion = valorRestriccion
+        conexion.vehiculo = None
+        return conexion
+
     def __str__ (self):
         base = f"Conexión de {self.origen} a {self.destino} ({self.tipo}): {self.distancia} km"
         if self.restriccion:
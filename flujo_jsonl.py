@@ -0,0 +1,144 @@
+from solicitud_transporte import SolicitudTransporte
+import json
+import sys
+
+KPIS = ("tiempo", "costo")
+CAMPOS_SOLICITUD = ('id_carga', 'peso_kg', 'origen', 'destino')
+
+
+def solicitud_de_dict(datos, nodos):
+    """
+    SolicitudTransporte de un objeto JSON ya decodificado, con los nodos
+    buscados en nodos ({nombre: Nodo}). Lanza ValueError o TypeError si no es válida.
+    """
+    if not isinstance(datos, dict):
+        raise ValueError("se esperaba un objeto JSON")
+    faltantes = [campo for campo in CAMPOS_SOLICITUD if campo not in datos]
+    if faltantes:
+        raise ValueError(f"faltan campos: {', '.join(faltantes)}")
+    origen = nodos.get(str(datos['origen']).strip())
+    destino = nodos.get(str(datos['destino']).strip())
+    if origen is None or destino is None:
+        raise ValueError(f"nodo desconocido: {datos['origen']} -> {datos['destino']}")
+    return SolicitudTransporte(str(datos['id_carga']).strip(), datos['peso_kg'], origen, destino)
+
+
+def leer_solicitudes_jsonl(entrada, nodos):
+    """
+    Genera las solicitudes de un flujo JSONL, una por línea:
+    {"id_carga": ..., "peso_kg": ..., "origen": ..., "destino": ...}
+    con los nodos buscados en nodos ({nombre: Nodo}). Las líneas vacías se
+    saltean. Por cada línea genera (numero_linea, solicitud, error): si la
+    línea no es válida la solicitud es None y error dice por qué.
+    Lee de a una línea: no guarda las solicitudes ya entregadas.
+    """
+    for numero, linea in enumerate(entrada, 1):
+        if not linea.strip():
+            continue
+        try:
+            solicitud = solicitud_de_dict(json.loads(linea), nodos)
+        except (ValueError, TypeError) as e:
+            yield numero, None, str(e)
+            continue
+        yield numero, solicitud, None
+
+
+def itinerario_a_dict(itinerario, con_tramos=True):
+    """Ruta, totales y (si con_tramos) detalle de tramos y transbordos de un itinerario"""
+    ruta = itinerario.obtener_ruta_completa()
+    resultado = {
+        'ruta': ruta,
+        'modos': list(dict.fromkeys(itinerario.obtener_vehiculos_utilizados())),
+        'distancia_total': itinerario.obtener_distancia_total(),
+        'tiempo_total': itinerario.tiempo_total,
+        'costo_total': itinerario.costo_total
+    }
+    if con_tramos:
+        resultado['tramos'] = [{
+            'origen': origen,
+            'destino': destino,
+            'modo': tramo.vehiculo.modo_de_transporte,
+            'distancia': tramo.distancia,
+            'tiempo': tramo.tiempo,
+            'costo': tramo.costo
+        } for origen, destino, tramo in zip(ruta, ruta[1:], itinerario.tramos)]
+        if itinerario.transbordos:
+            resultado['transbordos'] = [{'nodo': getattr(nodo, 'nombre', nodo), 'tiempo': tiempo, 'costo': costo}
+                                        for nodo, tiempo, costo in itinerario.transbordos]
+    return resultado
+
+
+def resultado_a_dict(solicitud, evaluacion):
+    """
+    Resultado de una solicitud evaluada (ver Planificador.evaluar_solicitud):
+    por KPI el mejor itinerario con sus tramos (None si no hay ruta) y los
+    óptimos de cada modo, solo con ruta y totales.
+    """
+    resultado = {
+        'id_carga': solicitud.id_carga,
+        'peso_kg': solicitud.peso_kg,
+        'origen': solicitud.origen.nombre,
+        'destino': solicitud.destino.nombre
+    }
+    for kpi in KPIS:
+        mejor, optimos_por_modo = evaluacion[kpi]
+        resultado[kpi] = itinerario_a_dict(mejor) if mejor else None
+        resultado[f'optimos_por_modo_{kpi}'] = {modo: itinerario_a_dict(itinerario, con_tramos=False)
+                                                for modo, itinerario in optimos_por_modo.items() if itinerario}
+    return resultado
+
+
+def resolver_flujo(planificador, entrada, salida):
+    """
+    Resuelve las solicitudes JSONL de entrada y escribe en salida un
+    resultado JSON compacto por línea, en el orden de entrada, apenas se
+    resuelve cada una (una línea inválida o que falla da {"linea", "error"}).
+    Solo hay una solicitud en memoria a la vez: no se llenan
+    sistema.solicitudes ni diccionarios de resultados (las caches del
+    planificador tienen capacidad acotada).
+    Devuelve cuántas solicitudes se resolvieron, cuántas no tienen ruta y
+    cuántas líneas dieron error.
+    """
+    nodos = planificador.sistema_transporte.nodos
+    resumen = {'resueltas': 0, 'sin_ruta': 0, 'con_errores': 0}
+    for numero, solicitud, error in leer_solicitudes_jsonl(entrada, nodos):
+        if solicitud is not None:
+            try:
+                resultado = resultado_a_dict(solicitud, planificador.evaluar_solicitud(solicitud))
+            except Exception as e:
+                error = str(e)
+        if error is not None:
+            resultado = {'linea': numero, 'error': error}
+            if solicitud is not None:
+                resultado['id_carga'] = solicitud.id_carga
+            resumen['con_errores'] += 1
+        elif resultado['tiempo'] is None:
+            resumen['sin_ruta'] += 1
+        else:
+            resumen['resueltas'] += 1
+        salida.write(json.dumps(resultado, ensure_ascii=False, separators=(',', ':')))
+        salida.write('\n')
+        salida.flush()
+    return resumen
+
+
+# Código de prueba
+if __name__ == "__main__":
+    import contextlib
+    import io
+    from sistema_transporte import SistemaTransporte
+    from planificador import Planificador
+
+    sistema = SistemaTransporte()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sistema.cargar_nodos('nodos.csv')
+        sistema.cargar_conexiones('conexiones.csv')
+    planificador = Planificador(sistema)
+
+    entrada = io.StringIO('{"id_carga": "CARGA_001", "peso_kg": 70000, "origen": "Zarate", "destino": "Mar_del_Plata"}\n'
+                          '\n'
+                          '{"id_carga": "CARGA_002", "peso_kg": 500, "origen": "Junin", "destino": "Azul"}\n'
+                          '{"id_carga": "CARGA_003", "peso_kg": 500, "origen": "Zarate", "destino": "Atlantida"}\n'
+                          'no es JSON\n')
+    resumen = resolver_flujo(planificador, entrada, sys.stdout)
+    print(resumen, file=sys.stderr)
@@ -1,22 +1,40 @@
-from planificador import *
+import hashlib
+import json
+import os
+import sys
 # Manejo de dependencias opcionales
 try:
-    import matplotlib.pyplot as plt
-    from datetime import datetime
+    # Figure + FigureCanvasAgg: se dibuja sin ventanas, sin depender del backend de pyplot
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
     MATPLOTLIB_DISPONIBLE = True
 except ImportError:
     MATPLOTLIB_DISPONIBLE = False
-    print("Matplotlib no disponible. Gráficos deshabilitados.")
+    print("Matplotlib no disponible. Gráficos deshabilitados.", file=sys.stderr)
+
+DIRECTORIO = 'output'
+DPI = 300
+VERSION_DIBUJO = 1   # Cambiarla si cambia cómo se dibuja: los archivos viejos no se reutilizan
 
 # Mapeo de nombres descriptivos por modo de transporte
 NOMBRES_VEHICULOS = {
     'ferroviaria': 'Tren',
-    'automotor': 'Camión', 
+    'automotor': 'Camión',
     'fluvial': 'Barco',
     'maritimo': 'Barco',
     'aerea': 'Avión'
 }
 
+# Colores y marcadores específicos para cada modo
+ESTILOS_MODO = {
+    'ferroviaria': {'color': 'blue', 'marker': 's', 'linestyle': '-'},      # Cuadrado
+    'automotor': {'color': 'green', 'marker': '^', 'linestyle': '--'},     # Triángulo
+    'fluvial': {'color': 'cyan', 'marker': 'd', 'linestyle': '-.'},        # Diamante
+    'maritimo': {'color': 'navy', 'marker': 'd', 'linestyle': '-.'},       # Diamante
+    'aerea': {'color': 'red', 'marker': 'v', 'linestyle': ':'}             # Triángulo invertido
+}
+ESTILO_POR_DEFECTO = {'color': 'gray', 'marker': 'o', 'linestyle': '-'}
+
 def verificar_matplotlib():
     """Verifica disponibilidad de matplotlib con instrucciones de instalación"""
     if not MATPLOTLIB_DISPONIBLE:
@@ -24,14 +42,318 @@ def verificar_matplotlib():
         return False
     return True
 
-def _crear_nombre_archivo(prefijo, sufijo=""):
-    """Crea nombres de archivo descriptivos con timestamp"""
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    nombre = f"{prefijo}"
-    if sufijo:
-        nombre += f"_{sufijo}"
-    nombre += f"_{timestamp}"
-    return f"output/{nombre}.png"
+# --- Datos de los gráficos ---
+
+def datos_itinerario(itinerario):
+    """
+    Lo que los gráficos usan de un itinerario, en tipos simples: se puede
+    enviar a los procesos de dibujo y calcular su hash.
+    """
+    return {
+        'kpi': itinerario.kpi_usado,
+        'ruta': itinerario.obtener_ruta_completa(),
+        'tramos': [(tramo.vehiculo.modo_de_transporte, tramo.distancia, tramo.tiempo, tramo.costo)
+                   for tramo in itinerario.tramos],
+        'distancia_total': itinerario.obtener_distancia_total(),
+        'tiempo_formateado': itinerario.obtener_tiempo_total_formateado(),
+        'costo_total': itinerario.costo_total
+    }
+
+def datos_por_modo(itinerarios_optimos_por_modo, mejor_itinerario):
+    """Datos de los óptimos de cada modo, marcando el mejor"""
+    return [(modo, datos_itinerario(itinerario), itinerario is mejor_itinerario)
+            for modo, itinerario in itinerarios_optimos_por_modo.items()]
+
+def datos_resumen_lote(filas):
+    """
+    Datos del gráfico agregado de un lote a partir de sus filas (ver
+    reporte_lote.filas_de_evaluacion o leer_filas): por KPI y modo elegido,
+    los puntos (tiempo, costo) y la cantidad de solicitudes.
+    """
+    puntos = {}
+    for fila in filas:
+        if fila['tiempo'] is None:
+            continue
+        modo = '+'.join(sorted(fila['modos']))
+        puntos.setdefault(fila['kpi'], {}).setdefault(modo, []).append((round(fila['tiempo'], 3), round(fila['costo'], 2)))
+    return {'puntos': puntos}
+
+def _acumulados(tramos, eje_x, eje_y):
+    """Valores acumulados (empezando en 0) de dos columnas de los tramos"""
+    xs, ys = [0], [0]
+    for tramo in tramos:
+        xs.append(xs[-1] + tramo[eje_x])
+        ys.append(ys[-1] + tramo[eje_y])
+    return xs, ys
+
+# Columnas de cada tramo en datos_itinerario
+MODO, DISTANCIA, TIEMPO, COSTO = range(4)
+
+# --- Dibujo (sobre una Figure de matplotlib, sin pyplot) ---
+
+def _dibujar_progreso(figura, datos):
+    """Progreso del viaje: distancia acumulada a lo largo del tiempo, con marcas en cada tramo"""
+    ejes = figura.subplots()
+    tiempos, distancias = _acumulados(datos['tramos'], TIEMPO, DISTANCIA)
+    ejes.plot(tiempos, distancias, color='blue', marker='o', linewidth=2, markersize=8)
+
+    # Agregar marcas en puntos de cambio de tramo
+    for i, tramo in enumerate(datos['tramos'], 1):
+        nombre_vehiculo = NOMBRES_VEHICULOS.get(tramo[MODO], 'Vehículo')
+        ejes.scatter(tiempos[i], distancias[i], s=200, color='red', marker='X', zorder=5)
+        ejes.annotate(f'{nombre_vehiculo}: ${tramo[COSTO]:.0f}', (tiempos[i], distancias[i]),
+                      xytext=(10, 10), textcoords='offset points', fontsize=10,
+                      bbox=dict(boxstyle='round,pad=0.3', facecolor='yellow', alpha=0.7))
+
+    ejes.set_title(f'Progreso del Viaje - Optimización por {datos["kpi"].upper()}\n'
+                   f'Ruta: {" -> ".join(datos["ruta"])}', fontsize=16)
+    ejes.set_xlabel('Tiempo Acumulado (horas)', fontsize=12)
+    ejes.set_ylabel('Distancia Acumulada (km)', fontsize=12)
+    ejes.grid(True, alpha=0.3)
+    info_text = (f'KPI: {datos["kpi"].upper()}\n'
+                 f'Tiempo total: {datos["tiempo_formateado"]}\n'
+                 f'Costo total: ${datos["costo_total"]:.2f}')
+    ejes.text(0.02, 0.98, info_text, transform=ejes.transAxes, fontsize=10, verticalalignment='top',
+              bbox=dict(boxstyle='round,pad=0.5', facecolor='lightblue', alpha=0.8))
+
+def _dibujar_costos(figura, datos):
+    """Eficiencia económica: costo acumulado según la distancia, con marcas en cada tramo"""
+    ejes = figura.subplots()
+    distancias, costos = _acumulados(datos['tramos'], DISTANCIA, COSTO)
+    ejes.plot(distancias, costos, color='purple', marker='o', linewidth=2, markersize=8)
+
+    for i, tramo in enumerate(datos['tramos'], 1):
+        nombre_vehiculo = NOMBRES_VEHICULOS.get(tramo[MODO], 'Vehículo')
+        ejes.scatter(distancias[i], costos[i], s=200, color='red', marker='X', zorder=5)
+        ejes.annotate(f'{nombre_vehiculo}: {tramo[DISTANCIA]}km', (distancias[i], costos[i]),
+                      xytext=(10, 10), textcoords='offset points', fontsize=10,
+                      bbox=dict(boxstyle='round,pad=0.3', facecolor='lightgreen', alpha=0.7))
+
+    ejes.set_title(f'Análisis de Costos - Optimización por {datos["kpi"].upper()}\n'
+                   f'Ruta: {" -> ".join(datos["ruta"])}', fontsize=16)
+    ejes.set_xlabel('Distancia Acumulada (km)', fontsize=12)
+    ejes.set_ylabel('Costo Acumulado ($)', fontsize=12)
+    ejes.grid(True, alpha=0.3)
+    info_text = f'KPI: {datos["kpi"].upper()}\nCosto total: ${datos["costo_total"]:.2f}'
+    if datos['distancia_total'] > 0:
+        info_text += f'\nCosto promedio: ${datos["costo_total"] / datos["distancia_total"]:.2f}/km'
+    ejes.text(0.02, 0.98, info_text, transform=ejes.transAxes, fontsize=10, verticalalignment='top',
+              bbox=dict(boxstyle='round,pad=0.5', facecolor='lightcoral', alpha=0.8))
+
+def _dibujar_por_modo(ejes, datos, eje_x, eje_y, escala_x=1):
+    """Una línea por modo con su estilo; el mejor itinerario resaltado"""
+    for modo, datos_modo, es_mejor in datos:
+        xs, ys = _acumulados(datos_modo['tramos'], eje_x, eje_y)
+        xs = [x * escala_x for x in xs]
+        estilo = ESTILOS_MODO.get(modo, ESTILO_POR_DEFECTO)
+        nombre_vehiculo = NOMBRES_VEHICULOS.get(modo, 'Vehículo')
+        if es_mejor:
+            ejes.plot(xs, ys, label=f"★ {nombre_vehiculo.upper()} (ÓPTIMO)", linewidth=5, color='gold',
+                      marker='*', markersize=15, linestyle='-', markeredgecolor='orange', markeredgewidth=2)
+        else:
+            ejes.plot(xs, ys, label=f"{nombre_vehiculo}", linewidth=3, color=estilo['color'],
+                      marker=estilo['marker'], markersize=10, linestyle=estilo['linestyle'], alpha=0.8)
+    ejes.legend(fontsize=11, loc='best')
+    ejes.grid(True, alpha=0.3)
+
+def _dibujar_costo_por_modo(figura, datos):
+    """Costo total según la distancia recorrida para cada modo de transporte"""
+    ejes = figura.subplots()
+    _dibujar_por_modo(ejes, datos, DISTANCIA, COSTO)
+    ejes.set_xlabel("Distancia Acumulada (km)", fontsize=12)
+    ejes.set_ylabel("Costo Acumulado ($)", fontsize=12)
+    ejes.set_title("Comparación de Costos por Modo de Transporte", fontsize=16)
+
+def _dibujar_tiempo_por_modo(figura, datos):
+    """Distancia según el tiempo (en minutos) para cada modo de transporte"""
+    ejes = figura.subplots()
+    _dibujar_por_modo(ejes, datos, TIEMPO, DISTANCIA, escala_x=60)   # horas a minutos
+    ejes.set_xlabel("Tiempo Acumulado (min)", fontsize=12)
+    ejes.set_ylabel("Distancia Acumulada (km)", fontsize=12)
+    ejes.set_title("Comparación de Tiempo vs Distancia por Modo", fontsize=16)
+
+def _dibujar_resumen_lote(figura, datos):
+    """Lote completo: (tiempo, costo) de cada solicitud por KPI y modo elegido, y cuántas eligieron cada modo"""
+    kpis = sorted(datos['puntos'], key=lambda kpi: (kpi != 'tiempo', kpi))   # tiempo primero
+    ejes = figura.subplots(2, max(len(kpis), 1), squeeze=False)
+    for columna, kpi in enumerate(kpis):
+        por_modo = datos['puntos'][kpi]
+        dispersion, barras = ejes[0][columna], ejes[1][columna]
+        for modo, puntos in sorted(por_modo.items()):
+            estilo = ESTILOS_MODO.get(modo, ESTILO_POR_DEFECTO)
+            dispersion.scatter([tiempo for tiempo, _ in puntos], [costo for _, costo in puntos], s=8, alpha=0.5,
+                               color=estilo['color'], marker=estilo['marker'],
+                               label=NOMBRES_VEHICULOS.get(modo, modo))
+        dispersion.set_title(f"Óptimos por {kpi.upper()} ({sum(map(len, por_modo.values()))} solicitudes)", fontsize=14)
+        dispersion.set_xlabel("Tiempo total (horas)", fontsize=11)
+        dispersion.set_ylabel("Costo total ($)", fontsize=11)
+        dispersion.legend(fontsize=9, loc='best')
+        dispersion.grid(True, alpha=0.3)
+
+        modos = sorted(por_modo, key=lambda modo: -len(por_modo[modo]))
+        barras.bar([NOMBRES_VEHICULOS.get(modo, modo) for modo in modos], [len(por_modo[modo]) for modo in modos],
+                   color=[ESTILOS_MODO.get(modo, ESTILO_POR_DEFECTO)['color'] for modo in modos], alpha=0.8)
+        barras.set_ylabel("Solicitudes", fontsize=11)
+        barras.set_title(f"Modo elegido por {kpi.upper()}", fontsize=14)
+        barras.grid(True, axis='y', alpha=0.3)
+
+# {tipo: (función de dibujo, tamaño de la figura)}
+DIBUJOS = {
+    'progreso': (_dibujar_progreso, (12, 7)),
+    'costos': (_dibujar_costos, (12, 7)),
+    'costo_por_modo': (_dibujar_costo_por_modo, (12, 8)),
+    'tiempo_por_modo': (_dibujar_tiempo_por_modo, (12, 8)),
+    'resumen_lote': (_dibujar_resumen_lote, (16, 12))
+}
+
+# Figuras de este proceso, una por tamaño: se limpian y se reutilizan
+_figuras = {}
+
+def _figura(tamano):
+    figura = _figuras.get(tamano)
+    if figura is None:
+        figura = Figure(figsize=tamano)
+        FigureCanvasAgg(figura)
+        _figuras[tamano] = figura
+    else:
+        figura.clear()
+    return figura
+
+def dibujar(tipo, datos, archivo, dpi=DPI):
+    """
+    Dibuja el gráfico y lo guarda en archivo (PNG). Se escribe en un archivo
+    temporal y se renombra: un archivo con el nombre final siempre está completo.
+    """
+    funcion, tamano = DIBUJOS[tipo]
+    figura = _figura(tamano)
+    funcion(figura, datos)
+    figura.tight_layout()
+    temporal = f"{archivo}.{os.getpid()}.tmp"
+    figura.savefig(temporal, dpi=dpi, bbox_inches='tight', format='png')
+    os.replace(temporal, archivo)
+    return archivo
+
+def nombre_archivo(tipo, datos, prefijo=None, directorio=DIRECTORIO, dpi=DPI):
+    """
+    Nombre del PNG según el contenido del gráfico (hash de tipo, datos y
+    resolución): el mismo gráfico siempre tiene el mismo nombre.
+    """
+    contenido = json.dumps([VERSION_DIBUJO, tipo, datos, dpi], sort_keys=True, separators=(',', ':'))
+    huella = hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(directorio, f"{(prefijo or tipo)[:120]}_{huella}.png")
+
+class GeneradorGraficos:
+    """
+    Genera los gráficos sin ventanas (Agg), listo para lotes.
+    - Cada archivo se nombra con un hash de su contenido: si ya existe (de
+      esta ejecución o de otra) no se vuelve a dibujar.
+    - Con procesos > 0 los gráficos se dibujan en un pool de procesos aparte
+      y graficar() vuelve enseguida; esperar() espera a que terminen. Con
+      max_pendientes gráficos encolados se espera a que terminen antes de
+      encolar más. Cada proceso reutiliza sus figuras entre gráficos.
+    - Con interactivo=True además se muestra cada gráfico en una ventana
+      (pyplot); en ese caso se dibuja en este proceso.
+    """
+
+    def __init__(self, procesos=0, directorio=DIRECTORIO, dpi=DPI, interactivo=False, max_pendientes=256):
+        self.procesos = 0 if interactivo else procesos
+        self.max_pendientes = max_pendientes
+        self.directorio = directorio
+        self.dpi = dpi
+        self.interactivo = interactivo
+        self.pool = None
+        self.pendientes = {}   # {archivo: Future} gráficos enviados al pool
+        self.dibujados = 0
+        self.existentes = 0
+        self.errores = []
+
+    def graficar(self, tipo, datos, prefijo=None):
+        """
+        Dibuja (o encola) el gráfico si su archivo no existe.
+        Devuelve (archivo, nuevo): nuevo es False si ya estaba.
+        """
+        archivo = nombre_archivo(tipo, datos, prefijo, self.directorio, self.dpi)
+        if archivo in self.pendientes or os.path.exists(archivo):
+            self.existentes += 1
+            return archivo, False
+        os.makedirs(self.directorio, exist_ok=True)
+        if self.procesos:
+            if self.pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self.pool = ProcessPoolExecutor(self.procesos)
+            if len(self.pendientes) >= self.max_pendientes:
+                self.esperar()
+            self.pendientes[archivo] = self.pool.submit(dibujar, tipo, datos, archivo, self.dpi)
+        else:
+            dibujar(tipo, datos, archivo, self.dpi)
+            if self.interactivo:
+                self._mostrar(archivo)
+        self.dibujados += 1
+        return archivo, True
+
+    @staticmethod
+    def _mostrar(archivo):
+        import matplotlib.pyplot as plt
+        plt.figure(figsize=(12, 8))
+        plt.imshow(plt.imread(archivo))
+        plt.axis('off')
+        plt.show()
+
+    def esperar(self):
+        """Espera los gráficos encolados; devuelve los errores de los que fallaron"""
+        for archivo, futuro in self.pendientes.items():
+            try:
+                futuro.result()
+            except Exception as e:
+                self.errores.append(f"{archivo}: {e}")
+        self.pendientes = {}
+        return self.errores
+
+    def cerrar(self):
+        """Espera los pendientes y termina el pool"""
+        self.esperar()
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar()
+        return False
+
+    def __repr__(self):
+        return (f"GeneradorGraficos(procesos={self.procesos}, dibujados={self.dibujados}, "
+                f"existentes={self.existentes}, pendientes={len(self.pendientes)})")
+
+# Generador que usan las funciones de este módulo (ver configurar)
+_generador = GeneradorGraficos()
+
+def configurar(procesos=0, directorio=DIRECTORIO, dpi=DPI, interactivo=False):
+    """Cambia el generador de las funciones del módulo (termina el anterior) y lo devuelve"""
+    global _generador
+    _generador.cerrar()
+    _generador = GeneradorGraficos(procesos, directorio, dpi, interactivo)
+    return _generador
+
+def esperar_graficos(cerrar=False):
+    """
+    Espera los gráficos que se están dibujando en el pool e informa los que
+    fallaron; con cerrar=True además termina el pool.
+    """
+    for error in _generador.esperar():
+        print(f"Error generando gráfico {error}")
+    _generador.errores = []
+    if cerrar:
+        _generador.cerrar()
+
+def _graficar(tipo, datos, prefijo, descripcion):
+    archivo, nuevo = _generador.graficar(tipo, datos, prefijo)
+    print(f"{descripcion} {'guardado' if nuevo else 'ya existente'}: {archivo}")
+    return archivo
+
+# --- Gráficos ---
 
 def grafico_distancia_vs_tiempo(itinerario):
     """
@@ -40,66 +362,14 @@ def grafico_distancia_vs_tiempo(itinerario):
     """
     if not verificar_matplotlib():
         return
-        
+
     if not itinerario.tramos:
         print("No hay tramos para graficar")
         return
-        
-    # Preparar datos acumulados (empezar en 0,0)
-    tiempos_acumulados = [0]
-    distancias_acumuladas = [0]
-    
-    tiempo_acum = 0
-    distancia_acum = 0
-    
-    for tramo in itinerario.tramos:
-        tiempo_acum += tramo.tiempo
-        distancia_acum += tramo.distancia
-        tiempos_acumulados.append(tiempo_acum)
-        distancias_acumuladas.append(distancia_acum)
-    
-    # Crear gráfico
-    plt.figure(figsize=(12, 7))
-    plt.plot(tiempos_acumulados, distancias_acumuladas, 
-             color='blue', marker='o', linewidth=2, markersize=8)
-    
-    # Agregar marcas en puntos de cambio de tramo
-    for i, tramo in enumerate(itinerario.tramos, 1):
-        nombre_vehiculo = NOMBRES_VEHICULOS.get(tramo.vehiculo.modo_de_transporte, 'Vehículo')
-        plt.scatter(tiempos_acumulados[i], distancias_acumuladas[i], 
-                   s=200, color='red', marker='X', zorder=5)
-        
-        # Etiqueta con información del tramo
-        plt.annotate(f'{nombre_vehiculo}: ${tramo.costo:.0f}', 
-                    (tiempos_acumulados[i], distancias_acumuladas[i]),
-                    xytext=(10, 10), textcoords='offset points', 
-                    fontsize=10, bbox=dict(boxstyle='round,pad=0.3', 
-                    facecolor='yellow', alpha=0.7))
-    
-    plt.title(f'Progreso del Viaje - Optimización por {itinerario.kpi_usado.upper()}\n'
-              f'Ruta: {" -> ".join(itinerario.obtener_ruta_completa())}', fontsize=16)
-    plt.xlabel('Tiempo Acumulado (horas)', fontsize=12)
-    plt.ylabel('Distancia Acumulada (km)', fontsize=12)
-    plt.grid(True, alpha=0.3)
-    
-    # Información adicional en el gráfico
-    info_text = (f'KPI: {itinerario.kpi_usado.upper()}\n'
-                f'Tiempo total: {itinerario.obtener_tiempo_total_formateado()}\n'
-                f'Costo total: ${itinerario.costo_total:.2f}')
-    
-    plt.text(0.02, 0.98, info_text, transform=plt.gca().transAxes, fontsize=10,
-            verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', 
-            facecolor='lightblue', alpha=0.8))
-    
-    plt.tight_layout()
-    
-    # Guardar con nombre descriptivo
+
     ruta_nombre = "_".join(itinerario.obtener_ruta_completa())
-    nombre_archivo = _crear_nombre_archivo(f"progreso_{ruta_nombre}_{itinerario.kpi_usado}")
-    plt.savefig(nombre_archivo, dpi=300, bbox_inches='tight')
-    print(f"Gráfico de progreso guardado: {nombre_archivo}")
-    
-    plt.show()
+    return _graficar('progreso', datos_itinerario(itinerario), f"progreso_{ruta_nombre}_{itinerario.kpi_usado}",
+                     "Gráfico de progreso")
 
 def grafico_costo_vs_distancia(itinerario):
     """
@@ -107,197 +377,57 @@ def grafico_costo_vs_distancia(itinerario):
     """
     if not verificar_matplotlib():
         return
-        
+
     if not itinerario.tramos:
         print("No hay tramos para graficar")
         return
-        
-    # Preparar datos acumulados
-    distancias_acumuladas = [0]
-    costos_acumulados = [0]
-    
-    distancia_acum = 0
-    costo_acum = 0
-    
-    for tramo in itinerario.tramos:
-        distancia_acum += tramo.distancia
-        costo_acum += tramo.costo
-        distancias_acumuladas.append(distancia_acum)
-        costos_acumulados.append(costo_acum)
-    
-    # Crear gráfico
-    plt.figure(figsize=(12, 7))
-    plt.plot(distancias_acumuladas, costos_acumulados, 
-             color='purple', marker='o', linewidth=2, markersize=8)
-    
-    # Agregar marcas en puntos de cambio de tramo
-    for i, tramo in enumerate(itinerario.tramos, 1):
-        nombre_vehiculo = NOMBRES_VEHICULOS.get(tramo.vehiculo.modo_de_transporte, 'Vehículo')
-        plt.scatter(distancias_acumuladas[i], costos_acumulados[i], 
-                   s=200, color='red', marker='X', zorder=5)
-        
-        # Etiqueta con información del tramo
-        plt.annotate(f'{nombre_vehiculo}: {tramo.distancia}km', 
-                    (distancias_acumuladas[i], costos_acumulados[i]),
-                    xytext=(10, 10), textcoords='offset points', 
-                    fontsize=10, bbox=dict(boxstyle='round,pad=0.3', 
-                    facecolor='lightgreen', alpha=0.7))
-    
-    plt.title(f'Análisis de Costos - Optimización por {itinerario.kpi_usado.upper()}\n'
-              f'Ruta: {" -> ".join(itinerario.obtener_ruta_completa())}', fontsize=16)
-    plt.xlabel('Distancia Acumulada (km)', fontsize=12)
-    plt.ylabel('Costo Acumulado ($)', fontsize=12)
-    plt.grid(True, alpha=0.3)
-    
-    # Información adicional
-    if itinerario.obtener_distancia_total() > 0:
-        costo_promedio_km = itinerario.costo_total / itinerario.obtener_distancia_total()
-        info_text = (f'KPI: {itinerario.kpi_usado.upper()}\n'
-                    f'Costo total: ${itinerario.costo_total:.2f}\n'
-                    f'Costo promedio: ${costo_promedio_km:.2f}/km')
-    else:
-        info_text = (f'KPI: {itinerario.kpi_usado.upper()}\n'
-                    f'Costo total: ${itinerario.costo_total:.2f}')
-    
-    plt.text(0.02, 0.98, info_text, transform=plt.gca().transAxes, fontsize=10,
-            verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', 
-            facecolor='lightcoral', alpha=0.8))
-    
-    plt.tight_layout()
-    
-    # Guardar con nombre descriptivo
+
     ruta_nombre = "_".join(itinerario.obtener_ruta_completa())
-    nombre_archivo = _crear_nombre_archivo(f"costos_{ruta_nombre}_{itinerario.kpi_usado}")
-    plt.savefig(nombre_archivo, dpi=300, bbox_inches='tight')
-    print(f"Gráfico de costos guardado: {nombre_archivo}")
-    
-    plt.show()
+    return _graficar('costos', datos_itinerario(itinerario), f"costos_{ruta_nombre}_{itinerario.kpi_usado}",
+                     "Gráfico de costos")
 
 def grafico_costo_vs_distancia_por_modo(itinerarios_optimos_por_modo, mejor_itinerario):
     """
-    NUEVO: Gráfico que muestra cómo varía el costo total según la distancia 
+    Gráfico que muestra cómo varía el costo total según la distancia
     recorrida para cada tipo de vehículo (modo de transporte).
     """
     if not verificar_matplotlib():
         return
-        
+
     if not itinerarios_optimos_por_modo:
         print("No hay itinerarios para graficar.")
         return
 
-    plt.figure(figsize=(12, 8))
-    
-    # Colores y marcadores específicos para cada modo
-    estilos_modo = {
-        'ferroviaria': {'color': 'blue', 'marker': 's', 'linestyle': '-'},      # Cuadrado
-        'automotor': {'color': 'green', 'marker': '^', 'linestyle': '--'},     # Triángulo
-        'fluvial': {'color': 'cyan', 'marker': 'd', 'linestyle': '-.'},        # Diamante
-        'maritimo': {'color': 'navy', 'marker': 'd', 'linestyle': '-.'},       # Diamante
-        'aerea': {'color': 'red', 'marker': 'v', 'linestyle': ':'}             # Triángulo invertido
-    }
-
-    for modo, itinerario in itinerarios_optimos_por_modo.items():
-        costos = [0]
-        distancias = [0]
-        costo_acumulado = 0
-        distancia_acumulada = 0
-
-        for tramo in itinerario.tramos:
-            costo_acumulado += tramo.costo
-            distancia_acumulada += tramo.distancia
-            costos.append(costo_acumulado)
-            distancias.append(distancia_acumulada)
-
-        # Obtener estilo para este modo
-        estilo = estilos_modo.get(modo, {'color': 'gray', 'marker': 'o', 'linestyle': '-'})
-        nombre_vehiculo = NOMBRES_VEHICULOS.get(modo, 'Vehículo')
-        
-        # Resaltar el mejor itinerario
-        if itinerario == mejor_itinerario:
-            plt.plot(distancias, costos, 
-                    label=f"★ {nombre_vehiculo.upper()} (ÓPTIMO)", 
-                    linewidth=5, color='gold', marker='*', markersize=15,
-                    linestyle='-', markeredgecolor='orange', markeredgewidth=2)
-        else:
-            plt.plot(distancias, costos, 
-                    label=f"{nombre_vehiculo}", 
-                    linewidth=3, color=estilo['color'], 
-                    marker=estilo['marker'], markersize=10,
-                    linestyle=estilo['linestyle'], alpha=0.8)
-
-    plt.xlabel("Distancia Acumulada (km)", fontsize=12)
-    plt.ylabel("Costo Acumulado ($)", fontsize=12)
-    plt.title("Comparación de Costos por Modo de Transporte", fontsize=16)
-    plt.legend(fontsize=11, loc='best')
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    # Guardar
-    nombre_archivo = _crear_nombre_archivo("costo_vs_distancia_por_modo")
-    plt.savefig(nombre_archivo, dpi=300, bbox_inches='tight')
-    print(f"Gráfico costo vs distancia por modo guardado: {nombre_archivo}")
-    
-    plt.show()
+    return _graficar('costo_por_modo', datos_por_modo(itinerarios_optimos_por_modo, mejor_itinerario),
+                     "costo_vs_distancia_por_modo", "Gráfico costo vs distancia por modo")
 
 def grafico_tiempo_vs_distancia_por_modo(itinerarios_optimos_por_modo, mejor_itinerario):
-    """Gráfico mejorado con diferentes marcadores y mejor diferenciación visual"""
+    """Gráfico con diferentes marcadores por modo: distancia según el tiempo"""
+    if not verificar_matplotlib():
+        return
+
     if not itinerarios_optimos_por_modo:
         print("No hay itinerarios para graficar.")
         return
 
-    plt.figure(figsize=(12, 8))
-    
-    # Colores y marcadores específicos para cada modo
-    estilos_modo = {
-        'ferroviaria': {'color': 'blue', 'marker': 's', 'linestyle': '-'},      # Cuadrado
-        'automotor': {'color': 'green', 'marker': '^', 'linestyle': '--'},     # Triángulo
-        'fluvial': {'color': 'cyan', 'marker': 'd', 'linestyle': '-.'},        # Diamante
-        'maritimo': {'color': 'navy', 'marker': 'd', 'linestyle': '-.'},       # Diamante
-        'aerea': {'color': 'red', 'marker': 'v', 'linestyle': ':'}             # Triángulo invertido
-    }
-
-    for modo, itinerario in itinerarios_optimos_por_modo.items():
-        tiempos = [0]
-        distancias = [0]
-        tiempo_acumulado = 0
-        distancia_acumulada = 0
+    return _graficar('tiempo_por_modo', datos_por_modo(itinerarios_optimos_por_modo, mejor_itinerario),
+                     "tiempo_vs_distancia_por_modo", "Gráfico tiempo vs distancia por modo")
 
-        for tramo in itinerario.tramos:
-            tiempo_acumulado += tramo.tiempo * 60  # pasa a minutos
-            distancia_acumulada += tramo.distancia
-            tiempos.append(tiempo_acumulado)
-            distancias.append(distancia_acumulada)
+def grafico_resumen_lote(filas, nombre="lote"):
+    """
+    Un solo gráfico para todo un lote (en vez de varios por solicitud):
+    tiempo y costo de cada solicitud por KPI y modo elegido, y cuántas
+    solicitudes eligieron cada modo. filas: las del modo silencioso (ver
+    reporte_lote), de un archivo o de las evaluaciones.
+    """
+    if not verificar_matplotlib():
+        return
 
-        # Obtener estilo para este modo
-        estilo = estilos_modo.get(modo, {'color': 'gray', 'marker': 'o', 'linestyle': '-'})
-        nombre_vehiculo = NOMBRES_VEHICULOS.get(modo, 'Vehículo')
-        
-        # Resaltar el mejor itinerario
-        if itinerario == mejor_itinerario:
-            plt.plot(tiempos, distancias, 
-                    label=f"★ {nombre_vehiculo.upper()} (ÓPTIMO)", 
-                    linewidth=5, color='gold', marker='*', markersize=15,
-                    linestyle='-', markeredgecolor='orange', markeredgewidth=2)
-        else:
-            plt.plot(tiempos, distancias, 
-                    label=f"{nombre_vehiculo}", 
-                    linewidth=3, color=estilo['color'], 
-                    marker=estilo['marker'], markersize=10,
-                    linestyle=estilo['linestyle'], alpha=0.8)
-
-    plt.xlabel("Tiempo Acumulado (min)", fontsize=12)
-    plt.ylabel("Distancia Acumulada (km)", fontsize=12)
-    plt.title("Comparación de Tiempo vs Distancia por Modo", fontsize=16)
-    plt.legend(fontsize=11, loc='best')
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    # Guardar
-    nombre_archivo = _crear_nombre_archivo("tiempo_vs_distancia_por_modo")
-    plt.savefig(nombre_archivo, dpi=300, bbox_inches='tight')
-    print(f"Gráfico tiempo vs distancia por modo guardado: {nombre_archivo}")
-    
-    plt.show()
+    datos = datos_resumen_lote(filas)
+    if not datos['puntos']:
+        print("No hay itinerarios para graficar.")
+        return
+    return _graficar('resumen_lote', datos, f"resumen_{nombre}", "Gráfico resumen del lote")
 
 def generar_todos_los_graficos(itinerario, nombre_itinerario="Itinerario"):
     """
@@ -305,12 +435,12 @@ def generar_todos_los_graficos(itinerario, nombre_itinerario="Itinerario"):
     """
     if not verificar_matplotlib():
         return
-        
+
     print(f"Generando gráficos para: {nombre_itinerario}")
-    
+
     try:
         grafico_distancia_vs_tiempo(itinerario)
         grafico_costo_vs_distancia(itinerario)
         print("Gráficos generados correctamente")
     except Exception as e:
-        print(f"Error generando gráficos: {e}")
\ No newline at end of file
+        print(f"Error generando gráficos: {e}")
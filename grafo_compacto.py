@@ -0,0 +1,161 @@
+from array import array
+
+INFINITO = float('inf')
+
+class GrafoCompacto:
+    """
+    Vista compilada e inmutable de la red de un SistemaTransporte.
+    - Los nodos se numeran de 0 a n-1 y las conexiones de 0 a m-1 (en el
+      orden de sistema.conexiones).
+    - Por cada modo (y para todos los modos juntos, clave None) guarda una
+      adyacencia CSR: las conexiones que salen del nodo v son
+      aristas[inicio[v]:inicio[v + 1]] y sus destinos destinos[...].
+    - Distancias y restricciones quedan en arrays tipados por conexión, así
+      los recorridos no comparan strings ni crean objetos.
+    Hay que volver a construirla si cambia la red (ver SistemaTransporte.obtener_grafo).
+    """
+
+    def __init__(self, sistema_transporte):
+        self.version = sistema_transporte.version
+        self.nodos = list(sistema_transporte.nodos.values())               # {id: Nodo}
+        self.indice = {nodo.nombre: i for i, nodo in enumerate(self.nodos)}  # {nombre: id}
+        self.conexiones = list(sistema_transporte.conexiones)                # {id: Conexion}
+        self._ids_conexiones = None   # {id(Conexion): id}, se arma al primer uso
+        self.modos = tuple(dict.fromkeys(conexion.tipo.lower() for conexion in self.conexiones))
+        indice_modo = {modo: i for i, modo in enumerate(self.modos)}
+
+        cantidad = len(self.conexiones)
+        self.origen = array('i', [0]) * cantidad
+        self.destino = array('i', [0]) * cantidad
+        self.modo = array('b', [0]) * cantidad
+        self.distancia = array('d', [0.0]) * cantidad
+        # Restricciones compiladas (valor neutro si la conexión no la tiene)
+        self.peso_max = array('d', [INFINITO]) * cantidad
+        self.velocidad_max = array('d', [INFINITO]) * cantidad
+        self.prob_mal_tiempo = array('d', [0.0]) * cantidad
+        self.maritimo = bytearray(cantidad)
+
+        for e, conexion in enumerate(self.conexiones):
+            self.origen[e] = self.indice[conexion.origen.nombre]
+            self.destino[e] = self.indice[conexion.destino.nombre]
+            self.modo[e] = indice_modo[conexion.tipo.lower()]
+            self.distancia[e] = conexion.distancia
+            self._compilar_restriccion(e, conexion)
+
+        self.adyacencias = {None: self._construir_csr(range(cantidad))}
+        for m, modo in enumerate(self.modos):
+            self.adyacencias[modo] = self._construir_csr([e for e in range(cantidad) if self.modo[e] == m])
+
+    @classmethod
+    def desde_arrays(cls, sistema_transporte, modos, arrays, adyacencias):
+        """
+        Grafo con arrays ya compilados (por ejemplo leídos de un SnapshotRed).
+        Los arrays pueden ser array o memoryview: solo se indexan.
+        """
+        grafo = cls.__new__(cls)
+        grafo.version = sistema_transporte.version
+        grafo.nodos = list(sistema_transporte.nodos.values())
+        grafo.indice = {nodo.nombre: i for i, nodo in enumerate(grafo.nodos)}
+        grafo.conexiones = list(sistema_transporte.conexiones)
+        grafo._ids_conexiones = None
+        grafo.modos = modos
+        for nombre in ('origen', 'destino', 'modo', 'distancia', 'peso_max', 'velocidad_max',
+                       'prob_mal_tiempo', 'maritimo'):
+            setattr(grafo, nombre, arrays[nombre])
+        grafo.adyacencias = adyacencias
+        return grafo
+
+    def _compilar_restriccion(self, e, conexion):
+        """Pasa la restricción de la conexión a sus arrays"""
+        (self.peso_max[e], self.velocidad_max[e], self.prob_mal_tiempo[e],
+         self.maritimo[e]) = self.restriccion_compilada(conexion.tipo, conexion.restriccion, conexion.valorRestriccion)
+
+    @staticmethod
+    def restriccion_compilada(tipo, restriccion, valor):
+        """
+        (peso_max, velocidad_max, prob_mal_tiempo, maritimo) de una conexión,
+        con valores neutros si no tiene la restricción (mismas reglas que el planificador)
+        """
+        neutros = [INFINITO, INFINITO, 0.0, 0]
+        if not restriccion or valor is None:
+            return neutros
+        if restriccion == "tipo":
+            neutros[3] = int(str(valor).strip().lower() == "maritimo")
+            return neutros
+        try:
+            valor = float(valor)
+        except (ValueError, TypeError):
+            return neutros
+        if restriccion == "peso_max" and tipo.lower() == "automotor":
+            neutros[0] = valor
+        elif restriccion == "velocidad_max":
+            neutros[1] = valor
+        elif restriccion == "prob_mal_tiempo":
+            neutros[2] = valor
+        return neutros
+
+    def _construir_csr(self, aristas):
+        """(inicio, destinos, aristas) de las conexiones dadas, agrupadas por origen"""
+        n = len(self.nodos)
+        inicio = array('i', [0]) * (n + 1)
+        for e in aristas:
+            inicio[self.origen[e] + 1] += 1
+        for v in range(n):
+            inicio[v + 1] += inicio[v]
+
+        # Orden estable: dentro de un nodo se respeta el orden de carga
+        posicion = array('i', inicio)
+        ordenadas = array('i', [0]) * inicio[n]
+        for e in aristas:
+            ordenadas[posicion[self.origen[e]]] = e
+            posicion[self.origen[e]] += 1
+        destinos = array('i', (self.destino[e] for e in ordenadas))
+        return inicio, destinos, ordenadas
+
+    def id_nodo(self, nodo):
+        """Id entero de un nodo (acepta el Nodo o su nombre)"""
+        return self.indice[nodo if isinstance(nodo, str) else nodo.nombre]
+
+    def umbrales_peso(self):
+        """{modo: pesos máximos distintos de sus conexiones, ordenados}"""
+        umbrales = {}
+        for e, peso_max in enumerate(self.peso_max):
+            if not INFINITO <= peso_max:
+                umbrales.setdefault(self.modos[self.modo[e]], set()).add(peso_max)
+        return {modo: sorted(valores) for modo, valores in umbrales.items()}
+
+    def valores_por_nodo(self, valor):
+        """Lista con un valor por nodo, para el estado de una búsqueda"""
+        return [valor] * len(self.nodos)
+
+    def marcas_por_nodo(self):
+        """Marca 0/1 por nodo (visitado, en el camino...) para una búsqueda"""
+        return bytearray(len(self.nodos))
+
+    def ids_de_conexiones(self, conexiones):
+        """Ids de una secuencia de objetos Conexion de la red"""
+        if self._ids_conexiones is None:
+            self._ids_conexiones = {id(conexion): e for e, conexion in enumerate(self.conexiones)}
+        return [self._ids_conexiones[id(conexion)] for conexion in conexiones]
+
+    def memoria_estimada(self):
+        """Bytes que ocupan los arrays del grafo (sin contar los objetos originales)"""
+        arrays = [self.origen, self.destino, self.modo, self.distancia, self.peso_max,
+                  self.velocidad_max, self.prob_mal_tiempo, self.maritimo]
+        for csr in self.adyacencias.values():
+            arrays.extend(csr)
+        return sum(memoryview(datos).nbytes for datos in arrays)
+
+    def obtener_reporte(self):
+        """Tamaño del grafo y memoria por conexión"""
+        memoria = self.memoria_estimada()
+        return {
+            'nodos': len(self.nodos),
+            'conexiones': len(self.conexiones),
+            'modos': self.modos,
+            'memoria_bytes': memoria,
+            'bytes_por_conexion': memoria / len(self.conexiones) if self.conexiones else 0.0
+        }
+
+    def __repr__(self):
+        return f"GrafoCompacto(nodos={len(self.nodos)}, conexiones={len(self.conexiones)}, modos={len(self.modos)})"
@@ -0,0 +1,241 @@
+import heapq
+import sys
+import time
+
+class JerarquiaContraccion:
+    """
+    Jerarquía de contracción (contraction hierarchy) sobre un conjunto de conexiones.
+    - Preprocesamiento: contrae los nodos de menor a mayor importancia y agrega
+      atajos (shortcuts) para conservar los caminos mínimos entre los restantes.
+    - Consulta: Dijkstra bidireccional que solo sube en la jerarquía.
+    Cada atajo recuerda el nodo contraído por el que pasa, así el camino
+    se despliega de nuevo en las conexiones originales.
+    """
+
+    def __init__(self, conexiones, peso, limite_testigos=60):
+        """
+        conexiones: conexiones habilitadas de la subred (un modo, una clase de carga)
+        peso(conexion): valor no negativo a minimizar (tiempo o costo)
+        limite_testigos: nodos que explora como máximo cada búsqueda de testigos
+        """
+        inicio = time.perf_counter()
+        self.limite_testigos = limite_testigos
+        self.nodos = []       # {id: Nodo}
+        self.indice = {}      # {Nodo: id}
+
+        # Grafo restante durante la contracción: {u: {v: (peso, via)}}
+        # via es la Conexion original o el id del nodo contraído (atajo)
+        salientes = []
+        entrantes = []
+        for conexion in conexiones:
+            u = self._obtener_id(conexion.origen, salientes, entrantes)
+            v = self._obtener_id(conexion.destino, salientes, entrantes)
+            if u == v:
+                continue
+            valor = peso(conexion)
+            if v not in salientes[u] or valor < salientes[u][v][0]:
+                salientes[u][v] = (valor, conexion)
+                entrantes[v][u] = (valor, conexion)
+        self.conexiones_originales = sum(len(arcos) for arcos in salientes)
+
+        self.rango = [0] * len(self.nodos)
+        self.arriba = [[] for _ in self.nodos]   # arcos u -> x con rango[x] > rango[u]
+        self.abajo = [[] for _ in self.nodos]    # arcos y -> u con rango[y] > rango[u], guardados en u
+        self.arcos = {}                          # {(u, x): (peso, via)} para desplegar atajos
+        self.atajos = 0
+        self._contraer(salientes, entrantes)
+        self.tiempo_preprocesamiento = time.perf_counter() - inicio
+
+    def _obtener_id(self, nodo, salientes, entrantes):
+        """Asigna un id entero a cada nodo de la subred"""
+        id_nodo = self.indice.get(nodo)
+        if id_nodo is None:
+            id_nodo = len(self.nodos)
+            self.indice[nodo] = id_nodo
+            self.nodos.append(nodo)
+            salientes.append({})
+            entrantes.append({})
+        return id_nodo
+
+    def _contraer(self, salientes, entrantes):
+        """Contrae todos los nodos en orden de diferencia de aristas (con actualización perezosa)"""
+        contraidos = [False] * len(self.nodos)
+        vecinos_contraidos = [0] * len(self.nodos)
+        cola = [(self._prioridad(v, salientes, entrantes, vecinos_contraidos), v) for v in range(len(self.nodos))]
+        heapq.heapify(cola)
+        orden = 0
+
+        while cola:
+            _, v = heapq.heappop(cola)
+            if contraidos[v]:
+                continue
+            # Actualización perezosa: si empeoró, vuelve a la cola
+            prioridad = self._prioridad(v, salientes, entrantes, vecinos_contraidos)
+            if cola and prioridad > cola[0][0]:
+                heapq.heappush(cola, (prioridad, v))
+                continue
+
+            atajos = self._atajos_necesarios(v, salientes, entrantes)
+            self.rango[v] = orden
+            orden += 1
+            contraidos[v] = True
+
+            # Los arcos hacia nodos todavía no contraídos quedan en la jerarquía
+            for x, (valor, via) in salientes[v].items():
+                self.arriba[v].append((x, valor))
+                self.arcos[(v, x)] = (valor, via)
+                del entrantes[x][v]
+                vecinos_contraidos[x] += 1
+            for u, (valor, via) in entrantes[v].items():
+                self.abajo[v].append((u, valor))
+                self.arcos[(u, v)] = (valor, via)
+                del salientes[u][v]
+                vecinos_contraidos[u] += 1
+            salientes[v] = {}
+            entrantes[v] = {}
+
+            for u, x, valor in atajos:
+                if x not in salientes[u] or valor < salientes[u][x][0]:
+                    salientes[u][x] = (valor, v)
+                    entrantes[x][u] = (valor, v)
+                    self.atajos += 1
+
+    def _prioridad(self, v, salientes, entrantes, vecinos_contraidos):
+        """Diferencia de aristas: atajos que agrega menos arcos que elimina"""
+        atajos = len(self._atajos_necesarios(v, salientes, entrantes))
+        return atajos - len(salientes[v]) - len(entrantes[v]) + vecinos_contraidos[v]
+
+    def _atajos_necesarios(self, v, salientes, entrantes):
+        """Atajos u -> x que hacen falta al contraer v (sin camino testigo más corto)"""
+        atajos = []
+        if not salientes[v] or not entrantes[v]:
+            return atajos
+        for u, (valor_uv, _) in entrantes[v].items():
+            objetivos = {x: valor_uv + valor_vx for x, (valor_vx, _) in salientes[v].items() if x != u}
+            if not objetivos:
+                continue
+            testigos = self._buscar_testigos(u, v, max(objetivos.values()), salientes)
+            for x, valor in objetivos.items():
+                if testigos.get(x, float('inf')) > valor:
+                    atajos.append((u, x, valor))
+        return atajos
+
+    def _buscar_testigos(self, u, excluido, limite, salientes):
+        """Dijkstra acotado desde u sin pasar por el nodo que se contrae"""
+        distancias = {u: 0.0}
+        cola = [(0.0, u)]
+        visitados = 0
+        while cola and visitados < self.limite_testigos:
+            valor, nodo = heapq.heappop(cola)
+            if valor > distancias.get(nodo, float('inf')):
+                continue
+            if valor > limite:
+                break
+            visitados += 1
+            for x, (peso, _) in salientes[nodo].items():
+                if x == excluido:
+                    continue
+                nuevo_valor = valor + peso
+                if nuevo_valor < distancias.get(x, float('inf')):
+                    distancias[x] = nuevo_valor
+                    heapq.heappush(cola, (nuevo_valor, x))
+        return distancias
+
+    def consultar(self, origen, destino):
+        """
+        Camino mínimo entre dos nodos con Dijkstra bidireccional ascendente.
+        Devuelve (valor, [conexiones]) o (None, []) si no hay camino.
+        """
+        s = self.indice.get(origen)
+        t = self.indice.get(destino)
+        if s is None or t is None:
+            return None, []
+        if s == t:
+            return 0.0, []
+
+        distancias = ({s: 0.0}, {t: 0.0})
+        anteriores = ({}, {})
+        cerrados = (set(), set())
+        colas = ([(0.0, s)], [(0.0, t)])
+        adyacencias = (self.arriba, self.abajo)
+        mejor = float('inf')
+        encuentro = None
+
+        while colas[0] or colas[1]:
+            # Se avanza por la dirección con menor valor pendiente
+            if not colas[1] or (colas[0] and colas[0][0][0] <= colas[1][0][0]):
+                lado = 0
+            else:
+                lado = 1
+            valor, nodo = heapq.heappop(colas[lado])
+            if valor >= mejor:
+                # Esta dirección ya no puede mejorar el resultado
+                colas[lado].clear()
+                continue
+            if nodo in cerrados[lado]:
+                continue
+            cerrados[lado].add(nodo)
+
+            otro = distancias[1 - lado].get(nodo)
+            if otro is not None and valor + otro < mejor:
+                mejor = valor + otro
+                encuentro = nodo
+
+            for vecino, peso in adyacencias[lado][nodo]:
+                nuevo_valor = valor + peso
+                if nuevo_valor < distancias[lado].get(vecino, float('inf')):
+                    distancias[lado][vecino] = nuevo_valor
+                    anteriores[lado][vecino] = nodo
+                    heapq.heappush(colas[lado], (nuevo_valor, vecino))
+
+        if encuentro is None:
+            return None, []
+
+        # Camino en la jerarquía: origen -> encuentro -> destino
+        camino = [encuentro]
+        while camino[0] != s:
+            camino.insert(0, anteriores[0][camino[0]])
+        while camino[-1] != t:
+            camino.append(anteriores[1][camino[-1]])
+
+        conexiones = []
+        for u, x in zip(camino, camino[1:]):
+            conexiones.extend(self._desplegar(u, x))
+        return mejor, conexiones
+
+    def _desplegar(self, u, x):
+        """Convierte un arco (posiblemente un atajo) en sus conexiones originales"""
+        conexiones = []
+        pendientes = [(u, x)]
+        while pendientes:
+            a, b = pendientes.pop()
+            _, via = self.arcos[(a, b)]
+            if isinstance(via, int):
+                # Se apila al revés para desplegar en orden
+                pendientes.append((via, b))
+                pendientes.append((a, via))
+            else:
+                conexiones.append(via)
+        return conexiones
+
+    def memoria_estimada(self):
+        """Bytes aproximados que ocupan las estructuras de la jerarquía"""
+        total = sys.getsizeof(self.rango) + sys.getsizeof(self.arriba) + sys.getsizeof(self.abajo)
+        total += sys.getsizeof(self.arcos) + sys.getsizeof(self.indice) + sys.getsizeof(self.nodos)
+        for lista in self.arriba + self.abajo:
+            total += sys.getsizeof(lista) + sum(sys.getsizeof(arco) for arco in lista)
+        total += sum(sys.getsizeof(clave) + sys.getsizeof(valor) for clave, valor in self.arcos.items())
+        return total
+
+    def obtener_reporte(self):
+        """Métricas del preprocesamiento"""
+        return {
+            'nodos': len(self.nodos),
+            'conexiones': self.conexiones_originales,
+            'atajos': self.atajos,
+            'tiempo_preprocesamiento': self.tiempo_preprocesamiento,
+            'memoria_bytes': self.memoria_estimada()
+        }
+
+    def __repr__(self):
+        return f"JerarquiaContraccion(nodos={len(self.nodos)}, atajos={self.atajos})"
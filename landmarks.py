@@ -0,0 +1,148 @@
+import heapq
+
+class Landmarks:
+    """
+    Cotas inferiores precalculadas para búsquedas A* (técnica ALT).
+    Elige algunos nodos de referencia (landmarks) y guarda la distancia,
+    el tiempo y el costo mínimos desde y hacia cada uno de ellos.
+    Por desigualdad triangular, para cualquier nodo v y destino t:
+        d(v, t) >= d(L, t) - d(L, v)   y   d(v, t) >= d(v, L) - d(t, L)
+    Las tablas se calculan para la red completa (búsquedas multimodales)
+    y para la subred de cada modo, donde las cotas son mucho más ajustadas.
+    """
+
+    CRITERIOS = ('distancia', 'tiempo', 'costo')
+
+    def __init__(self, sistema_transporte, crear_vehiculo, cantidad=4):
+        """
+        crear_vehiculo(conexion) debe devolver el vehículo de la conexión
+        (el mismo que usa el planificador para armar los tramos).
+        """
+        if cantidad < 1:
+            raise ValueError("Debe haber al menos un landmark")
+        self.sistema_transporte = sistema_transporte
+        self.cantidad = cantidad
+
+        # Peso mínimo de cada conexión por criterio, válido para cualquier carga
+        aristas = {None: []}    # {modo: [(origen, destino, pesos)]}, None = todos los modos
+        for conexion in sistema_transporte.conexiones:
+            pesos = self._pesos_minimos(conexion, crear_vehiculo(conexion))
+            arista = (conexion.origen, conexion.destino, pesos)
+            aristas[None].append(arista)
+            aristas.setdefault(conexion.tipo.lower(), []).append(arista)
+
+        # {modo: (landmarks, {criterio: [{nodo: valor}]} desde, ... hacia)}
+        self.tablas = {modo: self._construir_tabla(lista) for modo, lista in aristas.items()}
+        self.landmarks = self.tablas[None][0]
+
+    def _pesos_minimos(self, conexion, vehiculo):
+        """
+        (distancia, tiempo, costo) mínimos de la conexión:
+        - tiempo a velocidad nominal (el mal tiempo solo puede reducirla)
+        - costo de un único vehículo, sin el costo por carga
+        """
+        distancia = conexion.distancia
+        tiempo = distancia / vehiculo.velocidad_nominal
+        costo = vehiculo.calcular_costo_tramo(distancia, vehiculo.capacidad_de_carga)
+        return (distancia, tiempo, costo)
+
+    def _construir_tabla(self, aristas):
+        """Elige los landmarks de una subred y calcula sus valores mínimos"""
+        salientes = {}
+        entrantes = {}
+        for origen, destino, pesos in aristas:
+            salientes.setdefault(origen, []).append((destino, pesos))
+            entrantes.setdefault(destino, []).append((origen, pesos))
+
+        landmarks = self._elegir_landmarks(salientes, entrantes)
+        desde = {criterio: [] for criterio in self.CRITERIOS}
+        hacia = {criterio: [] for criterio in self.CRITERIOS}
+        for i, criterio in enumerate(self.CRITERIOS):
+            for landmark in landmarks:
+                desde[criterio].append(self._dijkstra(landmark, salientes, i))
+                hacia[criterio].append(self._dijkstra(landmark, entrantes, i))
+        return landmarks, desde, hacia
+
+    def _dijkstra(self, inicio, adyacencia, criterio):
+        """Valores mínimos desde inicio a todos los nodos alcanzables"""
+        valores = {inicio: 0.0}
+        cola = [(0.0, inicio.nombre, inicio)]
+        visitados = set()
+        while cola:
+            valor, _, nodo = heapq.heappop(cola)
+            if nodo in visitados:
+                continue
+            visitados.add(nodo)
+            for vecino, pesos in adyacencia.get(nodo, []):
+                nuevo_valor = valor + pesos[criterio]
+                if nuevo_valor < valores.get(vecino, float('inf')):
+                    valores[vecino] = nuevo_valor
+                    heapq.heappush(cola, (nuevo_valor, vecino.nombre, vecino))
+        return valores
+
+    def _elegir_landmarks(self, salientes, entrantes):
+        """
+        Selección por el punto más lejano: cada nuevo landmark es el nodo
+        más alejado (en km, en cualquier sentido) de los ya elegidos.
+        """
+        nodos = list(dict.fromkeys(list(salientes) + list(entrantes)))
+        if not nodos:
+            return []
+
+        elegidos = []
+        cercania = {nodo: float('inf') for nodo in nodos}
+        candidato = nodos[0]
+        while len(elegidos) < min(self.cantidad, len(nodos)):
+            elegidos.append(candidato)
+            desde = self._dijkstra(candidato, salientes, 0)
+            hacia = self._dijkstra(candidato, entrantes, 0)
+            for nodo in nodos:
+                valor = min(desde.get(nodo, float('inf')), hacia.get(nodo, float('inf')))
+                cercania[nodo] = min(cercania[nodo], valor)
+
+            restantes = [nodo for nodo in nodos if nodo not in elegidos]
+            if not restantes:
+                break
+            # Los nodos sin relación con los landmarks elegidos se priorizan
+            candidato = max(restantes, key=lambda nodo: cercania[nodo])
+        return elegidos
+
+    def cota_inferior(self, nodo, destino, criterio, modo=None):
+        """Cota inferior del criterio para ir de nodo a destino (en la subred del modo)"""
+        _, desde, hacia = self.tablas.get(modo, self.tablas[None])
+        cota = 0.0
+        for valores_desde, valores_hacia in zip(desde[criterio], hacia[criterio]):
+            if destino in valores_desde and nodo in valores_desde:
+                cota = max(cota, valores_desde[destino] - valores_desde[nodo])
+            if nodo in valores_hacia and destino in valores_hacia:
+                cota = max(cota, valores_hacia[nodo] - valores_hacia[destino])
+        return cota
+
+    def heuristica(self, destino, criterio, factor=1.0, modo=None):
+        """
+        Función h(nodo) para A* hacia el destino.
+        El factor escala la cota de costo por la cantidad mínima de vehículos.
+        """
+        _, desde, hacia = self.tablas.get(modo, self.tablas[None])
+        # Solo sirven los landmarks con relación al destino
+        terminos = []
+        for valores_desde, valores_hacia in zip(desde[criterio], hacia[criterio]):
+            terminos.append((valores_desde, valores_desde.get(destino), valores_hacia, valores_hacia.get(destino)))
+        memoria = {}
+
+        def h(nodo):
+            valor = memoria.get(nodo)
+            if valor is None:
+                valor = 0.0
+                for valores_desde, desde_destino, valores_hacia, hacia_destino in terminos:
+                    if desde_destino is not None and nodo in valores_desde:
+                        valor = max(valor, desde_destino - valores_desde[nodo])
+                    if hacia_destino is not None and nodo in valores_hacia:
+                        valor = max(valor, valores_hacia[nodo] - hacia_destino)
+                valor *= factor
+                memoria[nodo] = valor
+            return valor
+        return h
+
+    def __repr__(self):
+        return f"Landmarks({', '.join(nodo.nombre for nodo in self.landmarks)})"
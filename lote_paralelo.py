@@ -0,0 +1,239 @@
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from itertools import islice
+from metricas import METRICAS
+import contextlib
+import io
+import os
+
+TAMANO_BLOQUE_MAX = 256   # tareas por envío al pool
+BLOQUES_POR_PROCESO = 2   # bloques enviados y sin consumir, por proceso
+
+# Estado de cada proceso trabajador: la red se carga una sola vez por proceso
+_planificador_trabajador = None
+_error_trabajador = None   # por qué el trabajador no puede resolver (su red no es la del planificador)
+
+
+def opciones_trabajador(planificador, archivo_base_datos=None):
+    """
+    Opciones para _inicializar_trabajador que reproducen el planificador:
+    transbordos, capacidad de la cache, cache en disco, métricas y la
+    huella de su red. Con archivo_base_datos los trabajadores cargan la red
+    de esa base SQLite (la misma fuente que el planificador) en vez de los CSV.
+    """
+    cache_disco = planificador.cache_disco
+    return {
+        'archivo_base_datos': archivo_base_datos,
+        'cache_disco': (cache_disco.archivo, cache_disco.max_bytes / (1024 * 1024)) if cache_disco is not None else None,
+        'tiempo_transbordo': planificador.tiempo_transbordo,
+        'costo_transbordo': planificador.costo_transbordo,
+        'capacidad_cache': planificador.cache.capacidad,
+        'transbordos_por_nodo': dict(planificador.transbordos_por_nodo),
+        'metricas': METRICAS.activas,
+        'huella': planificador.sistema_transporte.huella()
+    }
+
+
+def _inicializar_trabajador(archivo_nodos, archivo_conexiones, opciones_planificador):
+    """
+    Carga la red en el proceso trabajador (una vez, al crearse el proceso).
+    Si su huella no es la de opciones_planificador (ver opciones_trabajador)
+    los ids de conexiones no coincidirían con los del planificador: el
+    trabajador no resuelve nada y verificar_trabajador lo informa.
+    """
+    global _planificador_trabajador, _error_trabajador
+    from sistema_transporte import SistemaTransporte
+    from planificador import Planificador
+
+    METRICAS.activar(opciones_planificador.pop('metricas', False))
+    huella = opciones_planificador.pop('huella', None)
+    archivo_base_datos = opciones_planificador.pop('archivo_base_datos', None)
+    cache_disco = opciones_planificador.pop('cache_disco', None)
+    sistema = SistemaTransporte()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if archivo_base_datos:
+            sistema.cargar_base_datos(archivo_base_datos, solicitudes=False).cerrar()
+        else:
+            sistema.cargar_nodos(archivo_nodos)
+            sistema.cargar_conexiones(archivo_conexiones)
+    if huella is not None and sistema.huella() != huella:
+        fuente = archivo_base_datos or f"{archivo_nodos}, {archivo_conexiones}"
+        _error_trabajador = (f"La red cargada en el trabajador ({fuente}: {len(sistema.nodos)} nodos, {len(sistema.conexiones)} conexiones) no es la del "
+                             f"planificador: sus ids de conexiones no coincidirían")
+        return
+    transbordos_por_nodo = opciones_planificador.pop('transbordos_por_nodo', {})
+    if cache_disco is not None:
+        # La misma base que el planificador: cada trabajador lee y guarda ahí sus evaluaciones
+        from cache_disco import CacheDisco
+        archivo_cache, max_mb = cache_disco
+        opciones_planificador['cache_disco'] = CacheDisco(archivo_cache, max_mb)
+    _planificador_trabajador = Planificador(sistema, **opciones_planificador)
+    _planificador_trabajador.transbordos_por_nodo.update(transbordos_por_nodo)
+    # Solo se devuelven las métricas de las tareas (no la carga ni lo heredado con fork)
+    METRICAS.reiniciar()
+
+
+def verificar_trabajador():
+    """ValueError si la red del trabajador no es la del planificador (ver _inicializar_trabajador)"""
+    if _error_trabajador is not None:
+        raise ValueError(_error_trabajador)
+
+
+def _evaluar_tarea(tarea):
+    """(solicitud, evaluación, mensajes) de una tarea (id, peso, origen, destino) en el trabajador"""
+    from solicitud_transporte import SolicitudTransporte
+    id_carga, peso_kg, origen, destino = tarea
+    nodos = _planificador_trabajador.sistema_transporte.nodos
+    salida = io.StringIO()
+    solicitud = SolicitudTransporte(id_carga, peso_kg, nodos[origen], nodos[destino])
+    with contextlib.redirect_stdout(salida):
+        evaluacion = _planificador_trabajador.evaluar_solicitud(solicitud)
+    return solicitud, evaluacion, salida.getvalue().strip()
+
+
+def _resolver_tarea(tarea):
+    """Evalúa una solicitud en el trabajador y devuelve solo índices de conexiones (y sus métricas)"""
+    verificar_trabajador()
+    try:
+        _, evaluacion, mensajes = _evaluar_tarea(tarea)
+    except Exception as e:
+        return None, f"Error en solicitud {tarea[0]}: {e}", METRICAS.extraer()
+
+    return _planificador_trabajador.evaluacion_a_indices(evaluacion), mensajes, METRICAS.extraer()
+
+
+def _filas_tarea(tarea):
+    """Evalúa una solicitud en el trabajador y devuelve sus filas del modo silencioso (ver reporte_lote)"""
+    from reporte_lote import filas_de_evaluacion
+    verificar_trabajador()
+    try:
+        solicitud, evaluacion, _ = _evaluar_tarea(tarea)
+    except Exception as e:
+        return None, str(e), METRICAS.extraer()
+
+    return filas_de_evaluacion(solicitud, evaluacion), None, METRICAS.extraer()
+
+
+def _resolver_bloque(funcion, tareas):
+    return [funcion(tarea) for tarea in tareas]
+
+
+def _en_orden(pool, funcion, tareas, cantidad, procesos):
+    """
+    Resultados de funcion para cada tarea, resueltas en el pool de a
+    bloques, en el orden de las tareas. Solo hay BLOQUES_POR_PROCESO
+    bloques por proceso enviados y sin consumir: el siguiente se envía
+    cuando se consume uno, así los resultados no se acumulan en este
+    proceso si el que los consume es más lento que los trabajadores.
+    """
+    # Bloques grandes reducen la comunicación; varios por proceso reparten mejor la carga
+    tamano_bloque = max(1, min(TAMANO_BLOQUE_MAX, cantidad // (procesos * 4)))
+    tareas = iter(tareas)
+    enviados = deque()
+    while True:
+        while len(enviados) < procesos * BLOQUES_POR_PROCESO:
+            bloque = list(islice(tareas, tamano_bloque))
+            if not bloque:
+                break
+            enviados.append(pool.submit(_resolver_bloque, funcion, bloque))
+        if not enviados:
+            return
+        yield from enviados.popleft().result()
+
+
+def _tarea(solicitud):
+    return solicitud.id_carga, solicitud.peso_kg, solicitud.origen.nombre, solicitud.destino.nombre
+
+
+def resolver_en_paralelo(planificador, solicitudes, archivo_nodos, archivo_conexiones, procesos=None,
+                         archivo_base_datos=None):
+    """
+    Evalúa las solicitudes con un pool de procesos (ver evaluar_en_paralelo).
+    Las evaluaciones quedan guardadas en el planificador (ver
+    Planificador.evaluar_solicitud) y se devuelven en el orden de entrada
+    (None si la solicitud falló, con el error impreso).
+    """
+    resultados = []
+    for evaluacion, mensajes in evaluar_en_paralelo(planificador, solicitudes, archivo_nodos, archivo_conexiones,
+                                                    procesos, archivo_base_datos):
+        if mensajes:
+            print(mensajes)
+        resultados.append(evaluacion)
+    return resultados
+
+
+def evaluar_en_paralelo(planificador, solicitudes, archivo_nodos, archivo_conexiones, procesos=None,
+                        archivo_base_datos=None):
+    """
+    Evalúa las solicitudes con un pool de procesos y genera (evaluacion,
+    mensajes) por solicitud, en el orden de entrada, a medida que llegan:
+    no guarda las evaluaciones ya entregadas. Si la solicitud falló la
+    evaluación es None y mensajes dice por qué.
+    - Cada trabajador carga la red una sola vez, desde los CSV o, con
+      archivo_base_datos, desde esa base SQLite. Tiene que
+      ser la misma red del planificador (mismas conexiones en el mismo
+      orden, así los ids coinciden): si su huella no es la misma se lanza
+      ValueError en vez de armar itinerarios con conexiones equivocadas.
+    - A los trabajadores solo viajan (id, peso, origen, destino) y vuelven
+      índices de conexiones (con el clima sorteado); los itinerarios se
+      arman en este proceso con la red del planificador recibido. Las
+      tareas se envían de a bloques y con pocos bloques pendientes (ver
+      _en_orden).
+    - Si el planificador tiene cache en disco, los trabajadores usan la
+      misma base: leen y guardan ahí las evaluaciones.
+    Las que el planificador ya tiene (en memoria o en su cache en disco) no
+    se envían al pool. Las métricas de los trabajadores (ver metricas) se
+    suman a las de este proceso.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    opciones = opciones_trabajador(planificador, archivo_base_datos)
+    pendientes = set()
+    for i, solicitud in enumerate(solicitudes):
+        try:
+            if planificador.evaluacion_guardada(solicitud) is None:
+                pendientes.add(i)
+        except ValueError:
+            pendientes.add(i)   # el trabajador informa el error
+    if not pendientes:
+        for solicitud in solicitudes:
+            yield planificador.evaluar_solicitud(solicitud), ''
+        return
+
+    tareas = (_tarea(solicitudes[i]) for i in sorted(pendientes))
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                             initargs=(archivo_nodos, archivo_conexiones, opciones)) as pool:
+        resueltas = _en_orden(pool, _resolver_tarea, tareas, len(pendientes), procesos)
+        for i, solicitud in enumerate(solicitudes):
+            if i not in pendientes:
+                # Ya estaba guardada (si la cache la desalojó se vuelve a evaluar acá)
+                yield planificador.evaluar_solicitud(solicitud), ''
+                continue
+            indices, mensajes, metricas = next(resueltas)
+            METRICAS.combinar(metricas)
+            if indices is None:
+                yield None, mensajes
+                continue
+            evaluacion = planificador.evaluacion_de_indices(indices, solicitud.peso_kg)
+            # El trabajador ya la guardó en la cache en disco
+            planificador.guardar_evaluacion(solicitud, evaluacion, en_disco=False)
+            yield evaluacion, mensajes
+
+
+def filas_en_paralelo(planificador, solicitudes, archivo_nodos, archivo_conexiones, procesos=None,
+                      archivo_base_datos=None):
+    """
+    Evalúa las solicitudes con un pool de procesos y genera (filas, error)
+    por solicitud, en el orden de entrada: las filas del modo silencioso
+    (ver reporte_lote.filas_de_evaluacion) ya armadas y con precio en los
+    trabajadores, o None y por qué falló. Este proceso solo escribe las
+    filas: no arma itinerarios ni guarda evaluaciones.
+    Los trabajadores son los de evaluar_en_paralelo (misma red, misma cache
+    en disco) y todas las solicitudes se resuelven en ellos.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    opciones = opciones_trabajador(planificador, archivo_base_datos)
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                             initargs=(archivo_nodos, archivo_conexiones, opciones)) as pool:
+        for filas, error, metricas in _en_orden(pool, _filas_tarea, map(_tarea, solicitudes), len(solicitudes), procesos):
+            METRICAS.combinar(metricas)
+            yield filas, error
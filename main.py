@@ -1,22 +1,63 @@
 from sistema_transporte import SistemaTransporte
 from planificador import Planificador
+from metricas import METRICAS
 from datetime import datetime
+import argparse
+import contextlib
 import os
+import sys
 
-# Importar gráficos si matplotlib está disponible
-try:
-    from graficos import (generar_todos_los_graficos, grafico_tiempo_vs_distancia_por_modo, 
-                         grafico_costo_vs_distancia_por_modo)
-    GRAFICOS_DISPONIBLES = True
-except ImportError:
-    print("Matplotlib no disponible - gráficos deshabilitados")
-    GRAFICOS_DISPONIBLES = False
+ARCHIVO_NODOS = 'nodos.csv'
+ARCHIVO_CONEXIONES = 'conexiones.csv'
+ARCHIVO_SOLICITUDES = 'solicitudes.csv'
+DIRECTORIO_SALIDA = 'output'
 
-os.makedirs('output', exist_ok=True)
+def cargar_graficos():
+    """
+    Módulo graficos, importado recién la primera vez que se grafica:
+    importar matplotlib lleva más que planificar una ruta, así que los modos
+    que no grafican (--jsonl, --silencioso, --servidor, --graficos no) no lo
+    cargan. None si matplotlib no está instalado.
+    """
+    import graficos
+    return graficos if graficos.MATPLOTLIB_DISPONIBLE else None
+
+def preparar_salida():
+    """Crea el directorio de salida (al empezar cada modo, no al importar main)"""
+    os.makedirs(DIRECTORIO_SALIDA, exist_ok=True)
+
+def resolver_solicitudes(sistema, planificador, procesos=1, archivo_base_datos=None):
+    """
+    Evalúa todas las solicitudes antes de mostrarlas.
+    Con procesos > 1 reparte las solicitudes en un pool de procesos, que
+    cargan la red de la misma fuente que el sistema (archivo_base_datos o
+    los CSV).
+    Devuelve las evaluaciones del planificador en orden (None si falló).
+    """
+    if procesos > 1 and len(sistema.solicitudes) > 1:
+        from lote_paralelo import resolver_en_paralelo
+        print(f"Resolviendo {len(sistema.solicitudes)} solicitudes con {procesos} procesos...")
+        return resolver_en_paralelo(planificador, sistema.solicitudes,
+                                    ARCHIVO_NODOS, ARCHIVO_CONEXIONES, procesos, archivo_base_datos)
+    
+    # Una sola búsqueda por solicitud: óptimos por tiempo, por costo y por modo
+    evaluaciones = []
+    for solicitud in sistema.solicitudes:
+        try:
+            evaluaciones.append(planificador.evaluar_solicitud(solicitud))
+        except Exception as e:
+            print(f"Error evaluando solicitud {solicitud.id_carga}: {e}")
+            evaluaciones.append(None)
+    return evaluaciones
 
-def correr_simulacion(sistema, planificador):
+def correr_simulacion(sistema, planificador, procesos=1, graficos='individuales', procesos_graficos=0,
+                      archivo_base_datos=None):
     """
     Función principal que procesa todas las solicitudes y genera resultados.
+    graficos: 'individuales' (por solicitud), 'agregados' (uno para todo el
+    lote) o 'no'. Con procesos_graficos > 0 los gráficos se dibujan en un
+    pool de procesos aparte mientras se muestran los resultados.
+    archivo_base_datos: de dónde cargan la red los procesos (ver resolver_solicitudes).
     """
     print("\n" + "="*60)
     print("PROCESANDO SOLICITUDES")
@@ -24,27 +65,60 @@ def correr_simulacion(sistema, planificador):
     
     resultados_tiempo = {}
     resultados_costo = {}
+    with METRICAS.fase('resolucion'):
+        evaluaciones = resolver_solicitudes(sistema, planificador, procesos, archivo_base_datos)
     
-    for i, solicitud in enumerate(sistema.solicitudes, 1):
+    with METRICAS.fase('presentacion'):
+        graficador = cargar_graficos() if graficos != 'no' else None
+        if graficador and procesos_graficos:
+            graficador.configurar(procesos=procesos_graficos)
+        mostrar_resultados(sistema, evaluaciones, resultados_tiempo, resultados_costo,
+                           graficador is not None and graficos == 'individuales')
+        if graficador and graficos == 'agregados':
+            generar_graficos_lote(sistema, evaluaciones)
+        if graficador:
+            graficador.esperar_graficos(cerrar=True)
+
+def generar_graficos_lote(sistema, evaluaciones):
+    """Un gráfico resumen de todas las solicitudes en lugar de varios por solicitud"""
+    graficador = cargar_graficos()
+    if graficador:
+        from reporte_lote import filas_de_evaluacion
+        print("\nGenerando gráfico resumen del lote...")
+        graficador.grafico_resumen_lote(fila for solicitud, evaluacion in zip(sistema.solicitudes, evaluaciones)
+                                        for fila in filas_de_evaluacion(solicitud, evaluacion))
+
+def mostrar_resultados(sistema, evaluaciones, resultados_tiempo, resultados_costo, graficos=True):
+    """Muestra (y, si graficos, grafica) el resultado de cada solicitud ya evaluada"""
+    for i, (solicitud, evaluacion) in enumerate(zip(sistema.solicitudes, evaluaciones), 1):
         mostrar_cabecera_solicitud(solicitud, i, len(sistema.solicitudes))
+        if evaluacion is None:
+            evaluacion = {'tiempo': (None, {}), 'costo': (None, {}), 'frente': []}
+        itinerario_tiempo = evaluacion['tiempo'][0]
+        itinerario_costo = evaluacion['costo'][0]
+        frente = evaluacion['frente']
         
         # Procesar optimización por tiempo
-        itinerario_tiempo = procesar_optimizacion(planificador, solicitud, "tiempo")
+        itinerario_tiempo = procesar_optimizacion(itinerario_tiempo, "tiempo")
         if itinerario_tiempo:
             resultados_tiempo[f"{solicitud.id_carga}_tiempo"] = itinerario_tiempo
-            generar_graficos_solicitud(itinerario_tiempo, solicitud, "tiempo")
+            if graficos:
+                generar_graficos_solicitud(itinerario_tiempo, solicitud, "tiempo")
         
         # Procesar optimización por costo  
-        itinerario_costo = procesar_optimizacion(planificador, solicitud, "costo")
+        itinerario_costo = procesar_optimizacion(itinerario_costo, "costo")
         if itinerario_costo:
             resultados_costo[f"{solicitud.id_carga}_costo"] = itinerario_costo
-            generar_graficos_solicitud(itinerario_costo, solicitud, "costo")
+            if graficos:
+                generar_graficos_solicitud(itinerario_costo, solicitud, "costo")
             
         # Generar gráfico comparativo entre modos
-        generar_grafico_comparativo_modos(planificador, solicitud)
+        if graficos:
+            generar_grafico_comparativo_modos(evaluacion)
         
         # Comparar ambas optimizaciones
         comparar_resultados(solicitud, resultados_tiempo, resultados_costo)
+        mostrar_frente_pareto(frente)
         
         print("\n" + "="*60)
 
@@ -56,13 +130,12 @@ def mostrar_cabecera_solicitud(solicitud, numero, total):
     print(f"Ruta: {solicitud.origen.nombre} -> {solicitud.destino.nombre}")
     print("="*50)
 
-def procesar_optimizacion(planificador, solicitud, kpi):
-    """Procesa una optimización específica (tiempo o costo)"""
+def procesar_optimizacion(itinerario, kpi):
+    """Muestra el resultado de una optimización específica (tiempo o costo)"""
     print(f"\nOPTIMIZACION POR {kpi.upper()}:")
     print("-" * 30)
     
     try:
-        itinerario = planificador.generar_itinerario(solicitud, kpi)
         if itinerario:
             print("Ruta encontrada:")
             print(itinerario)
@@ -78,22 +151,24 @@ def procesar_optimizacion(planificador, solicitud, kpi):
 
 def generar_graficos_solicitud(itinerario, solicitud, kpi):
     """Genera gráficos para una solicitud específica"""
-    if GRAFICOS_DISPONIBLES:
+    graficador = cargar_graficos()
+    if graficador:
         try:
             print(f"\nGenerando gráficos por {kpi}...")
-            generar_todos_los_graficos(itinerario, f"{solicitud.id_carga} - Por {kpi.title()}")
+            graficador.generar_todos_los_graficos(itinerario, f"{solicitud.id_carga} - Por {kpi.title()}")
         except Exception as e:
             print(f"Error en gráficos: {e}")
 
-def generar_grafico_comparativo_modos(planificador, solicitud):
+def generar_grafico_comparativo_modos(evaluacion):
     """Genera gráficos comparativos entre modos de transporte"""
-    if GRAFICOS_DISPONIBLES:
+    graficador = cargar_graficos()
+    if graficador:
         try:
             print("\nGenerando gráficos comparativos...")
-            mejor_it, itinerarios_por_modo = planificador.encontrar_ruta_optima(solicitud, kpi="costo")
+            mejor_it, itinerarios_por_modo = evaluacion['costo']
             if mejor_it and itinerarios_por_modo:
-                grafico_tiempo_vs_distancia_por_modo(itinerarios_por_modo, mejor_it)
-                grafico_costo_vs_distancia_por_modo(itinerarios_por_modo, mejor_it)
+                graficador.grafico_tiempo_vs_distancia_por_modo(itinerarios_por_modo, mejor_it)
+                graficador.grafico_costo_vs_distancia_por_modo(itinerarios_por_modo, mejor_it)
         except Exception as e:
             print(f"Error al generar gráficos comparativos: {e}")
 
@@ -112,6 +187,17 @@ def comparar_resultados(solicitud, resultados_tiempo, resultados_costo):
         mostrar_tabla_comparacion(tiempo_it, costo_it)
         mostrar_analisis_comparacion(tiempo_it, costo_it)
 
+def mostrar_frente_pareto(frente):
+    """Muestra todas las opciones no dominadas entre tiempo y costo"""
+    if len(frente) < 2:
+        return
+    print(f"\nOPCIONES NO DOMINADAS (tiempo vs costo): {len(frente)}")
+    print("-" * 40)
+    for i, itinerario in enumerate(frente, 1):
+        ruta = " -> ".join(itinerario.obtener_ruta_completa())
+        vehiculos = ", ".join(dict.fromkeys(itinerario.obtener_vehiculos_utilizados()))
+        print(f"  {i}. {ruta} ({vehiculos}): {itinerario.obtener_tiempo_total_formateado()} | ${itinerario.costo_total:.2f}")
+
 def mostrar_tabla_comparacion(tiempo_it, costo_it):
     """Muestra tabla comparativa entre optimizaciones"""
     print(f"{'CRITERIO':<15} {'TIEMPO':<25} {'COSTO':<25}")
@@ -157,15 +243,17 @@ def mostrar_analisis_comparacion(tiempo_it, costo_it):
         print(f"Más barato: Optimización por COSTO (${costo_it.costo_total:.2f})")
     
     # Análisis de diferencias para recomendación
+    from reporte_lote import recomendar
     diferencia_tiempo = abs(tiempo_it.tiempo_total - costo_it.tiempo_total)
     diferencia_costo = abs(tiempo_it.costo_total - costo_it.costo_total)
+    recomendacion = recomendar(tiempo_it, costo_it)
     
     print(f"\nRECOMENDACION:")
-    if diferencia_costo > tiempo_it.costo_total * 0.2:
+    if recomendacion == 'costo':
         porcentaje_ahorro = (diferencia_costo / max(tiempo_it.costo_total, costo_it.costo_total)) * 100
         print(f"  Diferencia de costo significativa: ${diferencia_costo:.2f} ({porcentaje_ahorro:.1f}%)")
         print(f"  Recomendamos OPTIMIZACION POR COSTO para maximizar ahorro")
-    elif diferencia_tiempo > 2:
+    elif recomendacion == 'tiempo':
         print(f"  Diferencia de tiempo significativa: {diferencia_tiempo:.1f} horas")
         print(f"  Recomendamos OPTIMIZACION POR TIEMPO para entregas urgentes")
     else:
@@ -216,19 +304,41 @@ def validar_sistema(sistema):
             print(f"  - {error}")
         return False
 
-def inicializar_sistema():
-    """Inicializa y carga el sistema de transporte"""
+def inicializar_sistema(carga_masiva=False, archivo_snapshot=None, archivo_base_datos=None):
+    """
+    Inicializa y carga el sistema de transporte.
+    Con carga_masiva=True usa el cargador por bloques (para archivos grandes).
+    Con archivo_snapshot la red se lee del snapshot binario si sigue vigente.
+    Con archivo_base_datos la red se lee de esa base SQLite (si no existe se
+    crea importando los CSV).
+    """
     print("Inicializando sistema de transporte...")
     sistema = SistemaTransporte()
     
+    if archivo_base_datos:
+        if not os.path.exists(archivo_base_datos):
+            from base_datos_red import BaseDatosRed
+            print(f"Creando {archivo_base_datos} desde los archivos CSV...")
+            base = BaseDatosRed(archivo_base_datos)
+            base.importar_csv(ARCHIVO_NODOS, ARCHIVO_CONEXIONES, ARCHIVO_SOLICITUDES).mostrar_errores()
+            base.cerrar()
+        sistema.cargar_base_datos(archivo_base_datos).cerrar()
+        return sistema
+    
     print("Cargando datos desde archivos CSV...")
-    sistema.cargar_nodos('nodos.csv')
-    sistema.cargar_conexiones('conexiones.csv')
-    sistema.cargar_solicitudes('solicitudes.csv')
+    if archivo_snapshot:
+        sistema.cargar_con_snapshot(ARCHIVO_NODOS, ARCHIVO_CONEXIONES, ARCHIVO_SOLICITUDES, archivo_snapshot)
+    elif carga_masiva:
+        cargador = sistema.cargar_masivo(ARCHIVO_NODOS, ARCHIVO_CONEXIONES, ARCHIVO_SOLICITUDES)
+        cargador.mostrar_errores()
+    else:
+        sistema.cargar_nodos(ARCHIVO_NODOS)
+        sistema.cargar_conexiones(ARCHIVO_CONEXIONES)
+        sistema.cargar_solicitudes(ARCHIVO_SOLICITUDES)
     
     return sistema
 
-def mostrar_resumen_final(sistema):
+def mostrar_resumen_final(sistema, graficos=True):
     """Muestra resumen final de la ejecución"""
     print(f"\nPROCESAMIENTO COMPLETADO EXITOSAMENTE")
     print("="*50)
@@ -237,15 +347,197 @@ def mostrar_resumen_final(sistema):
     print(f"- Nodos procesados: {len(sistema.nodos)}")
     print(f"- Conexiones cargadas: {len(sistema.conexiones)}")
     print(f"- Solicitudes procesadas: {len(sistema.solicitudes)}")
-    if GRAFICOS_DISPONIBLES:
+    if not graficos:
+        print(f"- Gráficos generados: NO")
+    elif cargar_graficos():
         print(f"- Gráficos generados: SÍ")
     else:
         print(f"- Gráficos generados: NO (instalar matplotlib)")
 
-def main():
+def cargar_red(carga_masiva=False, archivo_base_datos=None):
+    """Sistema con los nodos y conexiones (sin solicitudes), para los modos en flujo y servidor"""
+    sistema = SistemaTransporte()
+    if archivo_base_datos:
+        sistema.cargar_base_datos(archivo_base_datos, solicitudes=False).cerrar()
+    elif carga_masiva:
+        sistema.cargar_masivo(ARCHIVO_NODOS, ARCHIVO_CONEXIONES).mostrar_errores()
+    else:
+        sistema.cargar_nodos(ARCHIVO_NODOS)
+        sistema.cargar_conexiones(ARCHIVO_CONEXIONES)
+    return sistema
+
+def crear_planificador(sistema, archivo_cache_disco=None):
+    """Planificador de la red; con archivo_cache_disco reutiliza resultados de otras ejecuciones (ver CacheDisco)"""
+    cache_disco = None
+    if archivo_cache_disco:
+        from cache_disco import CacheDisco
+        cache_disco = CacheDisco(archivo_cache_disco)
+    return Planificador(sistema, cache_disco=cache_disco)
+
+def exportar_metricas(archivo, sistema=None, planificador=None):
+    """Guarda las métricas en archivo (JSON) y en el mismo nombre con extensión .prom (Prometheus)"""
+    METRICAS.exportar(archivo, sistema, planificador)
+    archivo_prometheus = os.path.splitext(archivo)[0] + '.prom'
+    if archivo_prometheus != archivo:
+        METRICAS.exportar(archivo_prometheus, sistema, planificador)
+    print(f"Métricas exportadas: {archivo} y {archivo_prometheus}")
+
+def servir(direccion, procesos=0, carga_masiva=False, archivo_base_datos=None, archivo_cache_disco=None,
+           archivo_metricas=None):
+    """
+    Modo servidor: deja la red y el planificador cargados y atiende pedidos
+    de ruta por HTTP (ver servidor_planificacion). direccion es 'puerto',
+    'host:puerto' o 'unix:/ruta/al/socket'. Con archivo_metricas las
+    métricas se consultan en GET /metricas y se exportan al detenerlo.
+    """
+    from servidor_planificacion import ServidorPlanificacion
+    METRICAS.activar(bool(archivo_metricas))
+    preparar_salida()
+    planificador = crear_planificador(cargar_red(carga_masiva, archivo_base_datos), archivo_cache_disco)
+    servidor = ServidorPlanificacion(planificador, procesos, archivo_nodos=ARCHIVO_NODOS,
+                                     archivo_conexiones=ARCHIVO_CONEXIONES, archivo_base_datos=archivo_base_datos)
+    if direccion.startswith('unix:'):
+        servidor.servir(archivo_unix=direccion[len('unix:'):])
+    else:
+        host, _, puerto = direccion.rpartition(':')
+        servidor.servir(host or '127.0.0.1', int(puerto))
+    if archivo_metricas:
+        exportar_metricas(archivo_metricas, planificador.sistema_transporte, planificador)
+
+def procesar_jsonl(entrada, salida='-', carga_masiva=False, archivo_base_datos=None, archivo_cache_disco=None,
+                   archivo_metricas=None):
+    """
+    Modo en flujo: lee solicitudes JSONL de entrada ('-' = stdin) y escribe
+    un resultado JSON por línea en salida ('-' = stdout) apenas se resuelve
+    cada una (ver flujo_jsonl). Solo carga la red, no solicitudes.csv; los
+    mensajes de carga y el resumen van a stderr.
+    """
+    from flujo_jsonl import resolver_flujo
+    METRICAS.activar(bool(archivo_metricas))
+    preparar_salida()
+    with contextlib.redirect_stdout(sys.stderr):
+        planificador = crear_planificador(cargar_red(carga_masiva, archivo_base_datos), archivo_cache_disco)
+
+    with contextlib.ExitStack() as archivos:
+        flujo_entrada = sys.stdin if entrada == '-' else archivos.enter_context(open(entrada, encoding='utf-8'))
+        flujo_salida = sys.stdout if salida == '-' else archivos.enter_context(open(salida, 'w', encoding='utf-8'))
+        with contextlib.redirect_stdout(sys.stderr):
+            resumen = resolver_flujo(planificador, flujo_entrada, flujo_salida)
+    print(f"Solicitudes resueltas: {resumen['resueltas']}, sin ruta: {resumen['sin_ruta']}, "
+          f"con errores: {resumen['con_errores']}", file=sys.stderr)
+    if archivo_metricas:
+        with contextlib.redirect_stdout(sys.stderr):
+            exportar_metricas(archivo_metricas, planificador.sistema_transporte, planificador)
+    return resumen
+
+def procesar_silencioso(archivo_filas, procesos=1, carga_masiva=False, archivo_snapshot=None,
+                        archivo_base_datos=None, archivo_cache_disco=None, archivo_metricas=None):
+    """
+    Modo silencioso para lotes grandes: evalúa las solicitudes y escribe una
+    fila compacta por solicitud y KPI en archivo_filas (CSV, o JSONL si
+    termina en .jsonl; ver reporte_lote) sin imprimir nada por solicitud.
+    El informe legible se puede generar después con --reporte.
+    Devuelve el EscritorFilas (filas, sin ruta y con errores).
+    """
+    from reporte_lote import EscritorFilas
+    METRICAS.activar(bool(archivo_metricas))
+    preparar_salida()
+    if procesos == 0:
+        procesos = os.cpu_count() or 1
+    with contextlib.redirect_stdout(sys.stderr):
+        sistema = inicializar_sistema(carga_masiva, archivo_snapshot, archivo_base_datos)
+        planificador = crear_planificador(sistema, archivo_cache_disco)
+
+    inicio = datetime.now()
+    with METRICAS.fase('resolucion'), EscritorFilas(archivo_filas) as escritor:
+        if procesos > 1 and len(sistema.solicitudes) > 1:
+            # Los trabajadores devuelven las filas ya armadas: acá solo se escriben
+            from lote_paralelo import filas_en_paralelo
+            from reporte_lote import filas_de_evaluacion
+            for solicitud, (filas, error) in zip(sistema.solicitudes, filas_en_paralelo(
+                    planificador, sistema.solicitudes, ARCHIVO_NODOS, ARCHIVO_CONEXIONES, procesos, archivo_base_datos)):
+                escritor.escribir_filas(filas if filas is not None else filas_de_evaluacion(solicitud, None, error))
+        else:
+            for solicitud, (evaluacion, error) in zip(sistema.solicitudes, evaluar_en_serie(planificador, sistema.solicitudes)):
+                escritor.escribir(solicitud, evaluacion, error if evaluacion is None else None)
+
+    segundos = (datetime.now() - inicio).total_seconds()
+    print(f"{len(sistema.solicitudes)} solicitudes en {segundos:.1f}s: {escritor.filas} filas en {archivo_filas} "
+          f"(sin ruta: {escritor.sin_ruta}, con errores: {escritor.con_errores})")
+    if archivo_metricas:
+        exportar_metricas(archivo_metricas, sistema, planificador)
+    return escritor
+
+def evaluar_en_serie(planificador, solicitudes):
+    """Genera (evaluacion, error) por solicitud, como lote_paralelo.evaluar_en_paralelo"""
+    for solicitud in solicitudes:
+        try:
+            yield planificador.evaluar_solicitud(solicitud), None
+        except Exception as e:
+            yield None, str(e)
+
+def generar_reporte(archivo_filas, salida='-', graficos=True):
+    """
+    Informe legible de las filas del modo silencioso, en salida ('-' = stdout).
+    Con graficos agrega el gráfico resumen del lote.
+    """
+    import reporte_lote
+    preparar_salida()
+    with contextlib.ExitStack() as archivos:
+        flujo_salida = sys.stdout if salida == '-' else archivos.enter_context(
+            open(salida, 'w', encoding='utf-8', buffering=reporte_lote.TAMANO_BUFFER))
+        solicitudes = reporte_lote.generar_reporte(archivo_filas, flujo_salida)
+    if salida != '-':
+        print(f"Reporte de {solicitudes} solicitudes: {salida}")
+    graficador = cargar_graficos() if graficos else None
+    if graficador:
+        nombre = os.path.splitext(os.path.basename(archivo_filas))[0]
+        with contextlib.redirect_stdout(sys.stderr if salida == '-' else sys.stdout):
+            graficador.grafico_resumen_lote(reporte_lote.leer_filas(archivo_filas), nombre)
+    return solicitudes
+
+def leer_argumentos():
+    """Opciones de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Sistema de transporte")
+    parser.add_argument('--procesos', type=int, default=1,
+                        help="procesos para resolver las solicitudes (0 = uno por núcleo)")
+    parser.add_argument('--carga-masiva', action='store_true',
+                        help="cargar los CSV por bloques, contando los errores en vez de imprimirlos")
+    parser.add_argument('--snapshot', metavar='ARCHIVO',
+                        help="snapshot binario de la red: se usa si coincide con los CSV y si no se regenera")
+    parser.add_argument('--base-datos', metavar='ARCHIVO',
+                        help="base SQLite con la red y las solicitudes (se crea desde los CSV si no existe)")
+    parser.add_argument('--jsonl', metavar='ENTRADA',
+                        help="resolver solicitudes JSONL en flujo ('-' = stdin), un resultado JSON por línea")
+    parser.add_argument('--silencioso', metavar='FILAS',
+                        help="sin salida por solicitud: una fila por solicitud y KPI en FILAS (.csv o .jsonl)")
+    parser.add_argument('--reporte', metavar='FILAS',
+                        help="generar el informe legible a partir de las filas de --silencioso")
+    parser.add_argument('--salida', metavar='ARCHIVO', default='-',
+                        help="archivo de resultados de --jsonl o del informe de --reporte ('-' = stdout)")
+    parser.add_argument('--servidor', metavar='DIRECCION',
+                        help="atender pedidos de ruta por HTTP en 'puerto', 'host:puerto' o 'unix:/ruta'")
+    parser.add_argument('--cache-disco', metavar='ARCHIVO',
+                        help="cache persistente de resultados, reutilizada mientras la red no cambie")
+    parser.add_argument('--graficos', choices=('individuales', 'agregados', 'no'), default='individuales',
+                        help="gráficos por solicitud, uno resumen para todo el lote, o ninguno")
+    parser.add_argument('--procesos-graficos', type=int, default=0,
+                        help="procesos para dibujar los gráficos aparte (0 = en este proceso)")
+    parser.add_argument('--metricas', metavar='ARCHIVO',
+                        help="medir fases y búsquedas y exportarlas en JSON (ARCHIVO) y Prometheus (.prom)")
+    return parser.parse_args()
+
+def main(procesos=1, carga_masiva=False, archivo_snapshot=None, archivo_base_datos=None, archivo_cache_disco=None,
+         archivo_metricas=None, graficos='individuales', procesos_graficos=0):
     """
     Función principal: carga datos, crea planificador y procesa solicitudes.
+    Con archivo_metricas mide cada fase y exporta las métricas al terminar.
     """
+    METRICAS.activar(bool(archivo_metricas))
+    preparar_salida()
+    if procesos == 0:
+        procesos = os.cpu_count() or 1
+
     print("="*50)
     print("SISTEMA DE TRANSPORTE - INICIANDO")
     print("="*50)
@@ -254,7 +546,7 @@ def main():
     
     try:
         # Inicializar sistema
-        sistema = inicializar_sistema()
+        sistema = inicializar_sistema(carga_masiva, archivo_snapshot, archivo_base_datos)
         
         # Mostrar información del sistema
         sistema.mostrar_resumen()
@@ -270,22 +562,28 @@ def main():
         
         # Crear planificador
         print(f"\nCreando planificador...")
-        planificador = Planificador(sistema)
+        planificador = crear_planificador(sistema, archivo_cache_disco)
         print(f"Planificador listo con {len(planificador.vehiculos_disponibles)} tipos de vehículos")
         
         # Exportar resumen detallado
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            sistema.exportar_resumen(f"output/resumen_ejecucion_{timestamp}.txt")
+            sistema.exportar_resumen(os.path.join(DIRECTORIO_SALIDA, f"resumen_ejecucion_{timestamp}.txt"))
             print(f"Resumen exportado: resumen_ejecucion_{timestamp}.txt")
         except Exception as e:
             print(f"Advertencia: No se pudo exportar resumen: {e}")
         
         # Procesar todas las solicitudes
-        correr_simulacion(sistema, planificador)
+        correr_simulacion(sistema, planificador, procesos, graficos, procesos_graficos, archivo_base_datos)
+        if planificador.cache_disco is not None:
+            estadisticas = planificador.cache_disco.obtener_estadisticas()
+            print(f"\nCache en disco: {estadisticas['aciertos']} aciertos, {estadisticas['fallos']} fallos, "
+                  f"{estadisticas['entradas']} entradas ({estadisticas['bytes'] / 1024:.0f} KB)")
         
         # Mostrar resumen final
-        mostrar_resumen_final(sistema)
+        mostrar_resumen_final(sistema, graficos != 'no')
+        if archivo_metricas:
+            exportar_metricas(archivo_metricas, sistema, planificador)
         
     except FileNotFoundError as e:
         print(f"\nERROR: No se encontró archivo requerido")
@@ -317,4 +615,18 @@ def main():
         print("  - Verificar que todos los valores numéricos sean válidos")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    argumentos = leer_argumentos()
+    if argumentos.servidor:
+        servir(argumentos.servidor, argumentos.procesos, argumentos.carga_masiva, argumentos.base_datos,
+               argumentos.cache_disco, argumentos.metricas)
+    elif argumentos.reporte:
+        generar_reporte(argumentos.reporte, argumentos.salida, argumentos.graficos != 'no')
+    elif argumentos.silencioso:
+        procesar_silencioso(argumentos.silencioso, argumentos.procesos, argumentos.carga_masiva, argumentos.snapshot,
+                            argumentos.base_datos, argumentos.cache_disco, argumentos.metricas)
+    elif argumentos.jsonl:
+        procesar_jsonl(argumentos.jsonl, argumentos.salida, argumentos.carga_masiva, argumentos.base_datos,
+                       argumentos.cache_disco, argumentos.metricas)
+    else:
+        main(argumentos.procesos, argumentos.carga_masiva, argumentos.snapshot, argumentos.base_datos,
+             argumentos.cache_disco, argumentos.metricas, argumentos.graficos, argumentos.procesos_graficos)
\ No newline at end of file
@@ -0,0 +1,116 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Invocación que solo planifica: una solicitud por --jsonl, sin gráficos ni pools
+ARGUMENTOS_RUTA = ['main.py', '--jsonl', '-']
+SOLICITUD_RUTA = '{"id_carga": "INICIO", "peso_kg": 1000, "origen": "Zarate", "destino": "Mar_del_Plata"}\n'
+
+PRESUPUESTO_MS = 100   # importaciones propias de la invocación (sin las del intérprete), mediana
+
+# Subsistemas opcionales que una invocación que solo planifica no debe importar
+MODULOS_PESADOS = ('matplotlib', 'numpy', 'graficos', 'concurrent.futures', 'multiprocessing', 'asyncio',
+                   'sqlite3', 'lote_paralelo', 'servidor_planificacion', 'cache_disco', 'base_datos_red',
+                   'snapshot_red', 'cargador_masivo', 'reporte_lote')
+
+def _importaciones(salida_error):
+    """{módulo: (microsegundos propios, acumulados, nivel)} de la salida de python -X importtime"""
+    modulos = {}
+    for linea in salida_error.splitlines():
+        if not linea.startswith('import time:'):
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        if not propio.strip().isdigit():
+            continue   # encabezado
+        nivel = (len(nombre) - len(nombre.lstrip()) - 1) // 2
+        modulos[nombre.strip()] = (int(propio), int(acumulado), nivel)
+    return modulos
+
+def medir_invocacion(argumentos, entrada=''):
+    """
+    Corre python -X importtime con argumentos en un proceso nuevo, desde el
+    directorio del proyecto. Devuelve (segundos de pared, importaciones);
+    lanza RuntimeError si el proceso termina con error.
+    """
+    inicio = time.perf_counter()
+    proceso = subprocess.run([sys.executable, '-X', 'importtime'] + argumentos, input=entrada, cwd=DIRECTORIO,
+                             capture_output=True, text=True)
+    segundos = time.perf_counter() - inicio
+    if proceso.returncode:
+        raise RuntimeError(f"{' '.join(argumentos)} terminó con código {proceso.returncode}:\n{proceso.stderr[-2000:]}")
+    return segundos, _importaciones(proceso.stderr)
+
+def reporte_inicio(repeticiones=5):
+    """
+    Mide el arranque en frío de una invocación que solo planifica una ruta:
+    - pared: tiempo total del proceso (intérprete, importaciones, carga de
+      la red y la ruta), y el del intérprete solo (python -c pass)
+    - importacion_ms: lo que tardan las importaciones propias de la
+      invocación, sin las que el intérprete hace igual al arrancar
+    - pesados: subsistemas opcionales (MODULOS_PESADOS) que se importaron
+    Se toma la mediana de las repeticiones.
+    """
+    paredes_interprete, paredes, importaciones_ms = [], [], []
+    modulos_interprete, modulos = set(), {}
+    for _ in range(repeticiones):
+        segundos, importaciones = medir_invocacion(['-c', 'pass'])
+        paredes_interprete.append(segundos)
+        modulos_interprete.update(importaciones)
+
+        segundos, importaciones = medir_invocacion(ARGUMENTOS_RUTA, SOLICITUD_RUTA)
+        paredes.append(segundos)
+        propias = {nombre: medida for nombre, medida in importaciones.items() if nombre not in modulos_interprete}
+        importaciones_ms.append(sum(propio for propio, _, _ in propias.values()) / 1000)
+        modulos.update(propias)
+
+    pesados = [pesado for pesado in MODULOS_PESADOS
+               if any(nombre == pesado or nombre.startswith(pesado + '.') for nombre in modulos)]
+    principales = sorted(((acumulado, nombre) for nombre, (_, acumulado, nivel) in modulos.items() if nivel == 0),
+                         reverse=True)[:8]
+    return {
+        'repeticiones': repeticiones,
+        'pared_interprete_ms': statistics.median(paredes_interprete) * 1000,
+        'pared_ms': statistics.median(paredes) * 1000,
+        'importacion_ms': statistics.median(importaciones_ms),
+        'modulos': len(modulos),
+        'principales': [(nombre, acumulado / 1000) for acumulado, nombre in principales],
+        'pesados': pesados,
+    }
+
+def mostrar_reporte(reporte, presupuesto_ms=PRESUPUESTO_MS):
+    """Imprime el reporte de arranque; devuelve True si está dentro del presupuesto"""
+    print("="*50)
+    print("ARRANQUE DE UNA INVOCACIÓN QUE SOLO PLANIFICA")
+    print("="*50)
+    print(f"Comando: python {' '.join(ARGUMENTOS_RUTA)} (mediana de {reporte['repeticiones']})")
+    print(f"  Proceso completo: {reporte['pared_ms']:.0f} ms (intérprete solo: {reporte['pared_interprete_ms']:.0f} ms)")
+    print(f"  Importaciones propias: {reporte['importacion_ms']:.1f} ms en {reporte['modulos']} módulos "
+          f"(presupuesto: {presupuesto_ms} ms)")
+    for nombre, milisegundos in reporte['principales']:
+        print(f"    {nombre:<25} {milisegundos:6.1f} ms")
+
+    correcto = True
+    if reporte['pesados']:
+        print(f"ERROR: se importaron subsistemas opcionales: {', '.join(reporte['pesados'])}")
+        correcto = False
+    if reporte['importacion_ms'] > presupuesto_ms:
+        print(f"ERROR: las importaciones superan el presupuesto ({reporte['importacion_ms']:.1f} ms > {presupuesto_ms} ms)")
+        correcto = False
+    if correcto:
+        print("Dentro del presupuesto")
+    print("="*50)
+    return correcto
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de una invocación que solo planifica rutas")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--presupuesto-ms', type=float, default=PRESUPUESTO_MS,
+                        help="máximo de las importaciones propias, en milisegundos")
+    args = parser.parse_args()
+    sys.exit(0 if mostrar_reporte(reporte_inicio(args.repeticiones), args.presupuesto_ms) else 1)
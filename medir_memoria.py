@@ -0,0 +1,135 @@
+from sistema_transporte import SistemaTransporte
+from planificador import Planificador
+import argparse
+import contextlib
+import csv
+import io
+import os
+import random
+import tempfile
+import tracemalloc
+
+MODOS = ["Ferroviaria", "Automotor", "Fluvial", "Aerea"]
+
+def generar_red(directorio, cantidad_nodos, cantidad_conexiones, semilla=1):
+    """
+    Escribe nodos.csv y conexiones.csv con una red aleatoria del tamaño pedido,
+    con las mismas columnas y restricciones que los archivos del proyecto.
+    """
+    azar = random.Random(semilla)
+    nombres = [f"Ciudad_{i}" for i in range(cantidad_nodos)]
+    with open(os.path.join(directorio, "nodos.csv"), "w", newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["nombre"])
+        for nombre in nombres:
+            escritor.writerow([nombre])
+
+    with open(os.path.join(directorio, "conexiones.csv"), "w", newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["origen", "destino", "tipo", "distancia_km", "restriccion", "valor_restriccion"])
+        for _ in range(cantidad_conexiones):
+            origen, destino = azar.sample(nombres, 2)
+            tipo = azar.choice(MODOS)
+            restriccion, valor = "", ""
+            if tipo == "Ferroviaria" and azar.random() < 0.3:
+                restriccion, valor = "velocidad_max", azar.choice(["60", "80", "120"])
+            elif tipo == "Automotor" and azar.random() < 0.3:
+                restriccion, valor = "peso_max", azar.choice(["10000", "15000", "40000"])
+            elif tipo == "Fluvial":
+                restriccion, valor = "tipo", azar.choice(["fluvial", "maritimo"])
+            elif tipo == "Aerea":
+                restriccion, valor = "prob_mal_tiempo", azar.choice(["0", "0.1", "0.2"])
+            escritor.writerow([origen, destino, tipo, azar.randint(20, 600), restriccion, valor])
+
+def _caminos_aleatorios(sistema, cantidad, largo, semilla=1):
+    """Secuencias de conexiones que no repiten nodos, para armar itinerarios"""
+    azar = random.Random(semilla)
+    nodos = [nodo for nodo in sistema.nodos.values() if nodo.conexiones]
+    caminos = []
+    while len(caminos) < cantidad:
+        actual = azar.choice(nodos)
+        visitados = {actual.nombre}
+        camino = []
+        while len(camino) < largo and actual.conexiones:
+            conexion = azar.choice(actual.conexiones)
+            if conexion.destino.nombre in visitados:
+                break
+            camino.append(conexion)
+            visitados.add(conexion.destino.nombre)
+            actual = conexion.destino
+        if camino:
+            caminos.append(camino)
+    return caminos
+
+def _medir(funcion):
+    """(resultado, bytes retenidos) de llamar a funcion"""
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    resultado = funcion()
+    despues = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return resultado, despues - antes
+
+def reporte_memoria(cantidad_nodos=20000, cantidad_conexiones=200000, itinerarios=5000, largo=8):
+    """
+    Mide con tracemalloc la memoria que retienen los objetos del dominio
+    sobre una red generada:
+    - red: Nodo y Conexion cargados desde CSV
+    - pesos: GrafoCompacto y PesosConexiones (vehículos prototipo incluidos)
+    - itinerarios: Itinerario y Tramo armados por el planificador
+    """
+    with tempfile.TemporaryDirectory() as directorio:
+        generar_red(directorio, cantidad_nodos, cantidad_conexiones)
+        sistema = SistemaTransporte()
+
+        def cargar():
+            with contextlib.redirect_stdout(io.StringIO()):
+                sistema.cargar_nodos(os.path.join(directorio, "nodos.csv"))
+                sistema.cargar_conexiones(os.path.join(directorio, "conexiones.csv"))
+        _, bytes_red = _medir(cargar)
+
+    planificador = Planificador(sistema)
+    _, bytes_pesos = _medir(planificador._obtener_pesos)
+
+    caminos = _caminos_aleatorios(sistema, itinerarios, largo)
+    tramos = sum(len(camino) for camino in caminos)
+    resultado, bytes_itinerarios = _medir(
+        lambda: [planificador.construir_itinerario(camino, 1000) for camino in caminos])
+
+    conexiones = len(sistema.conexiones)
+    return {
+        'nodos': len(sistema.nodos),
+        'conexiones': conexiones,
+        'itinerarios': len(resultado),
+        'tramos': tramos,
+        'bytes_red': bytes_red,
+        'bytes_por_conexion': bytes_red / conexiones if conexiones else 0.0,
+        'bytes_pesos': bytes_pesos,
+        'prototipos': planificador._obtener_pesos().prototipos,
+        'bytes_itinerarios': bytes_itinerarios,
+        'bytes_por_tramo': bytes_itinerarios / tramos if tramos else 0.0,
+    }
+
+def mostrar_reporte(reporte):
+    """Imprime el reporte de memoria"""
+    print("="*50)
+    print("REPORTE DE MEMORIA")
+    print("="*50)
+    print(f"Red: {reporte['nodos']} nodos, {reporte['conexiones']} conexiones")
+    print(f"  Nodos y conexiones: {reporte['bytes_red'] / 2**20:.1f} MiB "
+          f"({reporte['bytes_por_conexion']:.0f} B por conexión)")
+    print(f"  Grafo compacto y pesos: {reporte['bytes_pesos'] / 2**20:.1f} MiB "
+          f"({reporte['prototipos']} vehículos compartidos)")
+    print(f"Itinerarios: {reporte['itinerarios']} con {reporte['tramos']} tramos")
+    print(f"  Itinerarios y tramos: {reporte['bytes_itinerarios'] / 2**20:.1f} MiB "
+          f"({reporte['bytes_por_tramo']:.0f} B por tramo)")
+    print("="*50)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memoria de los objetos del dominio sobre una red generada")
+    parser.add_argument('--nodos', type=int, default=20000)
+    parser.add_argument('--conexiones', type=int, default=200000)
+    parser.add_argument('--itinerarios', type=int, default=5000)
+    args = parser.parse_args()
+    mostrar_reporte(reporte_memoria(args.nodos, args.conexiones, args.itinerarios))
@@ -0,0 +1,231 @@
+import functools
+import json
+import os
+import time
+
+PREFIJO = 'edp'
+
+
+class Metricas:
+    """
+    Contadores y tiempos por fase del sistema y del planificador.
+    - sumar(nombre, cantidad, **etiquetas) acumula un contador (nodos
+      expandidos, etiquetas, caminos enumerados, itinerarios construidos...)
+    - fase(nombre) es un with que mide el tiempo de pared de una fase
+      (carga, validacion, resolucion, presentacion, exportacion). Si una
+      fase se anida en otra igual solo cuenta la de afuera.
+    Desactivadas (por defecto) no registran nada: sumar y fase vuelven de
+    inmediato y los recorridos solo cuentan en variables locales.
+    Se activan con activar() o con la variable de entorno EDP_METRICAS=1.
+    Hay una instancia global, METRICAS, compartida por todos los módulos.
+    """
+
+    def __init__(self, activas=False):
+        self.activas = activas
+        self.contadores = {}   # {(nombre, etiquetas): cantidad}
+        self.fases = {}        # {nombre: [llamadas, segundos, máximo]}
+        self._abiertas = {}    # {nombre: profundidad} fases en curso
+
+    def activar(self, activas=True):
+        self.activas = activas
+
+    def reiniciar(self):
+        """Borra contadores y tiempos (el estado activo no cambia)"""
+        self.contadores = {}
+        self.fases = {}
+        self._abiertas = {}
+
+    def sumar(self, nombre, cantidad=1, **etiquetas):
+        if not self.activas:
+            return
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        self.contadores[clave] = self.contadores.get(clave, 0) + cantidad
+
+    def fase(self, nombre):
+        """with que mide la fase (no hace nada si están desactivadas)"""
+        if not self.activas:
+            return _SIN_MEDICION
+        return _Medicion(self, nombre)
+
+    def _registrar_fase(self, nombre, segundos, llamadas=1, maximo=None):
+        registro = self.fases.setdefault(nombre, [0, 0.0, 0.0])
+        registro[0] += llamadas
+        registro[1] += segundos
+        registro[2] = max(registro[2], segundos if maximo is None else maximo)
+
+    # --- Entre procesos ---
+
+    def extraer(self):
+        """Contadores y fases acumulados desde la última extracción (y los borra); None si están desactivadas"""
+        if not self.activas or not (self.contadores or self.fases):
+            return None
+        extraidas = (self.contadores, self.fases)
+        self.contadores = {}
+        self.fases = {}
+        return extraidas
+
+    def combinar(self, extraidas):
+        """Suma lo extraído en otro proceso (ver extraer)"""
+        if extraidas is None:
+            return
+        contadores, fases = extraidas
+        for clave, cantidad in contadores.items():
+            self.contadores[clave] = self.contadores.get(clave, 0) + cantidad
+        for nombre, (llamadas, segundos, maximo) in fases.items():
+            self._registrar_fase(nombre, segundos, llamadas, maximo)
+
+    # --- Exportación ---
+
+    def obtener_instantanea(self, sistema=None, planificador=None):
+        """
+        Contadores, fases y, si se pasan, el tamaño de la red y las
+        estadísticas de las caches del planificador, como diccionario
+        serializable en JSON.
+        """
+        contadores = {}
+        for (nombre, etiquetas), cantidad in sorted(self.contadores.items()):
+            if etiquetas:
+                nombre += '{' + ','.join(f"{clave}={valor}" for clave, valor in etiquetas) + '}'
+            contadores[nombre] = cantidad
+        instantanea = {
+            'activas': self.activas,
+            'contadores': contadores,
+            'fases': {nombre: {'llamadas': llamadas, 'segundos': segundos, 'max_segundos': maximo}
+                      for nombre, (llamadas, segundos, maximo) in sorted(self.fases.items())}
+        }
+        if sistema is not None:
+            instantanea['red'] = {'nodos': len(sistema.nodos), 'conexiones': len(sistema.conexiones),
+                                  'solicitudes': len(sistema.solicitudes)}
+        if planificador is not None:
+            instantanea['caches'] = _caches_del_planificador(planificador)
+        return instantanea
+
+    def formato_prometheus(self, sistema=None, planificador=None):
+        """Las mismas métricas en el formato de texto de Prometheus"""
+        lineas = []
+
+        def metrica(nombre, tipo, muestras):
+            lineas.append(f"# TYPE {PREFIJO}_{nombre} {tipo}")
+            for etiquetas, valor in muestras:
+                texto = ','.join(f'{clave}="{valor_etiqueta}"' for clave, valor_etiqueta in etiquetas)
+                lineas.append(f"{PREFIJO}_{nombre}{{{texto}}} {valor}" if texto else f"{PREFIJO}_{nombre} {valor}")
+
+        por_nombre = {}
+        for (nombre, etiquetas), cantidad in sorted(self.contadores.items()):
+            por_nombre.setdefault(nombre, []).append((etiquetas, cantidad))
+        for nombre, muestras in por_nombre.items():
+            metrica(f"{nombre}_total", 'counter', muestras)
+
+        fases = sorted(self.fases.items())
+        if fases:
+            metrica('fase_llamadas_total', 'counter', [((('fase', nombre),), llamadas) for nombre, (llamadas, _, _) in fases])
+            metrica('fase_segundos_total', 'counter', [((('fase', nombre),), segundos) for nombre, (_, segundos, _) in fases])
+            metrica('fase_max_segundos', 'gauge', [((('fase', nombre),), maximo) for nombre, (_, _, maximo) in fases])
+
+        if sistema is not None:
+            metrica('red_nodos', 'gauge', [((), len(sistema.nodos))])
+            metrica('red_conexiones', 'gauge', [((), len(sistema.conexiones))])
+        if planificador is not None:
+            caches = _caches_del_planificador(planificador)
+            for campo in ('aciertos', 'fallos', 'desalojos'):
+                metrica(f"cache_{campo}_total", 'counter',
+                        [((('cache', cache),), estadisticas[campo]) for cache, estadisticas in caches.items()])
+            metrica('cache_entradas', 'gauge',
+                    [((('cache', cache),), estadisticas.get('tamano', estadisticas.get('entradas')))
+                     for cache, estadisticas in caches.items()])
+        return '\n'.join(lineas) + '\n'
+
+    def exportar(self, archivo, sistema=None, planificador=None):
+        """Guarda las métricas: texto de Prometheus si el archivo termina en .prom, JSON si no"""
+        with open(archivo, 'w', encoding='utf-8') as salida:
+            if archivo.endswith('.prom'):
+                salida.write(self.formato_prometheus(sistema, planificador))
+            else:
+                json.dump(self.obtener_instantanea(sistema, planificador), salida, indent=2, ensure_ascii=False)
+
+    def __repr__(self):
+        return f"Metricas(activas={self.activas}, contadores={len(self.contadores)}, fases={len(self.fases)})"
+
+
+def _caches_del_planificador(planificador):
+    """Estadísticas de las caches de rutas, de evaluaciones y en disco del planificador"""
+    caches = {'rutas': planificador.cache.obtener_estadisticas(),
+              'evaluaciones': planificador.evaluaciones.obtener_estadisticas()}
+    if planificador.cache_disco is not None:
+        caches['disco'] = planificador.cache_disco.obtener_estadisticas()
+    return caches
+
+
+class _Medicion:
+    """with de una fase activa"""
+    __slots__ = ('metricas', 'nombre', 'inicio')
+
+    def __init__(self, metricas, nombre):
+        self.metricas = metricas
+        self.nombre = nombre
+
+    def __enter__(self):
+        abiertas = self.metricas._abiertas
+        abiertas[self.nombre] = abiertas.get(self.nombre, 0) + 1
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        segundos = time.perf_counter() - self.inicio
+        abiertas = self.metricas._abiertas
+        abiertas[self.nombre] -= 1
+        if not abiertas[self.nombre]:
+            self.metricas._registrar_fase(self.nombre, segundos)
+        return False
+
+
+class _SinMedicion:
+    """with vacío de las métricas desactivadas"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        return False
+
+
+_SIN_MEDICION = _SinMedicion()
+
+METRICAS = Metricas(os.environ.get('EDP_METRICAS', '') not in ('', '0'))
+
+
+def medir(fase):
+    """Decorador: cada llamada a la función cuenta como la fase dada"""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def medida(*args, **kwargs):
+            if not METRICAS.activas:
+                return funcion(*args, **kwargs)
+            with METRICAS.fase(fase):
+                return funcion(*args, **kwargs)
+        return medida
+    return decorador
+
+
+# Código de prueba
+if __name__ == "__main__":
+    import contextlib
+    import io
+    from sistema_transporte import SistemaTransporte
+    from planificador import Planificador
+    from metricas import METRICAS   # la instancia que usan los demás módulos (no la de __main__)
+
+    METRICAS.activar()
+    sistema = SistemaTransporte()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sistema.cargar_nodos('nodos.csv')
+        sistema.cargar_conexiones('conexiones.csv')
+        sistema.cargar_solicitudes('solicitudes.csv')
+    planificador = Planificador(sistema)
+    for solicitud in sistema.solicitudes:
+        planificador.evaluar_solicitud(solicitud)
+        planificador.encontrar_ruta_optima(solicitud, "tiempo", "dijkstra")
+
+    print(json.dumps(METRICAS.obtener_instantanea(sistema, planificador), indent=2, ensure_ascii=False))
+    print(METRICAS.formato_prometheus(sistema, planificador))
@@ -1,12 +1,14 @@
 from validaciones import validar_texto
+from sys import intern
 from conexion import Conexion
 import csv
 
 class Nodo():
     '''Representa una ciudad de la red'''
+    __slots__ = ('nombre', 'conexiones')
 
     def __init__(self, nombre:str):
-        self.nombre = validar_texto(nombre)
+        self.nombre = intern(validar_texto(nombre))
         self.conexiones=[]
         '''Las conexiones de un nodo serán aquellos objetos conexión que tengan a ese nodo como origen'''
 
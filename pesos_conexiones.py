@@ -0,0 +1,110 @@
+from array import array
+
+class PesosConexiones:
+    """
+    Vehículo y coeficientes de tiempo y costo de cada conexión, calculados
+    una sola vez por versión de la red.
+    - Cada conexión recibe un vehículo prototipo (conexion.vehiculo), compartido
+      entre las conexiones con la misma configuración. No debe modificarse.
+    - tiempo_nominal[e]: horas a velocidad nominal
+    - costo_vehiculo[e]: costo fijo y por km de un solo vehículo
+    - capacidad[e]: kg por vehículo
+    Con esto el tiempo y el costo de una conexión para cualquier carga salen
+    de los arrays, sin crear vehículos ni tramos durante la búsqueda.
+    Los índices e son los del GrafoCompacto.
+    """
+
+    def __init__(self, grafo, crear_vehiculo, modos):
+        """
+        crear_vehiculo(conexion): el vehículo que usa el planificador en la conexión
+        modos: modos con vehículo; las conexiones de otros modos quedan sin prototipo
+        """
+        self.version = grafo.version
+        self.grafo = grafo
+        self.modos = set(modos)
+        cantidad = len(grafo.conexiones)
+        self.vehiculos = [None] * cantidad
+        self.tiempo_nominal = array('d', [0.0]) * cantidad
+        self.costo_vehiculo = array('d', [0.0]) * cantidad
+        self.capacidad = array('d', [1.0]) * cantidad
+
+        prototipos = {}   # {(modo, restriccion, valor): vehículo}
+        for e, conexion in enumerate(grafo.conexiones):
+            if grafo.modos[grafo.modo[e]] not in modos:
+                continue
+            clave = (conexion.tipo.lower(), conexion.restriccion, conexion.valorRestriccion)
+            vehiculo = prototipos.get(clave)
+            if vehiculo is None:
+                vehiculo = crear_vehiculo(conexion)
+                prototipos[clave] = vehiculo
+            conexion.vehiculo = vehiculo
+
+            self.vehiculos[e] = vehiculo
+            self.tiempo_nominal[e], self.costo_vehiculo[e], self.capacidad[e] = self.coeficientes(vehiculo, grafo.distancia[e])
+        self.prototipos = len(prototipos)
+
+    @staticmethod
+    def coeficientes(vehiculo, distancia):
+        """(tiempo_nominal, costo_vehiculo, capacidad) de una conexión con el vehículo dado"""
+        return (distancia / vehiculo.velocidad_nominal,
+                vehiculo.costo_fijo_uso + vehiculo.costo_km_efectivo(distancia) * distancia,
+                vehiculo.capacidad_de_carga)
+
+    @classmethod
+    def desde_arrays(cls, grafo, crear_vehiculo, modos, arrays, vehiculos=None):
+        """
+        Pesos con los coeficientes ya calculados (por ejemplo leídos de un
+        SnapshotRed). arrays['prototipo'][e] es el índice del vehículo de la
+        conexión e (-1 si no tiene); cada prototipo se crea con la primera
+        conexión que lo usa, igual que al calcularlos.
+        vehiculos: secuencia con el vehículo de cada conexión, si ya se tiene
+        (ver AlmacenGrafo); así no se recorren todas las conexiones.
+        """
+        pesos = cls.__new__(cls)
+        pesos.version = grafo.version
+        pesos.grafo = grafo
+        pesos.modos = set(modos)
+        pesos.tiempo_nominal = arrays['tiempo_nominal']
+        pesos.costo_vehiculo = arrays['costo_vehiculo']
+        pesos.capacidad = arrays['capacidad']
+        if vehiculos is not None:
+            pesos.vehiculos = vehiculos
+            pesos.prototipos = len(vehiculos.prototipos)
+            return pesos
+
+        pesos.vehiculos = [None] * len(grafo.conexiones)
+        prototipos = []
+        for e, indice in enumerate(arrays['prototipo']):
+            if indice < 0:
+                continue
+            conexion = grafo.conexiones[e]
+            if indice == len(prototipos):
+                prototipos.append(crear_vehiculo(conexion))
+            conexion.vehiculo = pesos.vehiculos[e] = prototipos[indice]
+        pesos.prototipos = len(prototipos)
+        return pesos
+
+    def tiempo(self, e, sorteos):
+        """
+        Horas de la conexión e. Si tiene probabilidad de mal tiempo el
+        clima se sortea una vez por búsqueda y queda en sorteos
+        ({e: horas}) para armar después el tramo con el mismo valor.
+        """
+        if self.grafo.prob_mal_tiempo[e] <= 0:
+            return self.tiempo_nominal[e]
+        tiempo = sorteos.get(e)
+        if tiempo is None:
+            tiempo = self.grafo.distancia[e] / self.vehiculos[e].getVelocidad()
+            sorteos[e] = tiempo
+        return tiempo
+
+    def costo(self, e, carga):
+        """Costo fijo y por km de todos los vehículos que requiere la carga"""
+        return -(-carga // self.capacidad[e]) * self.costo_vehiculo[e]
+
+    def costo_carga(self, e, carga):
+        """Costo por kg si el itinerario empieza por la conexión e"""
+        return self.vehiculos[e].costo_carga_cerrado(carga)
+
+    def __repr__(self):
+        return f"PesosConexiones(conexiones={len(self.vehiculos)}, prototipos={self.prototipos})"
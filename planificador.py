@@ -1,15 +1,25 @@
 from nodo import Nodo
 from itinerario import Itinerario
 from tramo import Tramo
-from vehiculos import Vehiculo, Camion, Tren, Barco, Avion
+from vehiculos import Camion, Tren, Barco, Avion
+from validaciones import validar_positivo
+from jerarquia_contraccion import JerarquiaContraccion
+from cache_rutas import CacheRutas
+from ruta_candidata import RutaCandidata
+from metricas import METRICAS, medir
+import bisect
+import heapq
+import math
 
 class Planificador: 
     """
     Planificador que optimiza itinerarios según tiempo o costo usando Dijkstra.
     Maneja restricciones específicas de cada tipo de conexión.
+    La búsqueda exhaustiva original sigue disponible con motor='exhaustivo'.
     """   
     
-    def __init__(self, sistema_transporte):
+    def __init__(self, sistema_transporte, tiempo_transbordo=0.0, costo_transbordo=0.0, capacidad_cache=1024,
+                 cache_disco=None):
         self.sistema_transporte = sistema_transporte
         
         # Mapeo de tipos de conexión a clases de vehículos
@@ -20,6 +30,36 @@ class Planificador:
             'aerea': Avion
         }
         self.vehiculos_disponibles = self.tipos_vehiculos
+        self.motores_disponibles = ('dijkstra', 'exhaustivo', 'multimodal', 'astar', 'jerarquia')
+        # Un SistemaEnDisco no admite los motores que preprocesan la red entera
+        soportados = getattr(sistema_transporte, 'motores_soportados', None)
+        if soportados is not None:
+            self.motores_disponibles = tuple(motor for motor in self.motores_disponibles if motor in soportados)
+        
+        # Transbordo entre modos: valor por defecto y valores particulares por nodo
+        self.tiempo_transbordo = validar_positivo(tiempo_transbordo)   # horas
+        self.costo_transbordo = validar_positivo(costo_transbordo)     # $
+        self.transbordos_por_nodo = {}   # {nombre_nodo: (tiempo, costo)}
+        self._umbrales_cache = (None, {})
+        
+        # Rutas ya resueltas por clase de peso (capacidad 0 la desactiva)
+        self.cache = CacheRutas(capacidad_cache)
+        # Evaluaciones completas por solicitud y versión de la red
+        self.evaluaciones = CacheRutas(capacidad_cache)
+        # Rutas y evaluaciones de otras ejecuciones (CacheDisco), por huella de la red
+        self.cache_disco = cache_disco
+        self._huella_cache = (None, None)
+
+    def configurar_transbordo(self, nodo, tiempo, costo):
+        """Define el tiempo (horas) y costo ($) de cambiar de modo en un nodo"""
+        nombre = nodo if isinstance(nodo, str) else nodo.nombre
+        self.transbordos_por_nodo[nombre] = (validar_positivo(tiempo), validar_positivo(costo))
+        self.cache.limpiar()
+        self.evaluaciones.limpiar()
+
+    def _obtener_transbordo(self, nodo):
+        """Tiempo y costo de cambiar de modo en el nodo"""
+        return self.transbordos_por_nodo.get(nodo.nombre, (self.tiempo_transbordo, self.costo_transbordo))
         
     def _crear_vehiculo_para_conexion(self, conexion):
         """
@@ -53,6 +93,10 @@ class Planificador:
         else:
             raise ValueError(f"Tipo de vehículo no reconocido: {tipo}")
 
+    def _vehiculo_de(self, conexion):
+        """Vehículo prototipo de la conexión (lo crea si todavía no se precalculó)"""
+        return conexion.vehiculo or self._crear_vehiculo_para_conexion(conexion)
+
     def buscar_rutas(self, nodo_actual, destino, modo, recorrido=None):
         """
         Busca todas las rutas posibles entre dos nodos usando búsqueda en profundidad.
@@ -78,77 +122,751 @@ class Planificador:
         
         return caminos
     
-    def encontrar_ruta_optima(self, solicitud, kpi="costo"):
+    @medir('resolucion')
+    def encontrar_ruta_optima(self, solicitud, kpi="costo", motor="dijkstra"):
         """
         Devuelve:
         - mejor_itinerario (Itinerario): el más óptimo según el KPI
         - itinerarios_optimos_por_modo (dict[str, Itinerario]): los mejores por cada modo
+
+        El parámetro motor elige el algoritmo de búsqueda:
+        - 'dijkstra': camino mínimo con cola de prioridad (por defecto)
+        - 'exhaustivo': enumera todos los caminos simples (versión original)
+        - 'astar': A* por modo guiado por las cotas de los landmarks del
+          sistema (se precalculan la primera vez si no existen)
+        - 'jerarquia': consulta bidireccional sobre jerarquías de contracción
+          por modo, KPI y clase de peso (ver preprocesar_jerarquias)
+        - 'multimodal': una sola búsqueda que además permite cambiar de modo
+          en nodos intermedios pagando el transbordo configurado. El mejor
+          itinerario puede combinar modos; los óptimos por modo son puros.
+
+        Las rutas elegidas se guardan en la cache por clase de peso: otra
+        solicitud de la misma clase reutiliza las rutas y solo recalcula
+        tiempo y costo con su carga.
+        """
+        if motor not in self.motores_disponibles:
+            raise ValueError(f"Motor inválido: {motor}. Usar: {', '.join(self.motores_disponibles)}")
+
+        nodo_origen, nodo_destino = self._obtener_nodos_solicitud(solicitud)
+        carga = solicitud.peso_kg
+        
+        clave = self._clave_cache(nodo_origen, nodo_destino, carga, kpi, motor)
+        rutas = self.rutas_guardadas(clave)
+        if rutas is not None:
+            return self._repreciar_rutas(rutas, carga, kpi)
+        
+        METRICAS.sumar('busquedas', motor=motor)
+        if motor == "multimodal":
+            resultado = self._busqueda_multimodal(nodo_origen, nodo_destino, carga, kpi)
+        else:
+            resultado = self._buscar_por_modo(nodo_origen, nodo_destino, carga, kpi, motor)
+        
+        self.guardar_rutas(clave, self._rutas_de_resultado(resultado, motor))
+        return resultado
+
+    def _buscar_por_modo(self, nodo_origen, nodo_destino, carga, kpi, motor):
+        """Busca el mejor itinerario de cada modo por separado y elige el mejor"""
+        rutas_por_modo = {}
+        for modo in self.vehiculos_disponibles:
+            if motor == "dijkstra":
+                ruta = self._mejor_ruta_dijkstra(nodo_origen, nodo_destino, modo, carga, kpi)
+            elif motor == "jerarquia":
+                ruta = self._mejor_ruta_jerarquia(nodo_origen, nodo_destino, modo, carga, kpi)
+            elif motor == "astar":
+                heuristica = self._heuristica_landmarks(nodo_destino, modo, carga, kpi)
+                ruta = self._mejor_ruta_dijkstra(nodo_origen, nodo_destino, modo, carga, kpi, heuristica)
+            else:
+                ruta = self._mejor_ruta_exhaustivo(nodo_origen, nodo_destino, modo, carga, kpi)
+            if ruta:
+                rutas_por_modo[modo] = ruta
+        
+        return self._elegir_y_materializar(rutas_por_modo, carga, kpi)
+
+    def _elegir_y_materializar(self, rutas_por_modo, carga, kpi):
+        """
+        Elige la mejor de las rutas candidatas de cada modo (comparando sus
+        totales) y materializa solo las que se devuelven.
+        Devuelve (mejor_itinerario, itinerarios_optimos_por_modo).
+        """
+        mejor_modo = None
+        mejor_valor = float('inf')
+        for modo, ruta in rutas_por_modo.items():
+            #Analizo si es el mejor entre todos los modos posibles
+            if ruta.valor(kpi) < mejor_valor:
+                mejor_valor = ruta.valor(kpi)
+                mejor_modo = modo
+        
+        itinerarios_optimos_por_modo = {modo: self.materializar_ruta(ruta, carga, kpi)
+                                        for modo, ruta in rutas_por_modo.items()}
+        return itinerarios_optimos_por_modo.get(mejor_modo), itinerarios_optimos_por_modo
+
+    def _ruta_candidata(self, ids_conexiones, carga, sorteos):
+        """
+        RutaCandidata de una secuencia de conexiones (ids del grafo compacto).
+        Suma tiempo y costo en el mismo orden que Itinerario, así los totales
+        coinciden con los del itinerario materializado.
+        """
+        if not ids_conexiones:
+            return None
+        grafo = self.sistema_transporte.obtener_grafo()
+        pesos = self._obtener_pesos()
+        nodos = [grafo.origen[ids_conexiones[0]]]
+        tiempo_tramos = costo_tramos = 0
+        tiempo_transbordos = costo_transbordos = 0
+        anterior = None
+        for e in ids_conexiones:
+            if anterior is not None and grafo.modo[e] != grafo.modo[anterior]:
+                tiempo_transbordo, costo_transbordo = self._obtener_transbordo(grafo.nodos[grafo.origen[e]])
+                tiempo_transbordos += tiempo_transbordo
+                costo_transbordos += costo_transbordo
+            tiempo_tramos += pesos.tiempo(e, sorteos)
+            costo_tramos += pesos.costo(e, carga)
+            nodos.append(grafo.destino[e])
+            anterior = e
+        
+        costo = costo_tramos + pesos.costo_carga(ids_conexiones[0], carga) + costo_transbordos
+        return RutaCandidata(nodos, list(ids_conexiones), tiempo_tramos + tiempo_transbordos, costo, sorteos)
+
+    def materializar_ruta(self, ruta, carga, kpi="tiempo"):
+        """Convierte una RutaCandidata en Itinerario (con sus tramos y transbordos)"""
+        return self._itinerario_de_ids(ruta.conexiones, ruta.sorteos, carga, kpi)
+
+    def _itinerario_de_ids(self, ids_conexiones, sorteos, carga, kpi):
+        """Itinerario de conexiones dadas por id, con el clima sorteado en la búsqueda ({e: horas})"""
+        grafo = self.sistema_transporte.obtener_grafo()
+        conexiones = [grafo.conexiones[e] for e in ids_conexiones]
+        tiempos = [sorteos.get(e) for e in ids_conexiones]
+        return self._construir_itinerario_multimodal(conexiones, tiempos, carga, kpi)
+
+    def _clave_cache(self, nodo_origen, nodo_destino, carga, kpi, motor):
+        """
+        Clave de cache de una consulta. El peso solo cambia la ruta de cada
+        modo a través de los umbrales de peso_max: la cantidad de vehículos
+        y el sobrecosto por carga del camión son iguales para todas las rutas
+        del modo, así que solo cambian el precio, que se recalcula.
+        En la búsqueda multimodal esos términos sí pesan distinto según la
+        combinación de modos, por eso se usa la carga exacta.
+        """
+        if motor == "multimodal":
+            clase = ('carga', carga)
+        else:
+            umbrales = self._umbrales_peso()
+            clase = tuple(self._clase_de_peso(carga, umbrales[modo]) for modo in self.vehiculos_disponibles)
+        return (nodo_origen.nombre, nodo_destino.nombre, kpi, motor, clase, self.sistema_transporte.version)
+
+    def _rutas_de_resultado(self, resultado, motor):
+        """
+        Conexiones de los óptimos por modo, para la cache. El mejor itinerario
+        solo se guarda en la búsqueda multimodal; en las demás se vuelve a
+        elegir entre los modos con la carga de cada solicitud.
+        """
+        grafo = self.sistema_transporte.obtener_grafo()
+        mejor_itinerario, itinerarios_optimos_por_modo = resultado
+        conexiones_por_modo = {modo: grafo.ids_de_conexiones(tramo.conexion for tramo in itinerario.tramos)
+                               for modo, itinerario in itinerarios_optimos_por_modo.items()}
+        mejor = None
+        if motor == "multimodal" and mejor_itinerario:
+            mejor = grafo.ids_de_conexiones(tramo.conexion for tramo in mejor_itinerario.tramos)
+        return (mejor, conexiones_por_modo)
+
+    def _repreciar_rutas(self, rutas, carga, kpi):
+        """Arma los itinerarios de rutas guardadas (ids de conexiones) con la carga de la solicitud"""
+        mejor_conexiones, conexiones_por_modo = rutas
+        sorteos = {}
+        rutas_por_modo = {modo: self._ruta_candidata(ids, carga, sorteos)
+                          for modo, ids in conexiones_por_modo.items()}
+        if mejor_conexiones is None:
+            # Con otra carga de la misma clase puede cambiar el modo más conveniente
+            return self._elegir_y_materializar(rutas_por_modo, carga, kpi)
+        
+        itinerarios_optimos_por_modo = {}
+        mejor_itinerario = None
+        for modo, ruta in rutas_por_modo.items():
+            itinerario = self.materializar_ruta(ruta, carga, kpi)
+            itinerarios_optimos_por_modo[modo] = itinerario
+            if ruta.conexiones == mejor_conexiones and mejor_itinerario is None:
+                mejor_itinerario = itinerario
+        if mejor_itinerario is None:
+            mejor_itinerario = self.materializar_ruta(self._ruta_candidata(mejor_conexiones, carga, sorteos), carga, kpi)
+        return mejor_itinerario, itinerarios_optimos_por_modo
+
+    def clave_consulta(self, solicitud, kpi="costo", motor="dijkstra"):
+        """
+        Clave de cache de la consulta (ver _clave_cache): dos solicitudes con
+        la misma clave comparten las rutas y solo difieren en el precio.
+        """
+        nodo_origen, nodo_destino = self._obtener_nodos_solicitud(solicitud)
+        return self._clave_cache(nodo_origen, nodo_destino, solicitud.peso_kg, kpi, motor)
+
+    def rutas_de_consulta(self, solicitud, kpi="costo", motor="dijkstra"):
+        """
+        Resuelve la consulta y devuelve sus rutas como ids de conexiones
+        (mejor, {modo: ids}), compactas para enviarlas entre procesos.
+        """
+        resultado = self.encontrar_ruta_optima(solicitud, kpi, motor)
+        return self._rutas_de_resultado(resultado, motor)
+
+    def rutas_guardadas(self, clave):
+        """
+        Rutas de la clave (ver clave_consulta) guardadas en la cache o, si hay
+        cache en disco, resueltas en otra ejecución con la misma red. None si no hay.
+        """
+        rutas = self.cache.obtener(clave)
+        if rutas is None:
+            rutas = self._leer_disco(('rutas',) + clave[:-1])
+            if rutas is not None:
+                self.cache.guardar(clave, rutas)
+        return rutas
+
+    def guardar_rutas(self, clave, rutas):
+        """Registra en la cache (y en la cache en disco) rutas resueltas, aquí o en otro proceso"""
+        self.cache.guardar(clave, rutas)
+        self._escribir_disco(('rutas',) + clave[:-1], rutas)
+
+    def huella_red(self):
+        """
+        Huella de todo lo que determina los resultados: el contenido de la
+        red (SistemaTransporte.huella), las tarifas de los vehículos y los
+        transbordos configurados. Identifica las entradas de la cache en disco.
         """
+        estado = (self.sistema_transporte.version, self.tiempo_transbordo, self.costo_transbordo,
+                  tuple(sorted(self.transbordos_por_nodo.items())))
+        guardado, huella = self._huella_cache
+        if guardado == estado:
+            return huella
+        
+        import hashlib
+        from tarifas import huella_tarifas
+        suma = hashlib.sha256(self.sistema_transporte.huella().encode())
+        suma.update(repr((huella_tarifas(), estado[1:])).encode())
+        huella = suma.hexdigest()
+        self._huella_cache = (estado, huella)
+        return huella
+
+    def _leer_disco(self, clave):
+        """Valor de la cache en disco para la huella actual (None si no hay cache o no está)"""
+        if self.cache_disco is None:
+            return None
+        return self.cache_disco.obtener(self.huella_red(), clave)
+
+    def _escribir_disco(self, clave, valor):
+        if self.cache_disco is not None:
+            self.cache_disco.guardar(self.huella_red(), clave, valor)
+
+    def itinerarios_de_rutas(self, rutas, carga, kpi="costo"):
+        """(mejor_itinerario, itinerarios_optimos_por_modo) de rutas dadas por rutas_de_consulta, con la carga dada"""
+        return self._repreciar_rutas(rutas, carga, kpi)
 
-        # Obtener nodos de origen y destino
+    def calentar(self):
+        """Compila el grafo, los pesos y los umbrales de peso, para que no los pague la primera consulta"""
+        self.sistema_transporte.obtener_grafo()
+        self._obtener_pesos()
+        self._umbrales_peso()
+
+    def obtener_estadisticas_cache(self):
+        """Estadísticas de la cache de rutas"""
+        return self.cache.obtener_estadisticas()
+
+    def _obtener_nodos_solicitud(self, solicitud):
+        """Obtiene los nodos de origen y destino de la solicitud dentro del sistema"""
         origen_nombre = solicitud.origen if isinstance(solicitud.origen, str) else solicitud.origen.nombre
         destino_nombre = solicitud.destino if isinstance(solicitud.destino, str) else solicitud.destino.nombre
         
-        nodo_origen = None
-        nodo_destino = None
-        
-        for nodo in self.sistema_transporte.nodos.values():
-            if nodo.nombre == origen_nombre:
-                nodo_origen = nodo
-            if nodo.nombre == destino_nombre:
-                nodo_destino = nodo
+        nodo_origen = self.sistema_transporte.nodos.get(origen_nombre)
+        nodo_destino = self.sistema_transporte.nodos.get(destino_nombre)
                 
         if not nodo_origen or not nodo_destino:
             raise ValueError(f"Nodos no encontrados: {origen_nombre} o {destino_nombre}")
+        return nodo_origen, nodo_destino
+
+    def _heuristica_landmarks(self, nodo_destino, modo, carga, kpi):
+        """
+        Heurística A* a partir de los landmarks del sistema.
+        Las cotas de costo son de un solo vehículo: se escalan por la
+        cantidad de vehículos del modo que requiere la carga.
+        """
+        if self.sistema_transporte.landmarks is None:
+            self._obtener_pesos()
+            self.sistema_transporte.preprocesar_landmarks(self._vehiculo_de)
         
-        carga = solicitud.peso_kg
+        factor = 1.0
+        if kpi == "costo":
+            capacidad = self.tipos_vehiculos[modo]().capacidad_de_carga
+            factor = math.ceil(carga / capacidad)
+        return self.sistema_transporte.landmarks.heuristica(nodo_destino, kpi, factor, modo)
+
+    def _umbrales_peso(self):
+        """
+        Pesos a partir de los cuales alguna conexión deja de estar habilitada, por modo.
+        Dos cargas entre los mismos umbrales habilitan exactamente las mismas conexiones.
+        Se recalculan solo cuando cambia la versión de la red.
+        """
+        version, umbrales = self._umbrales_cache
+        if version == self.sistema_transporte.version:
+            return umbrales
         
-        modos_disponibles = list(self.vehiculos_disponibles)
-        mejor_itinerario = None
-        mejor_valor = float('inf')
-        itinerarios_optimos_por_modo = {}
+        # Las restricciones de peso ya están compiladas en el grafo (mismas
+        # reglas que _verificar_restricciones)
+        por_modo = self.sistema_transporte.obtener_grafo().umbrales_peso()
+        umbrales = {modo: por_modo.get(modo, []) for modo in self.vehiculos_disponibles}
+        self._umbrales_cache = (self.sistema_transporte.version, umbrales)
+        return umbrales
+
+    def _clase_de_peso(self, carga, umbrales):
+        """Índice de la clase de equivalencia de la carga dentro de los umbrales del modo"""
+        return bisect.bisect_left(umbrales, carga)
+
+    def _peso_base(self, conexion, kpi):
+        """
+        Peso de la conexión para preprocesar: tiempo a velocidad nominal o
+        costo de un solo vehículo. Dentro de un modo todas las conexiones
+        usan la misma cantidad de vehículos, así que el camino óptimo no
+        depende de la carga (salvo por las conexiones que habilita).
+        """
+        vehiculo = self._vehiculo_de(conexion)
+        if kpi == "tiempo":
+            return conexion.distancia / vehiculo.velocidad_nominal
+        return vehiculo.calcular_costo_tramo(conexion.distancia, vehiculo.capacidad_de_carga)
+
+    def _obtener_pesos(self):
+        """Vehículos y coeficientes de cada conexión (ver SistemaTransporte.preprocesar_pesos)"""
+        pesos = self.sistema_transporte.pesos
+        if pesos is None or pesos.version != self.sistema_transporte.version:
+            modos = {modo.lower() for modo in self.vehiculos_disponibles}
+            pesos = self.sistema_transporte.preprocesar_pesos(self._crear_vehiculo_para_conexion, modos)
+        return pesos
+
+    def _obtener_jerarquia(self, modo, kpi, clase, umbrales):
+        """Devuelve la jerarquía del modo, KPI y clase de peso, construyéndola si falta"""
+        clave = (modo, kpi, clase)
+        jerarquia = self.sistema_transporte.jerarquias.get(clave)
+        if jerarquia is None:
+            # Carga representativa de la clase: el umbral superior (o más que todos)
+            carga = umbrales[clase] if clase < len(umbrales) else float('inf')
+            conexiones = [conexion for conexion in self.sistema_transporte.conexiones
+                          if conexion.tipo.lower() == modo and self._verificar_restricciones(conexion, carga)]
+            jerarquia = JerarquiaContraccion(conexiones, lambda conexion: self._peso_base(conexion, kpi))
+            self.sistema_transporte.jerarquias[clave] = jerarquia
+        return jerarquia
+
+    def preprocesar_jerarquias(self, kpis=("tiempo", "costo")):
+        """
+        Construye las jerarquías de contracción de todos los modos, KPIs y
+        clases de peso. Devuelve un reporte por jerarquía con el tiempo de
+        preprocesamiento, la cantidad de atajos y la memoria estimada.
+        """
+        reporte = []
+        for modo, umbrales in self._umbrales_peso().items():
+            for kpi in kpis:
+                for clase in range(len(umbrales) + 1):
+                    jerarquia = self._obtener_jerarquia(modo, kpi, clase, umbrales)
+                    reporte.append({'modo': modo, 'kpi': kpi, 'clase_peso': clase, **jerarquia.obtener_reporte()})
         
-        for modo in modos_disponibles:
-            rutas = self.buscar_rutas(nodo_origen, nodo_destino, modo)
-            mejor_itinerario_por_modo = None
-            mejor_valor_modo = float('inf')
-            
-            #Convertir rutas de nodos a itinerario
-            for ruta in rutas:
-                conexiones = []
-                for i in range(len(ruta) - 1):
-                    nodo_origen_tramo = ruta[i]
-                    nodo_destino_tramo = ruta[i + 1]
-
-                    # Buscar la conexión válida para ese tramo
-                    for conexion in nodo_origen_tramo.conexiones:
-                        if (conexion.destino == nodo_destino_tramo and 
-                            conexion.tipo.lower() == modo.lower() and 
-                            self._verificar_restricciones(conexion, carga)):
-                            conexiones.append(conexion)
-                            break
-
-                #Construir todas las conexiones
-                if len(conexiones) == len(ruta) - 1:
-                    itinerario = self._construir_itinerario_con_conexiones(conexiones, carga, kpi)
-                    valor_kpi = itinerario.tiempo_total if kpi == "tiempo" else itinerario.costo_total
+        tiempo_total = sum(fila['tiempo_preprocesamiento'] for fila in reporte)
+        atajos = sum(fila['atajos'] for fila in reporte)
+        memoria = sum(fila['memoria_bytes'] for fila in reporte)
+        print(f"Jerarquías construidas: {len(reporte)} | Atajos: {atajos} | "
+              f"Tiempo: {tiempo_total:.2f}s | Memoria: {memoria / 1024 / 1024:.1f} MB")
+        return reporte
 
+    def _mejor_ruta_jerarquia(self, nodo_origen, nodo_destino, modo, carga, kpi):
+        """
+        Consulta la jerarquía de contracción del modo y devuelve la ruta con
+        las conexiones originales. En vuelos con probabilidad de mal tiempo la
+        jerarquía usa la velocidad nominal; la ruta sí aplica el clima.
+        """
+        umbrales = self._umbrales_peso()[modo]
+        jerarquia = self._obtener_jerarquia(modo, kpi, self._clase_de_peso(carga, umbrales), umbrales)
+        _, conexiones = jerarquia.consultar(nodo_origen, nodo_destino)
+        grafo = self.sistema_transporte.obtener_grafo()
+        return self._ruta_candidata(grafo.ids_de_conexiones(conexiones), carga, {})
+
+    def _valor_kpi(self, itinerario, kpi):
+        """Valor del itinerario según el KPI elegido"""
+        return itinerario.tiempo_total if kpi == "tiempo" else itinerario.costo_total
+
+    def _mejor_ruta_exhaustivo(self, nodo_origen, nodo_destino, modo, carga, kpi):
+        """
+        Enumera todas las rutas simples del modo y se queda con la mejor según el KPI.
+        Recorre el grafo compacto en profundidad: entre dos nodos usa la
+        primera conexión habilitada, igual que buscar_rutas.
+        El valor de cada ruta se acumula con los pesos precalculados; solo
+        la mejor se devuelve, como RutaCandidata.
+        """
+        grafo = self.sistema_transporte.obtener_grafo()
+        if modo.lower() not in grafo.adyacencias:
+            return None
+        inicio, destinos, aristas = grafo.adyacencias[modo.lower()]
+        peso_max = grafo.peso_max
+        pesos = self._obtener_pesos()
+        s = grafo.id_nodo(nodo_origen)
+        t = grafo.id_nodo(nodo_destino)
+        sorteos = {}
+        mejor_camino = None
+        mejor_valor_modo = float('inf')
+        
+        en_camino = grafo.marcas_por_nodo()
+        en_camino[s] = 1
+        camino = []       # ids de las conexiones del camino actual
+        acumulado = [0.0]  # valor del KPI hasta cada nodo del camino
+        # Pila de (nodo, posición de la próxima conexión a explorar)
+        pila = [(s, inicio[s])]
+        caminos = 0
+        while pila:
+            v, i = pila[-1]
+            if v == t or i >= inicio[v + 1]:
+                if v == t:
+                    caminos += 1
+                    valor_kpi = acumulado[-1]
+                    if kpi == "costo":
+                        valor_kpi += pesos.costo_carga(camino[0], carga)
                     #Analiza para cada modo si su valor segun el kpi es el mejor
                     if valor_kpi < mejor_valor_modo:
                         mejor_valor_modo = valor_kpi
-                        mejor_itinerario_por_modo = itinerario
-                        
-            if mejor_itinerario_por_modo:
-                itinerarios_optimos_por_modo[modo] = mejor_itinerario_por_modo
-                
-                #Analizo si es el mejor entre todos los modos posibles
-                if mejor_valor_modo < mejor_valor:
-                    mejor_valor = mejor_valor_modo
-                    mejor_itinerario = mejor_itinerario_por_modo
-                        
+                        mejor_camino = list(camino)
+                pila.pop()
+                en_camino[v] = 0
+                if camino:
+                    camino.pop()
+                    acumulado.pop()
+                continue
+            
+            pila[-1] = (v, i + 1)
+            w = destinos[i]
+            # Evitar ciclos y repetir el par (v, w) si hay conexiones paralelas
+            if en_camino[w] or any(destinos[j] == w for j in range(inicio[v], i)):
+                continue
+            # Primera conexión habilitada hacia w
+            for j in range(i, inicio[v + 1]):
+                e = aristas[j]
+                if destinos[j] == w and carga <= peso_max[e]:
+                    peso = pesos.tiempo(e, sorteos) if kpi == "tiempo" else pesos.costo(e, carga)
+                    en_camino[w] = 1
+                    camino.append(e)
+                    acumulado.append(acumulado[-1] + peso)
+                    pila.append((w, inicio[w]))
+                    break
+        
+        METRICAS.sumar('caminos_enumerados', caminos)
+        return self._ruta_candidata(mejor_camino, carga, sorteos)
+
+    def _mejor_ruta_dijkstra(self, nodo_origen, nodo_destino, modo, carga, kpi, heuristica=None):
+        """
+        Camino mínimo del modo con Dijkstra sobre una cola de prioridad.
+        Recorre la adyacencia CSR del modo en el grafo compacto con los pesos
+        precalculados de cada conexión y devuelve el camino como RutaCandidata.
+        Con una heurística h(nodo) admisible y consistente la búsqueda es A*:
+        la cola se ordena por valor + h(nodo) y se expande solo el corredor
+        hacia el destino, con el mismo resultado.
+        """
+        grafo = self.sistema_transporte.obtener_grafo()
+        if modo.lower() not in grafo.adyacencias:
+            return None
+        inicio, destinos, aristas = grafo.adyacencias[modo.lower()]
+        peso_max = grafo.peso_max
+        s = grafo.id_nodo(nodo_origen)
+        t = grafo.id_nodo(nodo_destino)
+        pesos = self._obtener_pesos()
+        sorteos = {}
+        
+        def peso(e):
+            if kpi == "tiempo":
+                return pesos.tiempo(e, sorteos)
+            valor = pesos.costo(e, carga)
+            # El costo por carga depende solo del vehículo del primer tramo:
+            # se suma en las conexiones que salen del origen (los caminos son simples)
+            if grafo.origen[e] == s:
+                valor += pesos.costo_carga(e, carga)
+            return valor
+        
+        distancias = grafo.valores_por_nodo(float('inf'))
+        anterior = grafo.valores_por_nodo(-1)   # conexión por la que se llega a cada nodo
+        visitados = grafo.marcas_por_nodo()
+        distancias[s] = 0.0
+        cola = [(heuristica(nodo_origen) if heuristica else 0.0, s)]
+        expandidos = 0
+        
+        while cola:
+            _, v = heapq.heappop(cola)
+            if visitados[v]:
+                continue
+            visitados[v] = 1
+            expandidos += 1
+            if v == t:
+                break
+            
+            valor_actual = distancias[v]
+            for i in range(inicio[v], inicio[v + 1]):
+                w = destinos[i]
+                e = aristas[i]
+                if visitados[w] or carga > peso_max[e]:
+                    continue
+                nuevo_valor = valor_actual + peso(e)
+                if nuevo_valor < distancias[w]:
+                    distancias[w] = nuevo_valor
+                    anterior[w] = e
+                    prioridad = nuevo_valor + heuristica(grafo.nodos[w]) if heuristica else nuevo_valor
+                    heapq.heappush(cola, (prioridad, w))
+        
+        METRICAS.sumar('nodos_expandidos', expandidos, busqueda='astar' if heuristica else 'dijkstra')
+        if not visitados[t]:
+            return None
+        
+        return self._ruta_candidata(self._camino_desde_arbol(anterior, s, t), carga, sorteos)
 
+    def _busqueda_multimodal(self, nodo_origen, nodo_destino, carga, kpi):
+        """
+        Dijkstra sobre el grafo producto de estados (nodo, modo actual, puro).
+        - 'puro' indica que todavía no hubo cambio de modo: los estados puros
+          que llegan al destino son los óptimos de cada modo por separado.
+        - Cambiar de modo en un nodo intermedio suma el transbordo del nodo
+          y pasa a un estado no puro.
+        Todo se resuelve con una única cola de prioridad.
+        No se permite volver al origen: como el costo por carga lo fija el
+        primer tramo, un rodeo que regresa al origen podría abaratarlo.
+        Tampoco se vuelve a un nodo que ya está en el camino del estado: con
+        un transbordo barato en un nodo, llegar a él con otro modo dando una
+        vuelta podría salir más barato que transbordar ahí, y el itinerario
+        tendría un ciclo.
+        """
+        grafo = self.sistema_transporte.obtener_grafo()
+        inicio_csr, destinos, aristas = grafo.adyacencias[None]
+        habilitados = self._modos_habilitados(grafo)
+        s = grafo.id_nodo(nodo_origen)
+        t = grafo.id_nodo(nodo_destino)
+        pesos = self._obtener_pesos()
+        sorteos = {}
+        inicio = (s, None, True)
+        distancias = {inicio: 0.0}
+        anterior = {}   # {estado: (estado_anterior, id de conexion)}
+        visitados = set()
+        nodos_visitados = set()   # nodos con algún estado definitivo (los únicos que puede haber en un camino)
+        contador = 0
+        cola = [(0.0, contador, inicio)]
+        
+        while cola:
+            valor_actual, _, estado = heapq.heappop(cola)
+            if estado in visitados:
+                continue
+            visitados.add(estado)
+            v, modo_actual, puro = estado
+            nodos_visitados.add(v)
+            if v == t:
+                continue
+            
+            tiempo_transbordo, costo_transbordo = self._obtener_transbordo(grafo.nodos[v])
+            for i in range(inicio_csr[v], inicio_csr[v + 1]):
+                w = destinos[i]
+                e = aristas[i]
+                if w == s or not habilitados[grafo.modo[e]] or carga > grafo.peso_max[e]:
+                    continue
+                
+                modo = grafo.modos[grafo.modo[e]]
+                nuevo_valor = valor_actual + (pesos.tiempo(e, sorteos) if kpi == "tiempo" else pesos.costo(e, carga))
+                if modo_actual is None:
+                    # Primer tramo: define el costo por carga del itinerario
+                    if kpi == "costo":
+                        nuevo_valor += pesos.costo_carga(e, carga)
+                    siguiente = (w, modo, True)
+                elif modo == modo_actual:
+                    siguiente = (w, modo, puro)
+                else:
+                    nuevo_valor += tiempo_transbordo if kpi == "tiempo" else costo_transbordo
+                    siguiente = (w, modo, False)
+                
+                if siguiente in visitados:
+                    continue
+                if nuevo_valor >= distancias.get(siguiente, float('inf')):
+                    continue
+                if w in nodos_visitados and self._estado_visita(estado, w, anterior):
+                    continue
+                distancias[siguiente] = nuevo_valor
+                anterior[siguiente] = (estado, e)
+                contador += 1
+                heapq.heappush(cola, (nuevo_valor, contador, siguiente))
+        
+        METRICAS.sumar('nodos_expandidos', len(visitados), busqueda='multimodal')
+        itinerarios_optimos_por_modo = {}
+        for modo in self.vehiculos_disponibles:
+            estado = (t, modo.lower(), True)
+            if estado in visitados:
+                conexiones = self._conexiones_hasta_estado(estado, anterior)
+                itinerarios_optimos_por_modo[modo] = self._itinerario_de_ids(conexiones, sorteos, carga, kpi)
+        
+        # Solo se arma el itinerario del mejor estado final (puro o combinado)
+        finales = [(distancias[estado], estado) for estado in visitados if estado[0] == t]
+        if not finales:
+            return None, itinerarios_optimos_por_modo
+        _, mejor_estado = min(finales, key=lambda final: (final[0], not final[1][2]))
+        if mejor_estado[2]:
+            mejor_itinerario = itinerarios_optimos_por_modo[mejor_estado[1]]
+        else:
+            conexiones = self._conexiones_hasta_estado(mejor_estado, anterior)
+            mejor_itinerario = self._itinerario_de_ids(conexiones, sorteos, carga, kpi)
+        
         return mejor_itinerario, itinerarios_optimos_por_modo
+
+    def _modos_habilitados(self, grafo):
+        """bytearray indexado por modo del grafo: 1 si el planificador tiene vehículo para él"""
+        modos = {modo.lower() for modo in self.vehiculos_disponibles}
+        return bytearray(modo in modos for modo in grafo.modos)
+
+    def _estado_visita(self, estado, nodo, anterior):
+        """Indica si el camino que llega al estado (ver _busqueda_multimodal) ya pasó por el nodo"""
+        while True:
+            if estado[0] == nodo:
+                return True
+            if estado not in anterior:
+                return False
+            estado = anterior[estado][0]
+
+    def _conexiones_hasta_estado(self, estado_final, anterior):
+        """Ids de la secuencia de conexiones que llega a un estado final"""
+        conexiones = []
+        estado = estado_final
+        while estado in anterior:
+            estado, e = anterior[estado]
+            conexiones.append(e)
+        conexiones.reverse()
+        return conexiones
+
+    def construir_itinerario(self, conexiones, carga, kpi="tiempo"):
+        """
+        Arma el itinerario de una secuencia de conexiones de la red,
+        con los transbordos que correspondan si cambia el modo.
+        """
+        return self._construir_itinerario_multimodal(conexiones, [None] * len(conexiones), carga, kpi)
+
+    def _construir_itinerario_multimodal(self, conexiones, tiempos, carga, kpi):
+        """
+        Arma el itinerario de una secuencia de conexiones, agregando los transbordos.
+        tiempos: horas de cada conexión si ya se sortearon en la búsqueda (None si no)
+        """
+        METRICAS.sumar('itinerarios_construidos')
+        itinerario = Itinerario(kpi_usado=kpi, carga_solicitud=carga)
+        for i, conexion in enumerate(conexiones):
+            if i > 0 and conexion.tipo.lower() != conexiones[i - 1].tipo.lower():
+                tiempo_transbordo, costo_transbordo = self._obtener_transbordo(conexion.origen)
+                itinerario.agregar_transbordo(conexion.origen, tiempo_transbordo, costo_transbordo)
+            itinerario.agregar_tramo(self._crear_tramo(conexion, carga, tiempos[i]))
+        return itinerario
     
+    @medir('resolucion')
+    def frente_pareto(self, solicitud, kpi="tiempo", multimodal=False):
+        """
+        Devuelve todos los itinerarios no dominados en (tiempo_total, costo_total),
+        ordenados de más rápido a más barato, calculados en una sola búsqueda.
+        Con multimodal=True se permiten transbordos entre modos.
+        """
+        nodo_origen, nodo_destino = self._obtener_nodos_solicitud(solicitud)
+        carga = solicitud.peso_kg
+        etiquetas, sorteos = self._buscar_frente_pareto(nodo_origen, nodo_destino, carga, multimodal)
+        return [self._construir_itinerario_etiqueta(etiqueta, sorteos, carga, kpi) for etiqueta in etiquetas]
+
+    def _buscar_frente_pareto(self, nodo_origen, nodo_destino, carga, multimodal, por_modo=False):
+        """
+        Búsqueda multicriterio con etiquetas (label-setting de Martins).
+        Cada etiqueta es (tiempo, costo, id_nodo, modo, etiqueta_padre, id_conexion),
+        con los ids del grafo compacto.
+        - La cola se ordena lexicográficamente por (tiempo, costo), así una
+          etiqueta extraída que no está dominada es definitiva.
+        - Se descartan las etiquetas dominadas por otra del mismo estado
+          (nodo, modo) o por una que ya llegó al destino.
+        Con por_modo=True (sin transbordos) solo domina una llegada del mismo
+        modo: se obtiene el frente de cada modo en la misma búsqueda.
+        Devuelve las etiquetas del destino ordenadas por tiempo.
+        """
+        grafo = self.sistema_transporte.obtener_grafo()
+        inicio_csr, destinos, aristas = grafo.adyacencias[None]
+        habilitados = self._modos_habilitados(grafo)
+        s = grafo.id_nodo(nodo_origen)
+        t = grafo.id_nodo(nodo_destino)
+        pesos = self._obtener_pesos()
+        sorteos = {}
+        definitivas = {}    # {(nodo, modo): [etiquetas no dominadas]}
+        destino = []
+        destino_por_modo = {}   # {modo: [etiquetas del destino]} si por_modo
+        
+        def llegadas(modo):
+            return destino_por_modo.get(modo, []) if por_modo else destino
+        contador = 0
+        inicio = (0.0, 0.0, s, None, None, None)
+        cola = [(0.0, 0.0, contador, inicio)]
+        
+        def dominada(tiempo, costo, etiquetas):
+            return any(t <= tiempo and c <= costo for t, c, *_ in etiquetas)
+        
+        while cola:
+            tiempo, costo, _, etiqueta = heapq.heappop(cola)
+            _, _, v, modo_actual, _, _ = etiqueta
+            if dominada(tiempo, costo, llegadas(modo_actual)):
+                continue
+            if v == t:
+                destino.append(etiqueta)
+                destino_por_modo.setdefault(modo_actual, []).append(etiqueta)
+                continue
+            estado = (v, modo_actual)
+            if dominada(tiempo, costo, definitivas.get(estado, [])):
+                continue
+            definitivas.setdefault(estado, []).append(etiqueta)
+            
+            tiempo_transbordo, costo_transbordo = self._obtener_transbordo(grafo.nodos[v])
+            for i in range(inicio_csr[v], inicio_csr[v + 1]):
+                w = destinos[i]
+                e = aristas[i]
+                if w == s or not habilitados[grafo.modo[e]] or carga > grafo.peso_max[e]:
+                    continue
+                modo = grafo.modos[grafo.modo[e]]
+                if modo_actual is not None and modo != modo_actual and not multimodal:
+                    continue
+                
+                nuevo_tiempo = tiempo + pesos.tiempo(e, sorteos)
+                nuevo_costo = costo + pesos.costo(e, carga)
+                if modo_actual is None:
+                    nuevo_costo += pesos.costo_carga(e, carga)
+                elif modo != modo_actual:
+                    nuevo_tiempo += tiempo_transbordo
+                    nuevo_costo += costo_transbordo
+                
+                if dominada(nuevo_tiempo, nuevo_costo, llegadas(modo)):
+                    continue
+                if dominada(nuevo_tiempo, nuevo_costo, definitivas.get((w, modo), [])):
+                    continue
+                # Con transbordos un mismo nodo puede aparecer en estados distintos:
+                # se descartan los caminos que vuelven a pasar por él
+                if multimodal and self._etiqueta_visita(etiqueta, w):
+                    continue
+                
+                contador += 1
+                nueva = (nuevo_tiempo, nuevo_costo, w, modo, etiqueta, e)
+                heapq.heappush(cola, (nuevo_tiempo, nuevo_costo, contador, nueva))
+        
+        if METRICAS.activas:
+            METRICAS.sumar('etiquetas_creadas', contador)
+            METRICAS.sumar('etiquetas_expandidas', sum(map(len, definitivas.values())))
+        return destino, sorteos
+
+    def _etiqueta_visita(self, etiqueta, nodo):
+        """Indica si el camino de la etiqueta ya pasó por el nodo"""
+        while etiqueta is not None:
+            if etiqueta[2] == nodo:
+                return True
+            etiqueta = etiqueta[4]
+        return False
+
+    def _conexiones_etiqueta(self, etiqueta):
+        """Ids de las conexiones del camino de una etiqueta"""
+        conexiones = []
+        while etiqueta[5] is not None:
+            conexiones.append(etiqueta[5])
+            etiqueta = etiqueta[4]
+        conexiones.reverse()
+        return conexiones
+
+    def _construir_itinerario_etiqueta(self, etiqueta, sorteos, carga, kpi):
+        """Materializa el itinerario de una etiqueta del frente de Pareto"""
+        return self._itinerario_de_ids(self._conexiones_etiqueta(etiqueta), sorteos, carga, kpi)
+
     def _verificar_restricciones(self, conexion, peso_carga):
         """
         Verifica si una carga puede usar una conexión específica.
@@ -172,39 +890,353 @@ class Planificador:
         Construye objeto Itinerario a partir de secuencia de conexiones.
         Pasa la carga real de la solicitud al itinerario.
         """
+        tramos = [self._crear_tramo(conexion, peso_carga) for conexion in conexiones]
+        return self._construir_itinerario_con_tramos(tramos, peso_carga, kpi)
+
+    def _crear_tramo(self, conexion, peso_carga, tiempo=None):
+        """
+        Crea el Tramo de una conexión con el vehículo que le corresponde
+        (el prototipo precalculado si existe). tiempo: horas ya sorteadas.
+        """
+        vehiculo = self._vehiculo_de(conexion)
+        
+        return Tramo(
+            vehiculo=vehiculo,
+            origen=conexion.origen,
+            destino=conexion.destino,
+            distancia=conexion.distancia,
+            carga=peso_carga,  # Cada tramo lleva la carga completa
+            conexion=conexion,
+            tiempo=tiempo
+        )
+
+    def _construir_itinerario_con_tramos(self, tramos, peso_carga, kpi):
+        """Arma el Itinerario a partir de tramos ya calculados"""
+        METRICAS.sumar('itinerarios_construidos')
         # CORREGIDO: Usar constructor que acepta carga_solicitud
         itinerario = Itinerario(kpi_usado=kpi, carga_solicitud=peso_carga)
         
-        for conexion in conexiones:
-            vehiculo = self._crear_vehiculo_para_conexion(conexion)
-            
-            tramo = Tramo(
-                vehiculo=vehiculo,
-                origen=conexion.origen,
-                destino=conexion.destino,
-                distancia=conexion.distancia,
-                carga=peso_carga  # Cada tramo lleva la carga completa
-            )
+        for tramo in tramos:
             itinerario.agregar_tramo(tramo)
                 
         return itinerario
     
-    def generar_itinerario(self, solicitud, kpi="tiempo"):
+    def generar_itinerario(self, solicitud, kpi="tiempo", motor="dijkstra"):
         """
         Método principal para generar itinerario óptimo.
         Punto de entrada usado por otros módulos.
         """
         try:
-            aux,_ = self.encontrar_ruta_optima(solicitud,kpi)
+            aux,_ = self.encontrar_ruta_optima(solicitud,kpi,motor)
             return aux
         except Exception as e:
             print(f"Error generando itinerario: {e}")
             return None
         
-    def optimos_por_modo(self, solicitud, kpi='tiempo'):
+    @medir('resolucion')
+    def resolver_lote(self, solicitudes, kpis=("tiempo", "costo")):
+        """
+        Resuelve muchas solicitudes compartiendo búsquedas.
+        Agrupa por origen y, para cada modo, KPI y clase de peso, calcula un
+        único árbol de caminos mínimos desde el origen; la ruta de cada
+        destino se lee del árbol. Los resultados coinciden con el motor
+        'dijkstra' y quedan en la cache de rutas.
+        Devuelve una lista en el orden de entrada con {kpi: (mejor_itinerario,
+        itinerarios_optimos_por_modo)} por solicitud, o None si hubo error.
+        """
+        resultados = [None] * len(solicitudes)
+        grupos = {}   # {nodo_origen: [(indice, nodo_destino, carga)]}
+        for i, solicitud in enumerate(solicitudes):
+            try:
+                nodo_origen, nodo_destino = self._obtener_nodos_solicitud(solicitud)
+                grupos.setdefault(nodo_origen, []).append((i, nodo_destino, solicitud.peso_kg))
+            except Exception as e:
+                print(f"Error en solicitud {solicitud}: {e}")
+        
+        umbrales = self._umbrales_peso()
+        grafo = self.sistema_transporte.obtener_grafo()
+        for nodo_origen, pendientes in grupos.items():
+            arboles = {}   # {(modo, kpi, clase): árbol} compartidos por todo el grupo
+            for i, nodo_destino, carga in pendientes:
+                resultado = {}
+                for kpi in kpis:
+                    rutas_por_modo = {}
+                    sorteos = {}
+                    for modo in self.vehiculos_disponibles:
+                        clave_arbol = (modo, kpi, self._clase_de_peso(carga, umbrales[modo]))
+                        if clave_arbol not in arboles:
+                            METRICAS.sumar('busquedas', motor='lote')
+                            arboles[clave_arbol] = self._arbol_caminos_minimos(nodo_origen, modo, kpi, carga)
+                        conexiones = self._camino_desde_arbol(arboles[clave_arbol], grafo.id_nodo(nodo_origen), grafo.id_nodo(nodo_destino))
+                        if conexiones:
+                            rutas_por_modo[modo] = self._ruta_candidata(conexiones, carga, sorteos)
+                    
+                    resultado[kpi] = self._elegir_y_materializar(rutas_por_modo, carga, kpi)
+                    clave = self._clave_cache(nodo_origen, nodo_destino, carga, kpi, "dijkstra")
+                    self.guardar_rutas(clave, self._rutas_de_resultado(resultado[kpi], "dijkstra"))
+                resultados[i] = resultado
+        
+        return resultados
+
+    def _arbol_caminos_minimos(self, nodo_origen, modo, kpi, carga):
+        """
+        Dijkstra completo desde el origen dentro de un modo, sobre el grafo compacto.
+        Usa los pesos base (un vehículo, velocidad nominal): dentro del modo
+        la cantidad de vehículos y el costo por carga son los mismos para
+        todas las rutas, así que el árbol sirve para toda la clase de peso.
+        Devuelve [id de la conexión por la que se llega a cada nodo] (-1 si no se llega).
+        """
+        grafo = self.sistema_transporte.obtener_grafo()
+        anterior = grafo.valores_por_nodo(-1)
+        if modo.lower() not in grafo.adyacencias:
+            return anterior
+        inicio, destinos, aristas = grafo.adyacencias[modo.lower()]
+        peso_max = grafo.peso_max
+        pesos_base = self._obtener_pesos().tiempo_nominal if kpi == "tiempo" else self._obtener_pesos().costo_vehiculo
+        s = grafo.id_nodo(nodo_origen)
+        distancias = grafo.valores_por_nodo(float('inf'))
+        visitados = grafo.marcas_por_nodo()
+        distancias[s] = 0.0
+        cola = [(0.0, s)]
+        expandidos = 0
+        
+        while cola:
+            valor_actual, v = heapq.heappop(cola)
+            if visitados[v]:
+                continue
+            visitados[v] = 1
+            expandidos += 1
+            
+            for i in range(inicio[v], inicio[v + 1]):
+                w = destinos[i]
+                e = aristas[i]
+                if visitados[w] or carga > peso_max[e]:
+                    continue
+                nuevo_valor = valor_actual + pesos_base[e]
+                if nuevo_valor < distancias[w]:
+                    distancias[w] = nuevo_valor
+                    anterior[w] = e
+                    heapq.heappush(cola, (nuevo_valor, w))
+        
+        METRICAS.sumar('nodos_expandidos', expandidos, busqueda='arbol')
+        return anterior
+
+    def _camino_desde_arbol(self, anterior, s, t):
+        """Ids de las conexiones del nodo s al t según el árbol (vacía si no llega)"""
+        grafo = self.sistema_transporte.obtener_grafo()
+        if s == t or anterior[t] < 0:
+            return []
+        conexiones = []
+        v = t
+        while v != s:
+            e = anterior[v]
+            conexiones.append(e)
+            v = grafo.origen[e]
+        conexiones.reverse()
+        return conexiones
+
+    @medir('resolucion')
+    def evaluar_solicitud(self, solicitud):
+        """
+        Evalúa la solicitud con una sola búsqueda multicriterio (frente de
+        Pareto de cada modo). Devuelve un diccionario con:
+        - 'tiempo': (mejor_itinerario, itinerarios_optimos_por_modo) por tiempo
+        - 'costo': (mejor_itinerario, itinerarios_optimos_por_modo) por costo
+        - 'frente': itinerarios no dominados ordenados por tiempo
+        El resultado se guarda por solicitud y versión de la red: los
+        pedidos siguientes (óptimos por modo, gráficos) no vuelven a buscar.
+        """
+        evaluacion = self.evaluacion_guardada(solicitud)
+        if evaluacion is None:
+            nodo_origen, nodo_destino = self._obtener_nodos_solicitud(solicitud)
+            METRICAS.sumar('busquedas', motor='pareto')
+            etiquetas, sorteos = self._buscar_frente_pareto(nodo_origen, nodo_destino, solicitud.peso_kg, False, por_modo=True)
+            evaluacion = self._armar_evaluacion(etiquetas, sorteos, solicitud.peso_kg)
+            self.guardar_evaluacion(solicitud, evaluacion)
+        return evaluacion
+
+    def evaluacion_guardada(self, solicitud):
+        """
+        Evaluación ya calculada de la solicitud: la guardada en memoria o, si
+        hay cache en disco, la de otra ejecución con la misma red (se arma
+        con la carga de la solicitud). None si no hay.
+        """
+        nodo_origen, nodo_destino = self._obtener_nodos_solicitud(solicitud)
+        clave = self._clave_evaluacion(solicitud, nodo_origen, nodo_destino)
+        evaluacion = self.evaluaciones.obtener(clave)
+        if evaluacion is None:
+            # En disco la clave es la carga exacta: la elección entre modos y el frente conjunto dependen de ella
+            indices = self._leer_disco(('evaluacion', nodo_origen.nombre, nodo_destino.nombre, solicitud.peso_kg))
+            if indices is not None:
+                evaluacion = self.evaluacion_de_indices(indices, solicitud.peso_kg)
+                self.evaluaciones.guardar(clave, evaluacion)
+        return evaluacion
+
+    def guardar_evaluacion(self, solicitud, evaluacion, en_disco=True):
+        """
+        Registra una evaluación calculada aquí o afuera (por ejemplo en otro
+        proceso); en_disco=False si quien la calculó ya la guardó en la cache en disco
+        """
+        nodo_origen, nodo_destino = self._obtener_nodos_solicitud(solicitud)
+        self.evaluaciones.guardar(self._clave_evaluacion(solicitud, nodo_origen, nodo_destino), evaluacion)
+        if en_disco and self.cache_disco is not None:
+            self._escribir_disco(('evaluacion', nodo_origen.nombre, nodo_destino.nombre, solicitud.peso_kg),
+                                 self.evaluacion_a_indices(evaluacion))
+
+    def evaluacion_a_indices(self, evaluacion):
+        """
+        Evaluación como ids de conexiones, compacta para enviarla entre
+        procesos o guardarla en disco: por KPI (modo del mejor, {modo: ids}),
+        los ids de cada itinerario del frente y las horas sorteadas de las
+        conexiones con mal tiempo que usan ([(id, horas)], el clima con el
+        que la búsqueda eligió esas rutas).
+        """
+        grafo = self.sistema_transporte.obtener_grafo()
+        sorteos = {}
+
+        def ids(itinerario):
+            conexiones = grafo.ids_de_conexiones(tramo.conexion for tramo in itinerario.tramos)
+            for e, tramo in zip(conexiones, itinerario.tramos):
+                if grafo.prob_mal_tiempo[e] > 0:
+                    sorteos[e] = tramo.tiempo
+            return conexiones
+
+        indices = {}
+        for kpi in ("tiempo", "costo"):
+            mejor_itinerario, itinerarios_optimos_por_modo = evaluacion[kpi]
+            modo_mejor = None
+            for modo, itinerario in itinerarios_optimos_por_modo.items():
+                if itinerario is mejor_itinerario:
+                    modo_mejor = modo
+            indices[kpi] = (modo_mejor, {modo: ids(itinerario) for modo, itinerario in itinerarios_optimos_por_modo.items()})
+        indices['frente'] = [ids(itinerario) for itinerario in evaluacion['frente']]
+        indices['sorteos'] = sorted(sorteos.items())
+        return indices
+
+    def evaluacion_de_indices(self, indices, carga):
+        """
+        Vuelve a armar con la carga dada una evaluación de evaluacion_a_indices,
+        con las mismas horas sorteadas: no se vuelve a sortear el clima, así
+        los tiempos son los que compararon la búsqueda y la elección del mejor.
+        """
+        sorteos = dict(indices['sorteos'])
+
+        def armar(ids, kpi):
+            return self._itinerario_de_ids(ids, sorteos, carga, kpi)
+
+        evaluacion = {}
+        for kpi in ("tiempo", "costo"):
+            modo_mejor, ids_por_modo = indices[kpi]
+            itinerarios_optimos_por_modo = {modo: armar(ids, kpi) for modo, ids in ids_por_modo.items()}
+            evaluacion[kpi] = (itinerarios_optimos_por_modo.get(modo_mejor), itinerarios_optimos_por_modo)
+        evaluacion['frente'] = [armar(ids, "tiempo") for ids in indices['frente']]
+        return evaluacion
+
+    def _clave_evaluacion(self, solicitud, nodo_origen, nodo_destino):
+        """Clave de la evaluación: la solicitud y la versión de la red"""
+        return (solicitud.id_carga, nodo_origen.nombre, nodo_destino.nombre,
+                solicitud.peso_kg, self.sistema_transporte.version)
+
+    def _armar_evaluacion(self, etiquetas, sorteos, carga):
+        """Arma los óptimos por KPI y por modo a partir de los frentes de cada modo"""
+        # Cada frente está ordenado por tiempo: el primero es el más rápido
+        # del modo y el último el más barato
+        mas_rapidas = {}
+        mas_baratas = {}
+        for etiqueta in etiquetas:
+            mas_rapidas.setdefault(etiqueta[3], etiqueta)
+            mas_baratas[etiqueta[3]] = etiqueta
+        
+        evaluacion = {}
+        for kpi, extremos in (("tiempo", mas_rapidas), ("costo", mas_baratas)):
+            rutas_por_modo = {}
+            for modo in self.vehiculos_disponibles:
+                etiqueta = extremos.get(modo.lower())
+                if etiqueta is not None:
+                    rutas_por_modo[modo] = self._ruta_candidata(self._conexiones_etiqueta(etiqueta), carga, sorteos)
+            evaluacion[kpi] = self._elegir_y_materializar(rutas_por_modo, carga, kpi)
+        
+        # Frente conjunto: las etiquetas de todos los modos que no domina otra anterior
+        no_dominadas = []
+        for etiqueta in etiquetas:
+            if not any(t <= etiqueta[0] and c <= etiqueta[1] for t, c, *_ in no_dominadas):
+                no_dominadas.append(etiqueta)
+        evaluacion['frente'] = [self._construir_itinerario_etiqueta(etiqueta, sorteos, carga, "tiempo")
+                                for etiqueta in no_dominadas]
+        return evaluacion
+
+    def optimos_pareto(self, solicitud, multimodal=False):
+        """
+        Calcula el frente de Pareto una sola vez y elige de él el itinerario
+        óptimo por tiempo y el óptimo por costo.
+        Sin transbordos usa la evaluación guardada de la solicitud.
+        Devuelve (itinerario_tiempo, itinerario_costo, frente).
+        """
+        try:
+            if not multimodal:
+                evaluacion = self.evaluar_solicitud(solicitud)
+                return evaluacion['tiempo'][0], evaluacion['costo'][0], evaluacion['frente']
+            
+            nodo_origen, nodo_destino = self._obtener_nodos_solicitud(solicitud)
+            carga = solicitud.peso_kg
+            etiquetas, sorteos = self._buscar_frente_pareto(nodo_origen, nodo_destino, carga, multimodal)
+            if not etiquetas:
+                return None, None, []
+            
+            # El frente está ordenado por tiempo: los extremos son los óptimos
+            itinerario_tiempo = self._construir_itinerario_etiqueta(etiquetas[0], sorteos, carga, "tiempo")
+            itinerario_costo = self._construir_itinerario_etiqueta(etiquetas[-1], sorteos, carga, "costo")
+            frente = [self._construir_itinerario_etiqueta(etiqueta, sorteos, carga, "tiempo") for etiqueta in etiquetas]
+            return itinerario_tiempo, itinerario_costo, frente
+        except Exception as e:
+            print(f"Error generando frente de Pareto: {e}")
+            return None, None, []
+
+    def optimos_por_modo(self, solicitud, kpi='tiempo', motor=None):
+        """
+        Óptimos de cada modo según el KPI. Sin motor se toman de la
+        evaluación guardada de la solicitud (ver evaluar_solicitud).
+        """
         try: 
-            _,dicc = self.encontrar_ruta_optima(solicitud,kpi)
+            if motor is None:
+                return self.evaluar_solicitud(solicitud)[kpi][1]
+            _,dicc = self.encontrar_ruta_optima(solicitud,kpi,motor)
             return dicc
         except Exception as e:
             print(f"Error generando itinerario: {e}")
-            return None
\ No newline at end of file
+            return None
+
+
+# Código de prueba
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import os
+    import tempfile
+    from sistema_transporte import SistemaTransporte
+
+    # Con un transbordo caro en B, volver a B en tren por C abarataría el
+    # camino pero pasaría dos veces por B: el multimodal debe descartarlo
+    with tempfile.TemporaryDirectory() as directorio:
+        archivos = {
+            'nodos.csv': "nombre\nA\nB\nC\nD\n",
+            'conexiones.csv': "origen,destino,tipo,distancia_km,restriccion,valor_restriccion\n"
+                              "A,B,Automotor,100,,\nB,C,Automotor,10,,\nC,B,Ferroviaria,10,,\nB,D,Ferroviaria,300,,\n",
+            'solicitudes.csv': "id_carga,peso_kg,origen,destino\nCICLO,1000,A,D\n",
+        }
+        for nombre, contenido in archivos.items():
+            with open(os.path.join(directorio, nombre), 'w', encoding='utf-8') as archivo:
+                archivo.write(contenido)
+        sistema = SistemaTransporte()
+        with contextlib.redirect_stdout(io.StringIO()):
+            sistema.cargar_nodos(os.path.join(directorio, 'nodos.csv'))
+            sistema.cargar_conexiones(os.path.join(directorio, 'conexiones.csv'))
+            sistema.cargar_solicitudes(os.path.join(directorio, 'solicitudes.csv'))
+
+    planificador = Planificador(sistema)
+    planificador.configurar_transbordo("B", 50, 100000)
+    for kpi in ("tiempo", "costo"):
+        mejor, _ = planificador.encontrar_ruta_optima(sistema.solicitudes[0], kpi, "multimodal")
+        assert mejor.obtener_ruta_completa() == ['A', 'B', 'D'], mejor.obtener_ruta_completa()
+        print(f"Multimodal por {kpi}: {' -> '.join(mejor.obtener_ruta_completa())} "
+              f"({mejor.obtener_tiempo_total_formateado()}, ${mejor.costo_total:.2f})")
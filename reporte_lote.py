@@ -0,0 +1,208 @@
+from funciones_auxiliares import tiempo_a_string
+from itertools import islice
+import csv
+import json
+
+CAMPOS = ('id_carga', 'peso_kg', 'origen', 'destino', 'kpi', 'ruta', 'modos', 'distancia', 'tiempo', 'costo',
+          'recomendada', 'error')
+KPIS = ("tiempo", "costo")
+SEPARADOR = '|'            # separa nodos de la ruta y modos en el CSV
+TAMANO_BUFFER = 1 << 20    # bytes que se acumulan antes de escribir al archivo
+
+
+def recomendar(tiempo_it, costo_it):
+    """
+    KPI recomendado entre el óptimo por tiempo y el óptimo por costo (el
+    mismo criterio que el informe por consola): 'costo' si la diferencia de
+    costo supera el 20%, 'tiempo' si la de tiempo supera las 2 horas, None
+    si son similares. Acepta itinerarios o filas (con 'tiempo' y 'costo').
+    """
+    tiempo_t, costo_t = _totales(tiempo_it)
+    tiempo_c, costo_c = _totales(costo_it)
+    if abs(costo_t - costo_c) > costo_t * 0.2:
+        return 'costo'
+    if abs(tiempo_t - tiempo_c) > 2:
+        return 'tiempo'
+    return None
+
+
+def _totales(opcion):
+    if isinstance(opcion, dict):
+        return opcion['tiempo'], opcion['costo']
+    return opcion.tiempo_total, opcion.costo_total
+
+
+def filas_de_evaluacion(solicitud, evaluacion, error=None):
+    """
+    Una fila por KPI del mejor itinerario de la evaluación (ver
+    Planificador.evaluar_solicitud): ruta, modos, distancia, tiempo, costo y
+    si es la opción recomendada. Sin ruta los campos del itinerario quedan
+    vacíos; si la evaluación falló (evaluacion None) error dice por qué.
+    """
+    mejores = {kpi: evaluacion[kpi][0] if evaluacion else None for kpi in KPIS}
+    recomendada = None
+    if mejores['tiempo'] and mejores['costo']:
+        recomendada = recomendar(mejores['tiempo'], mejores['costo'])
+    filas = []
+    for kpi in KPIS:
+        fila = {'id_carga': solicitud.id_carga, 'peso_kg': solicitud.peso_kg, 'origen': solicitud.origen.nombre,
+                'destino': solicitud.destino.nombre, 'kpi': kpi, 'ruta': [], 'modos': [], 'distancia': None,
+                'tiempo': None, 'costo': None, 'recomendada': kpi == recomendada, 'error': error or ''}
+        itinerario = mejores[kpi]
+        if itinerario:
+            fila['ruta'] = itinerario.obtener_ruta_completa()
+            fila['modos'] = list(dict.fromkeys(itinerario.obtener_vehiculos_utilizados()))
+            fila['distancia'] = itinerario.obtener_distancia_total()
+            fila['tiempo'] = itinerario.tiempo_total
+            fila['costo'] = itinerario.costo_total
+        filas.append(fila)
+    return filas
+
+
+class EscritorFilas:
+    """
+    Escribe las filas del modo silencioso en CSV o JSONL (según la extensión
+    del archivo o formato), con un buffer grande: nada se imprime por
+    solicitud y el archivo se escribe en bloques.
+    En el CSV la ruta y los modos van separados por '|'; en JSONL como listas.
+    Se usa con with (o cerrar()).
+    """
+
+    def __init__(self, archivo, formato=None):
+        self.archivo = archivo
+        self.formato = formato or ('jsonl' if archivo.endswith(('.jsonl', '.json')) else 'csv')
+        if self.formato not in ('csv', 'jsonl'):
+            raise ValueError(f"Formato inválido: {self.formato}. Usar: csv, jsonl")
+        self.salida = open(archivo, 'w', encoding='utf-8', newline='', buffering=TAMANO_BUFFER)
+        self.filas = 0
+        self.sin_ruta = 0
+        self.con_errores = 0
+        if self.formato == 'csv':
+            self._csv = csv.writer(self.salida)
+            self._csv.writerow(CAMPOS)
+
+    def escribir(self, solicitud, evaluacion, error=None):
+        """Escribe las filas de una solicitud evaluada (evaluacion None si falló)"""
+        self.escribir_filas(filas_de_evaluacion(solicitud, evaluacion, error))
+
+    def escribir_filas(self, filas):
+        """Escribe las filas de una solicitud ya armadas con filas_de_evaluacion"""
+        error = filas[0]['error']
+        if error:
+            self.con_errores += 1
+        elif filas[0]['tiempo'] is None:
+            self.sin_ruta += 1
+        for fila in filas:
+            if self.formato == 'csv':
+                fila['ruta'] = SEPARADOR.join(fila['ruta'])
+                fila['modos'] = SEPARADOR.join(fila['modos'])
+                fila['recomendada'] = int(fila['recomendada'])
+                self._csv.writerow(['' if fila[campo] is None else fila[campo] for campo in CAMPOS])
+            else:
+                self.salida.write(json.dumps(fila, ensure_ascii=False, separators=(',', ':')))
+                self.salida.write('\n')
+        self.filas += len(filas)
+
+    def cerrar(self):
+        self.salida.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        self.cerrar()
+        return False
+
+    def __repr__(self):
+        return f"EscritorFilas({self.archivo!r}, formato={self.formato!r}, filas={self.filas})"
+
+
+def leer_filas(archivo):
+    """Genera las filas de un archivo del modo silencioso (CSV o JSONL) como diccionarios"""
+    with open(archivo, encoding='utf-8', newline='') as entrada:
+        if archivo.endswith(('.jsonl', '.json')):
+            for linea in entrada:
+                if linea.strip():
+                    yield json.loads(linea)
+            return
+        for fila in csv.DictReader(entrada):
+            fila['peso_kg'] = float(fila['peso_kg'])
+            fila['ruta'] = fila['ruta'].split(SEPARADOR) if fila['ruta'] else []
+            fila['modos'] = fila['modos'].split(SEPARADOR) if fila['modos'] else []
+            for campo in ('distancia', 'tiempo', 'costo'):
+                fila[campo] = float(fila[campo]) if fila[campo] else None
+            fila['recomendada'] = fila['recomendada'] == '1'
+            yield fila
+
+
+def generar_reporte(archivo_filas, salida):
+    """
+    Arma el informe legible a partir de las filas del modo silencioso y lo
+    escribe en salida (un archivo de texto abierto): por solicitud, el
+    resultado de cada KPI, la comparación y la recomendación. Lee las filas
+    de a una solicitud por vez. Devuelve cuántas solicitudes incluyó.
+    Cada solicitud son len(KPIS) filas seguidas (ver filas_de_evaluacion):
+    se agrupan por posición y no por id_carga, que puede repetirse.
+    """
+    solicitudes = 0
+    filas = leer_filas(archivo_filas)
+    for grupo in iter(lambda: list(islice(filas, len(KPIS))), []):
+        por_kpi = {fila['kpi']: fila for fila in grupo}
+        primera = grupo[0]
+        solicitudes += 1
+        lineas = [f"{'=' * 15} SOLICITUD {solicitudes}: {primera['id_carga']} {'=' * 15}",
+                  f"Carga: {primera['peso_kg']:,} kg",
+                  f"Ruta: {primera['origen']} -> {primera['destino']}"]
+        if primera['error']:
+            lineas.append(f"Error: {primera['error']}")
+        elif primera['tiempo'] is None:
+            lineas.append("No se encontró ruta válida")
+        else:
+            lineas.extend(_lineas_comparacion(por_kpi['tiempo'], por_kpi['costo']))
+        salida.write('\n'.join(lineas))
+        salida.write('\n\n')
+    return solicitudes
+
+
+def _lineas_comparacion(tiempo_fila, costo_fila):
+    """Tabla de las opciones por tiempo y por costo y la recomendación"""
+    lineas = [f"{'CRITERIO':<15} {'TIEMPO':<25} {'COSTO':<25}", "-" * 65]
+    for nombre, valor in (('Ruta:', lambda fila: " -> ".join(fila['ruta'])),
+                          ('Vehiculo:', lambda fila: ", ".join(fila['modos'])),
+                          ('Tiempo:', lambda fila: tiempo_a_string(fila['tiempo'])),
+                          ('Costo:', lambda fila: f"${fila['costo']:.2f}"),
+                          ('Distancia:', lambda fila: f"{fila['distancia']:.1f} km")):
+        lineas.append(f"{nombre:<15} {valor(tiempo_fila):<25} {valor(costo_fila):<25}")
+
+    recomendada = 'tiempo' if tiempo_fila['recomendada'] else 'costo' if costo_fila['recomendada'] else None
+    if recomendada == 'costo':
+        diferencia = abs(tiempo_fila['costo'] - costo_fila['costo'])
+        porcentaje = diferencia / max(tiempo_fila['costo'], costo_fila['costo']) * 100
+        lineas.append(f"Recomendación: COSTO (ahorro de ${diferencia:.2f}, {porcentaje:.1f}%)")
+    elif recomendada == 'tiempo':
+        lineas.append(f"Recomendación: TIEMPO ({abs(tiempo_fila['tiempo'] - costo_fila['tiempo']):.1f} horas menos)")
+    else:
+        lineas.append("Recomendación: ambas opciones son similares")
+    return lineas
+
+
+# Código de prueba
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import sys
+    from sistema_transporte import SistemaTransporte
+    from planificador import Planificador
+
+    sistema = SistemaTransporte()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sistema.cargar_nodos('nodos.csv')
+        sistema.cargar_conexiones('conexiones.csv')
+        sistema.cargar_solicitudes('solicitudes.csv')
+    planificador = Planificador(sistema)
+
+    with EscritorFilas('output/filas_prueba.csv') as escritor:
+        for solicitud in sistema.solicitudes:
+            escritor.escribir(solicitud, planificador.evaluar_solicitud(solicitud))
+    print(escritor)
+    generar_reporte('output/filas_prueba.csv', sys.stdout)
@@ -0,0 +1,25 @@
+class RutaCandidata:
+    """
+    Ruta liviana que usan las búsquedas para comparar alternativas.
+    Guarda ids del GrafoCompacto (nodos y conexiones) y los totales de tiempo
+    y costo, sin crear Tramo ni Itinerario: solo las rutas que se devuelven
+    se materializan (ver Planificador.materializar_ruta).
+    """
+    __slots__ = ('nodos', 'conexiones', 'tiempo', 'costo', 'sorteos')
+
+    def __init__(self, nodos, conexiones, tiempo, costo, sorteos=None):
+        self.nodos = nodos              # ids de los nodos en orden de visita
+        self.conexiones = conexiones    # ids de las conexiones
+        self.tiempo = tiempo            # horas, con transbordos
+        self.costo = costo              # $, con costo por carga y transbordos
+        self.sorteos = sorteos if sorteos is not None else {}   # clima sorteado en la búsqueda
+
+    def valor(self, kpi):
+        """Valor de la ruta según el KPI"""
+        return self.tiempo if kpi == "tiempo" else self.costo
+
+    def __len__(self):
+        return len(self.conexiones)
+
+    def __repr__(self):
+        return f"RutaCandidata(conexiones={len(self.conexiones)}, tiempo={self.tiempo:.1f}h, costo=${self.costo:.2f})"
@@ -0,0 +1,354 @@
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from flujo_jsonl import solicitud_de_dict, itinerario_a_dict, KPIS
+from metricas import METRICAS
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import time
+
+MAX_CUERPO = 64 * 1024
+RAZONES = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable',
+           504: 'Gateway Timeout'}
+
+# Planificador de cada proceso trabajador (heredado con fork o cargado al iniciar)
+_planificador_trabajador = None
+
+
+def _inicializar_trabajador(archivo_nodos, archivo_conexiones, opciones_planificador):
+    """Sin fork cada trabajador carga la red desde los CSV o la base SQLite (ver lote_paralelo)"""
+    global _planificador_trabajador
+    import lote_paralelo
+    lote_paralelo._inicializar_trabajador(archivo_nodos, archivo_conexiones, opciones_planificador)
+    _planificador_trabajador = lote_paralelo._planificador_trabajador
+    if _planificador_trabajador is not None:
+        _planificador_trabajador.calentar()
+
+
+def _reiniciar_metricas():
+    """Con fork el trabajador hereda las métricas del servidor: empieza de cero"""
+    METRICAS.reiniciar()
+
+
+def _trabajador_listo(_):
+    """Arranca los procesos antes del primer pedido (y verifica que cargaron la red del servidor)"""
+    import lote_paralelo
+    lote_paralelo.verificar_trabajador()
+    return os.getpid()
+
+
+def _resolver_consulta(tarea):
+    """Resuelve la consulta en el trabajador y devuelve solo ids de conexiones (y sus métricas)"""
+    from solicitud_transporte import SolicitudTransporte
+    id_carga, peso_kg, origen, destino, kpi, motor = tarea
+    nodos = _planificador_trabajador.sistema_transporte.nodos
+    solicitud = SolicitudTransporte(id_carga, peso_kg, nodos[origen], nodos[destino])
+    with contextlib.redirect_stdout(io.StringIO()):
+        rutas = _planificador_trabajador.rutas_de_consulta(solicitud, kpi, motor)
+    return rutas, METRICAS.extraer()
+
+
+class ServidorPlanificacion:
+    """
+    Servidor HTTP local (asyncio, TCP o socket Unix) que mantiene cargados
+    la red y el Planificador entre pedidos.
+    - POST /ruta con {"origen", "destino", "peso_kg", "kpi", "motor", "id_carga"}
+      (kpi, motor e id_carga son opcionales) devuelve el mejor itinerario y
+      los óptimos por modo. GET /estado devuelve contadores y latencias;
+      GET /metricas, las métricas del planificador (ver metricas) en el
+      formato de texto de Prometheus.
+    - Las búsquedas corren en un pool de procesos. Con fork los trabajadores
+      heredan la red ya compilada; si no, la cargan al arrancar de la base
+      SQLite (archivo_base_datos) o de los CSV.
+      Vuelven solo ids de conexiones y el itinerario se arma acá con la carga
+      de cada pedido.
+    - Los pedidos con la misma clave de cache (origen, destino, clase de
+      peso, KPI y motor, ver Planificador.clave_consulta) que llegan mientras
+      otro igual se resuelve esperan esa misma búsqueda. Las rutas quedan en
+      la cache del planificador: los siguientes no pasan por el pool.
+    - Cada pedido espera a lo sumo timeout segundos (504); la búsqueda sigue
+      y su resultado queda en la cache. Con max_en_curso pedidos atendiéndose
+      los nuevos se rechazan con 503 en vez de encolarse sin límite.
+    """
+
+    def __init__(self, planificador, procesos=None, max_en_curso=256, timeout=5.0, timeout_lectura=10.0,
+                 archivo_nodos=None, archivo_conexiones=None, archivo_base_datos=None):
+        self.planificador = planificador
+        self.procesos = procesos or os.cpu_count() or 1
+        self.max_en_curso = max_en_curso
+        self.timeout = timeout
+        self.timeout_lectura = timeout_lectura
+        self.archivos_red = (archivo_nodos, archivo_conexiones)
+        self.archivo_base_datos = archivo_base_datos
+        self.pool = None
+        self.en_curso = {}     # {clave: Future} búsquedas enviadas al pool
+        self.activos = 0       # pedidos atendiéndose
+        self.latencias = deque(maxlen=10000)   # segundos de los últimos pedidos resueltos
+        self.contadores = {'pedidos': 0, 'desde_cache': 0, 'combinados': 0, 'resueltos_en_pool': 0,
+                           'rechazados': 0, 'vencidos': 0, 'errores': 0}
+
+    # --- Pool de trabajadores ---
+
+    def iniciar_pool(self):
+        """Compila la red y arranca los procesos trabajadores (antes del bucle de eventos)"""
+        global _planificador_trabajador
+        self.planificador.calentar()
+        if 'fork' in multiprocessing.get_all_start_methods():
+            _planificador_trabajador = self.planificador
+            self.pool = ProcessPoolExecutor(self.procesos, mp_context=multiprocessing.get_context('fork'),
+                                            initializer=_reiniciar_metricas)
+        else:
+            if not self.archivo_base_datos and None in self.archivos_red:
+                raise ValueError("Sin fork los trabajadores cargan la red de la base SQLite o de los CSV: "
+                                 "indicar archivo_base_datos o archivo_nodos y archivo_conexiones")
+            from lote_paralelo import opciones_trabajador
+            opciones = opciones_trabajador(self.planificador, self.archivo_base_datos)
+            self.pool = ProcessPoolExecutor(self.procesos, initializer=_inicializar_trabajador,
+                                            initargs=(*self.archivos_red, opciones))
+        list(self.pool.map(_trabajador_listo, range(self.procesos)))
+
+    def cerrar_pool(self):
+        """Termina los procesos trabajadores"""
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def _terminar_busqueda(self, clave, futuro):
+        """Al terminar una búsqueda del pool: deja de estar en curso y sus rutas van a la cache"""
+        self.en_curso.pop(clave, None)
+        if not futuro.cancelled() and futuro.exception() is None:
+            rutas, metricas = futuro.result()
+            METRICAS.combinar(metricas)
+            self.planificador.guardar_rutas(clave, rutas)
+            self.contadores['resueltos_en_pool'] += 1
+
+    # --- Pedidos ---
+
+    async def resolver(self, datos):
+        """Resuelve un pedido de ruta ya decodificado. Devuelve (estado HTTP, respuesta)"""
+        if self.activos >= self.max_en_curso:
+            self.contadores['rechazados'] += 1
+            return 503, {'error': "servidor saturado, reintentar más tarde"}
+
+        self.activos += 1
+        self.contadores['pedidos'] += 1
+        inicio = time.perf_counter()
+        try:
+            if isinstance(datos, dict):
+                datos.setdefault('id_carga', 'consulta')
+            solicitud = solicitud_de_dict(datos, self.planificador.sistema_transporte.nodos)
+            kpi = datos.get('kpi', 'costo')
+            motor = datos.get('motor', 'dijkstra')
+            if kpi not in KPIS:
+                raise ValueError(f"KPI inválido: {kpi}. Usar: {', '.join(KPIS)}")
+            if motor not in self.planificador.motores_disponibles:
+                raise ValueError(f"Motor inválido: {motor}. Usar: {', '.join(self.planificador.motores_disponibles)}")
+            clave = self.planificador.clave_consulta(solicitud, kpi, motor)
+        except (ValueError, TypeError) as e:
+            self.activos -= 1
+            self.contadores['errores'] += 1
+            return 400, {'error': str(e)}
+
+        try:
+            rutas = self.planificador.rutas_guardadas(clave)
+            if rutas is not None:
+                self.contadores['desde_cache'] += 1
+            else:
+                futuro = self.en_curso.get(clave)
+                if futuro is None:
+                    tarea = (solicitud.id_carga, solicitud.peso_kg, solicitud.origen.nombre,
+                             solicitud.destino.nombre, kpi, motor)
+                    futuro = asyncio.wrap_future(self.pool.submit(_resolver_consulta, tarea))
+                    futuro.add_done_callback(lambda terminado: self._terminar_busqueda(clave, terminado))
+                    self.en_curso[clave] = futuro
+                else:
+                    self.contadores['combinados'] += 1
+                # shield: si este pedido vence, la búsqueda sigue para los demás
+                rutas, _ = await asyncio.wait_for(asyncio.shield(futuro), self.timeout)
+
+            mejor, optimos_por_modo = self.planificador.itinerarios_de_rutas(rutas, solicitud.peso_kg, kpi)
+        except asyncio.TimeoutError:
+            self.contadores['vencidos'] += 1
+            return 504, {'error': f"sin respuesta en {self.timeout}s"}
+        except Exception as e:
+            self.contadores['errores'] += 1
+            return 500, {'error': str(e)}
+        finally:
+            self.activos -= 1
+
+        self.latencias.append(time.perf_counter() - inicio)
+        return 200, {
+            'id_carga': solicitud.id_carga,
+            'origen': solicitud.origen.nombre,
+            'destino': solicitud.destino.nombre,
+            'peso_kg': solicitud.peso_kg,
+            'kpi': kpi,
+            'motor': motor,
+            'mejor': itinerario_a_dict(mejor) if mejor else None,
+            'optimos_por_modo': {modo: itinerario_a_dict(itinerario, con_tramos=False)
+                                 for modo, itinerario in optimos_por_modo.items() if itinerario}
+        }
+
+    def obtener_estadisticas(self):
+        """Contadores, pedidos en curso, latencias recientes (ms) y cache del planificador"""
+        latencias = sorted(self.latencias)
+
+        def percentil(p):
+            if not latencias:
+                return 0.0
+            return latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000
+
+        return {
+            **self.contadores,
+            'activos': self.activos,
+            'busquedas_en_curso': len(self.en_curso),
+            'procesos': self.procesos,
+            'latencia_ms': {'p50': percentil(0.50), 'p99': percentil(0.99), 'max': percentil(1.0)},
+            'cache': self.planificador.obtener_estadisticas_cache()
+        }
+
+    # --- HTTP ---
+
+    async def _despachar(self, metodo, ruta, cuerpo):
+        """(estado, respuesta) de un pedido HTTP"""
+        if ruta == '/ruta':
+            if metodo != 'POST':
+                return 405, {'error': "usar POST"}
+            try:
+                datos = json.loads(cuerpo)
+            except ValueError as e:
+                self.contadores['errores'] += 1
+                return 400, {'error': f"JSON inválido: {e}"}
+            return await self.resolver(datos)
+        if ruta == '/estado':
+            return 200, self.obtener_estadisticas()
+        if ruta == '/metricas':
+            return 200, METRICAS.formato_prometheus(self.planificador.sistema_transporte, self.planificador)
+        return 404, {'error': f"ruta desconocida: {ruta}"}
+
+    @staticmethod
+    def _respuesta_http(estado, respuesta, cerrar):
+        """Respuesta HTTP: JSON, o texto plano si respuesta ya es un str"""
+        if isinstance(respuesta, str):
+            cuerpo = respuesta.encode('utf-8')
+            tipo = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            cuerpo = json.dumps(respuesta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            tipo = "application/json; charset=utf-8"
+        encabezados = [f"HTTP/1.1 {estado} {RAZONES[estado]}",
+                       f"Content-Type: {tipo}",
+                       f"Content-Length: {len(cuerpo)}",
+                       "Connection: close" if cerrar else "Connection: keep-alive"]
+        if estado == 503:
+            encabezados.append("Retry-After: 1")
+        return ("\r\n".join(encabezados) + "\r\n\r\n").encode('latin-1') + cuerpo
+
+    async def _rechazar(self, escritor, estado, mensaje):
+        """Responde un error del pedido mismo (se cierra la conexión: no se sabe dónde empieza el siguiente)"""
+        escritor.write(self._respuesta_http(estado, {'error': mensaje}, True))
+        await escritor.drain()
+
+    async def _atender_conexion(self, lector, escritor):
+        """Atiende los pedidos HTTP/1.1 de una conexión, uno por vez (keep-alive)"""
+        try:
+            while True:
+                try:
+                    linea = await asyncio.wait_for(lector.readline(), self.timeout_lectura)
+                    if not linea:
+                        break
+                    partes = linea.decode('latin-1').split()
+                    encabezados = {}
+                    while True:
+                        linea = await asyncio.wait_for(lector.readline(), self.timeout_lectura)
+                        if linea in (b'\r\n', b'\n', b''):
+                            break
+                        nombre, _, valor = linea.decode('latin-1').partition(':')
+                        encabezados[nombre.strip().lower()] = valor.strip().lower()
+                except ValueError:
+                    # readline: línea más larga que el límite del lector
+                    await self._rechazar(escritor, 400, "línea del pedido o de un encabezado demasiado larga")
+                    break
+
+                if len(partes) != 3:
+                    await self._rechazar(escritor, 400, "pedido HTTP inválido")
+                    break
+                metodo, ruta, version = partes
+                # Solo dígitos: int() aceptaría signos, espacios y guiones bajos
+                largo = encabezados.get('content-length', '0')
+                if not (largo.isascii() and largo.isdigit()):
+                    await self._rechazar(escritor, 400, f"Content-Length inválido: {largo!r}")
+                    break
+                largo = int(largo)
+                if largo > MAX_CUERPO:
+                    await self._rechazar(escritor, 413, f"cuerpo de más de {MAX_CUERPO} bytes")
+                    break
+                cuerpo = await asyncio.wait_for(lector.readexactly(largo), self.timeout_lectura) if largo else b''
+
+                conexion = encabezados.get('connection', '')
+                cerrar = conexion == 'close' or (version == 'HTTP/1.0' and conexion != 'keep-alive')
+                estado, respuesta = await self._despachar(metodo, ruta.split('?', 1)[0], cuerpo)
+                escritor.write(self._respuesta_http(estado, respuesta, cerrar))
+                await escritor.drain()
+                if cerrar:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self, host='127.0.0.1', puerto=8080, archivo_unix=None):
+        """Abre el servidor asyncio (el pool ya debe estar iniciado) y lo devuelve"""
+        if archivo_unix:
+            return await asyncio.start_unix_server(self._atender_conexion, archivo_unix)
+        return await asyncio.start_server(self._atender_conexion, host, puerto)
+
+    def servir(self, host='127.0.0.1', puerto=8080, archivo_unix=None):
+        """Inicia el pool y atiende pedidos hasta Ctrl+C"""
+        async def atender():
+            servidor = await self.iniciar(host, puerto, archivo_unix)
+            print(f"Servidor de planificación en {archivo_unix or f'http://{host}:{puerto}'} "
+                  f"({self.procesos} procesos)")
+            async with servidor:
+                await servidor.serve_forever()
+
+        self.iniciar_pool()
+        try:
+            asyncio.run(atender())
+        except KeyboardInterrupt:
+            print("Servidor detenido")
+        finally:
+            self.cerrar_pool()
+
+    def __repr__(self):
+        return (f"ServidorPlanificacion(procesos={self.procesos}, activos={self.activos}, "
+                f"busquedas_en_curso={len(self.en_curso)})")
+
+
+# Código de prueba
+if __name__ == "__main__":
+    from sistema_transporte import SistemaTransporte
+    from planificador import Planificador
+
+    sistema = SistemaTransporte()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sistema.cargar_nodos('nodos.csv')
+        sistema.cargar_conexiones('conexiones.csv')
+    servidor = ServidorPlanificacion(Planificador(sistema), procesos=2)
+
+    async def probar():
+        pedido = {'origen': 'Zarate', 'destino': 'Mar_del_Plata', 'peso_kg': 70000, 'kpi': 'tiempo'}
+        # Cinco pedidos iguales a la vez: una sola búsqueda
+        for estado, respuesta in await asyncio.gather(*(servidor.resolver(dict(pedido)) for _ in range(5))):
+            print(estado, respuesta['mejor']['ruta'], round(respuesta['mejor']['tiempo_total'], 2))
+        print(await servidor.resolver({'origen': 'Zarate', 'destino': 'Atlantida', 'peso_kg': 1}))
+        print(json.dumps(servidor.obtener_estadisticas(), indent=2))
+
+    servidor.iniciar_pool()
+    try:
+        asyncio.run(probar())
+    finally:
+        servidor.cerrar_pool()
@@ -0,0 +1,87 @@
+from almacen_grafo import AlmacenGrafo
+
+
+class SistemaEnDisco:
+    """
+    Red de transporte leída de un AlmacenGrafo, para planificar sobre redes
+    que no entran en memoria. Tiene lo que el Planificador usa de un
+    SistemaTransporte (nodos, conexiones, solicitudes, obtener_grafo y
+    preprocesar_pesos), pero la red es de solo lectura y sus nodos y
+    conexiones se crean a medida que se piden.
+    Cada vez que el planificador pide el grafo se controla la memoria
+    residente contra el presupuesto (ver AlmacenGrafo.controlar_memoria).
+    Los motores 'astar' y 'jerarquia' preprocesan la red entera en memoria
+    y no están disponibles.
+    """
+
+    motores_soportados = ('dijkstra', 'exhaustivo', 'multimodal')
+
+    def __init__(self, archivo_almacen, presupuesto_mb=256, capacidad_objetos=4096):
+        self.almacen = AlmacenGrafo(archivo_almacen, presupuesto_mb, capacidad_objetos)
+        self.nodos = self.almacen.nodos_por_nombre    # {nombre: Nodo}, de solo lectura
+        self.conexiones = self.almacen.conexiones     # {id: Conexion}, de solo lectura
+        self.solicitudes = []
+        self.landmarks = None
+        self.jerarquias = {}
+        self.pesos = None
+        self.version = self.almacen.version
+
+    @classmethod
+    def construir(cls, archivo_nodos, archivo_conexiones, archivo_almacen, presupuesto_mb=256, **opciones):
+        """
+        Construye el almacén desde los CSV (ver AlmacenGrafo.construir) y lo abre.
+        opciones: crear_vehiculo, modos, tamano_bloque, mostrar_progreso
+        """
+        AlmacenGrafo.construir(archivo_nodos, archivo_conexiones, archivo_almacen, **opciones)
+        return cls(archivo_almacen, presupuesto_mb)
+
+    def obtener_grafo(self):
+        """El almacén, que los motores recorren como un GrafoCompacto"""
+        self.almacen.controlar_memoria()
+        return self.almacen
+
+    def preprocesar_pesos(self, crear_vehiculo=None, modos=None):
+        """Pesos por conexión con los coeficientes guardados en el almacén"""
+        if crear_vehiculo is None or modos is None:
+            from planificador import Planificador
+            planificador = Planificador(self)
+            crear_vehiculo = crear_vehiculo or planificador._crear_vehiculo_para_conexion
+            modos = modos or set(planificador.vehiculos_disponibles)
+        self.pesos = self.almacen.obtener_pesos(crear_vehiculo, modos)
+        return self.pesos
+
+    def preprocesar_landmarks(self, crear_vehiculo=None, cantidad=4):
+        raise ValueError("Los landmarks (motor 'astar') necesitan la red en memoria: usar SistemaTransporte")
+
+    def cargar_solicitudes(self, archivo_csv, **opciones):
+        """
+        Carga las solicitudes cuyos nodos existen en el almacén (ver CargadorMasivo).
+        Devuelve el cargador, con el reporte de filas y errores.
+        """
+        from cargador_masivo import CargadorMasivo
+        cargador = CargadorMasivo(self, **opciones)
+        cargador.cargar_solicitudes(archivo_csv)
+        return cargador
+
+    def obtener_estadisticas(self):
+        """Tamaño de la red y memoria (ver AlmacenGrafo.obtener_reporte)"""
+        return {**self.almacen.obtener_reporte(), 'solicitudes': len(self.solicitudes)}
+
+    def __repr__(self):
+        return f"SistemaEnDisco({self.almacen.archivo!r}, nodos={len(self.nodos)}, conexiones={len(self.conexiones)})"
+
+
+# Código de prueba
+if __name__ == "__main__":
+    import os
+    from planificador import Planificador
+
+    os.makedirs('output', exist_ok=True)
+    sistema = SistemaEnDisco.construir('nodos.csv', 'conexiones.csv', os.path.join('output', 'red.grafo'),
+                                       presupuesto_mb=64)
+    sistema.cargar_solicitudes('solicitudes.csv')
+    planificador = Planificador(sistema)
+    for solicitud in sistema.solicitudes:
+        itinerario = planificador.generar_itinerario(solicitud, kpi="costo")
+        print(solicitud.id_carga, itinerario.costo_total if itinerario else None)
+    print(sistema.obtener_estadisticas())
@@ -1,7 +1,9 @@
 from nodo import Nodo
 from conexion import Conexion
 from solicitud_transporte import SolicitudTransporte
+from metricas import medir
 import csv
+import os
 
 
 class SistemaTransporte:
@@ -14,7 +16,58 @@ class SistemaTransporte:
         self.nodos = {}          # {nombre: objeto_Nodo}
         self.conexiones = []     # Lista de conexiones
         self.solicitudes = []    # Lista de solicitudes
+        self.landmarks = None    # Cotas precalculadas para A* (ver preprocesar_landmarks)
+        self.jerarquias = {}     # {(modo, kpi, clase_peso): JerarquiaContraccion}
+        self.grafo = None        # GrafoCompacto de la red (ver obtener_grafo)
+        self.pesos = None        # PesosConexiones: vehículo y coeficientes por conexión
+        self.pesos_guardados = None   # (versión, modos, arrays) de pesos leídos de un snapshot
+        self.version = 0         # Aumenta cada vez que cambia la red
+        self._nombres_normalizados = (None, {})   # (clave, {nombre en minúsculas: Nodo}) para buscar_nodo
+        self._huella = (None, None)   # (versión, huella) ver huella()
 
+    def _invalidar_preprocesamiento(self):
+        """La red cambió: descarta el preprocesamiento de rutas y avanza la versión"""
+        self.landmarks = None
+        self.jerarquias = {}
+        self.grafo = None
+        self.pesos = None
+        self.pesos_guardados = None
+        self.version += 1
+
+    def huella(self):
+        """
+        SHA-256 del contenido de la red: nodos y conexiones (con distancias y
+        restricciones) en el orden de carga. La misma red cargada en otra
+        ejecución, o desde otra fuente, tiene la misma huella.
+        Se recalcula solo cuando cambia la red.
+        """
+        version, huella = self._huella
+        if version == self.version:
+            return huella
+        
+        import hashlib
+        suma = hashlib.sha256()
+        suma.update('\n'.join(self.nodos).encode('utf-8'))
+        suma.update(b'\0')
+        for conexion in self.conexiones:
+            suma.update(f"{conexion.origen.nombre}\t{conexion.destino.nombre}\t{conexion.tipo}\t{conexion.distancia!r}\t"
+                        f"{conexion.restriccion!r}\t{conexion.valorRestriccion!r}\n".encode('utf-8'))
+        huella = suma.hexdigest()
+        self._huella = (self.version, huella)
+        return huella
+
+    def obtener_grafo(self):
+        """
+        Devuelve la vista compacta (arrays CSR) de la red sobre la que
+        trabajan los motores de búsqueda. Se compila la primera vez que se
+        pide y de nuevo solo si la red cambió.
+        """
+        if self.grafo is None or self.grafo.version != self.version:
+            from grafo_compacto import GrafoCompacto
+            self.grafo = GrafoCompacto(self)
+        return self.grafo
+
+    @medir('carga')
     def cargar_nodos(self, archivo_csv):
         """Carga nodos desde archivo CSV con columna 'nombre'"""
         print(f"Cargando nodos desde {archivo_csv}...")
@@ -24,12 +77,15 @@ class SistemaTransporte:
                 for row in reader:
                     nombre = row['nombre'].strip()
                     if nombre not in self.nodos:
-                        self.nodos[nombre] = Nodo(nombre)
+                        nodo = Nodo(nombre)
+                        self.nodos[nodo.nombre] = nodo   # misma cadena (interned) como clave
+            self._invalidar_preprocesamiento()
             print(f"Cargados {len(self.nodos)} nodos")
         except Exception as e:
             print(f"Error cargando nodos: {e}")
             raise
 
+    @medir('carga')
     def cargar_conexiones(self, archivo_csv):
         """Carga conexiones con restricciones opcionales desde CSV"""
         print(f"Cargando conexiones desde {archivo_csv}...")
@@ -69,11 +125,13 @@ class SistemaTransporte:
                     else:
                         print(f"Nodos no encontrados: {origen_nombre} -> {destino_nombre}")
                 
+                self._invalidar_preprocesamiento()
                 print(f"Cargadas {conexiones_agregadas} conexiones")
         except Exception as e:
             print(f"Error cargando conexiones: {e}")
             raise
 
+    @medir('carga')
     def cargar_solicitudes(self, archivo_csv):
         """Carga solicitudes de transporte desde CSV"""
         print(f"Cargando solicitudes desde {archivo_csv}...")
@@ -109,6 +167,128 @@ class SistemaTransporte:
             print(f"Error cargando solicitudes: {e}")
             raise
 
+    @medir('carga')
+    def cargar_masivo(self, archivo_nodos, archivo_conexiones, archivo_solicitudes=None, **opciones):
+        """
+        Carga para archivos grandes: lee por bloques, valida por columna y
+        cuenta las filas con problemas en vez de imprimirlas (ver CargadorMasivo).
+        opciones: tamano_bloque, max_ejemplos, mostrar_progreso
+        Devuelve el cargador, con el reporte de filas, tiempos y errores.
+        """
+        from cargador_masivo import CargadorMasivo
+        cargador = CargadorMasivo(self, **opciones)
+        cargador.cargar_nodos(archivo_nodos)
+        cargador.cargar_conexiones(archivo_conexiones)
+        if archivo_solicitudes:
+            cargador.cargar_solicitudes(archivo_solicitudes)
+        return cargador
+
+    @medir('carga')
+    def cargar_base_datos(self, archivo_base_datos, solicitudes=True):
+        """
+        Carga la red (y las solicitudes) desde una base SQLite (ver BaseDatosRed).
+        Devuelve la base abierta, para consultarla o seguir modificándola.
+        """
+        from base_datos_red import BaseDatosRed
+        base = BaseDatosRed(archivo_base_datos)
+        base.cargar_en(self, solicitudes)
+        print(f"Red cargada desde {archivo_base_datos}: {len(self.nodos)} nodos, "
+              f"{len(self.conexiones)} conexiones, {len(self.solicitudes)} solicitudes")
+        return base
+
+    def guardar_base_datos(self, archivo_base_datos):
+        """Guarda la red y las solicitudes en una base SQLite (reemplaza su contenido)"""
+        from base_datos_red import BaseDatosRed
+        base = BaseDatosRed(archivo_base_datos)
+        base.guardar_sistema(self)
+        return base
+
+    def preprocesar_landmarks(self, crear_vehiculo=None, cantidad=4):
+        """
+        Precalcula las cotas inferiores de distancia, tiempo y costo hacia y
+        desde algunos nodos de referencia, usadas por el motor 'astar'.
+        Debe repetirse si cambian los nodos o las conexiones.
+        """
+        from landmarks import Landmarks
+        if crear_vehiculo is None:
+            from planificador import Planificador
+            crear_vehiculo = Planificador(self)._crear_vehiculo_para_conexion
+        
+        self.landmarks = Landmarks(self, crear_vehiculo, cantidad)
+        print(f"Landmarks precalculados: {', '.join(nodo.nombre for nodo in self.landmarks.landmarks)}")
+        return self.landmarks
+
+    def preprocesar_pesos(self, crear_vehiculo=None, modos=None):
+        """
+        Asigna a cada conexión su vehículo prototipo y precalcula sus
+        coeficientes de tiempo y costo, usados por todos los motores de
+        búsqueda. Se repite sola cuando cambia la red.
+        """
+        from pesos_conexiones import PesosConexiones
+        if crear_vehiculo is None or modos is None:
+            from planificador import Planificador
+            planificador = Planificador(self)
+            crear_vehiculo = crear_vehiculo or planificador._crear_vehiculo_para_conexion
+            modos = modos or set(planificador.vehiculos_disponibles)
+        
+        guardados = self.pesos_guardados
+        if guardados is not None and guardados[0] == self.version and guardados[1] == set(modos):
+            self.pesos = PesosConexiones.desde_arrays(self.obtener_grafo(), crear_vehiculo, modos, guardados[2])
+        else:
+            self.pesos = PesosConexiones(self.obtener_grafo(), crear_vehiculo, modos)
+        return self.pesos
+
+    def guardar_snapshot(self, archivo_snapshot, archivos_csv):
+        """
+        Guarda la red, el grafo compilado y los pesos en un SnapshotRed
+        ligado al contenido de archivos_csv (los CSV de los que salió la red).
+        """
+        from snapshot_red import SnapshotRed
+        if self.pesos is None or self.pesos.version != self.version:
+            self.preprocesar_pesos()
+        snapshot = SnapshotRed(archivo_snapshot)
+        return snapshot.guardar(self, SnapshotRed.suma_de_control(archivos_csv))
+
+    @medir('carga')
+    def cargar_snapshot(self, archivo_snapshot):
+        """Carga la red desde un SnapshotRed (el sistema debe estar vacío)"""
+        from snapshot_red import SnapshotRed
+        return SnapshotRed(archivo_snapshot).cargar(self)
+
+    @medir('carga')
+    def cargar_con_snapshot(self, archivo_nodos, archivo_conexiones, archivo_solicitudes=None, archivo_snapshot=None):
+        """
+        Carga la red desde el snapshot si corresponde a los CSV actuales; si
+        no existe o algún CSV cambió, carga los CSV y vuelve a generar el snapshot.
+        Devuelve True si se usó el snapshot.
+        """
+        from snapshot_red import SnapshotRed
+        archivos_csv = (archivo_nodos, archivo_conexiones, archivo_solicitudes)
+        if archivo_snapshot is None:
+            archivo_snapshot = os.path.splitext(archivo_conexiones)[0] + ".snapshot"
+        snapshot = SnapshotRed(archivo_snapshot)
+        suma = SnapshotRed.suma_de_control(archivos_csv)
+
+        if snapshot.vigente(suma):
+            snapshot.cargar(self)
+            print(f"Red cargada desde {archivo_snapshot}: {len(self.nodos)} nodos, "
+                  f"{len(self.conexiones)} conexiones, {len(self.solicitudes)} solicitudes")
+            return True
+
+        print(f"Snapshot {archivo_snapshot} inexistente o desactualizado, cargando CSV...")
+        self.cargar_nodos(archivo_nodos)
+        self.cargar_conexiones(archivo_conexiones)
+        if archivo_solicitudes:
+            self.cargar_solicitudes(archivo_solicitudes)
+        try:
+            if self.pesos is None or self.pesos.version != self.version:
+                self.preprocesar_pesos()
+            snapshot.guardar(self, suma)
+            print(f"Snapshot guardado en {archivo_snapshot}")
+        except OSError as e:
+            print(f"No se pudo guardar el snapshot: {e}")
+        return False
+
     def mostrar_resumen(self):
         """Muestra resumen del sistema cargado con estadísticas"""
         print("\n" + "="*60)
@@ -146,6 +326,7 @@ class SistemaTransporte:
         for solicitud in self.solicitudes:
             print(f"  {solicitud}")
 
+    @medir('validacion')
     def verificar_conectividad(self):
         """Verifica qué modos de transporte están disponibles para cada solicitud"""
         print(f"\nVERIFICANDO CONECTIVIDAD...")
@@ -213,12 +394,17 @@ class SistemaTransporte:
 
     def buscar_nodo(self, nombre):
         """Busca un nodo por nombre (case-insensitive)"""
-        nombre_normalizado = nombre.strip().lower()
-        for nodo_nombre, nodo in self.nodos.items():
-            if nodo_nombre.lower() == nombre_normalizado:
-                return nodo
-        return None
+        # Índice por nombre en minúsculas (el primero en orden de carga si
+        # hay varios); se rearma si cambió la red
+        clave, indice = self._nombres_normalizados
+        if clave != (self.version, len(self.nodos)):
+            indice = {}
+            for nodo_nombre, nodo in self.nodos.items():
+                indice.setdefault(nodo_nombre.lower(), nodo)
+            self._nombres_normalizados = ((self.version, len(self.nodos)), indice)
+        return indice.get(nombre.strip().lower())
 
+    @medir('validacion')
     def validar_integridad(self):
         """Valida la integridad de los datos cargados"""
         errores = []
@@ -238,19 +424,18 @@ class SistemaTransporte:
                 errores.append(f"Solicitud {i} ({solicitud.id_carga}): Nodo destino '{solicitud.destino.nombre}' no existe")
         
         # Verificar nodos aislados (sin conexiones)
+        destinos = {c.destino.nombre for c in self.conexiones}   # nodos a los que llega alguna conexión
         nodos_aislados = []
         for nombre, nodo in self.nodos.items():
-            if len(nodo.conexiones) == 0:
-                # También verificar si llegan conexiones de otros nodos
-                conexiones_entrantes = [c for c in self.conexiones if c.destino.nombre == nombre]
-                if len(conexiones_entrantes) == 0:
-                    nodos_aislados.append(nombre)
+            if len(nodo.conexiones) == 0 and nombre not in destinos:
+                nodos_aislados.append(nombre)
         
         if nodos_aislados:
             errores.append(f"Nodos aislados (sin conexiones): {', '.join(nodos_aislados)}")
         
         return errores
 
+    @medir('exportacion')
     def exportar_resumen(self, archivo_salida="resumen_sistema.txt"):
         """Exporta un resumen detallado del sistema a un archivo de texto"""
         try:
@@ -0,0 +1,265 @@
+from nodo import Nodo
+from conexion import Conexion
+from solicitud_transporte import SolicitudTransporte
+from grafo_compacto import GrafoCompacto
+from tarifas import huella_tarifas
+from array import array
+from sys import intern
+import gc
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGICO = b'EDPSNAP\0'
+FORMATO = 2
+ALINEACION = 8
+
+class SnapshotRed:
+    """
+    Copia binaria de una red ya cargada y compilada, para no volver a leer
+    ni validar los CSV en cada arranque.
+    - Guarda los nodos, las conexiones y las solicitudes, los arrays del
+      GrafoCompacto (CSR incluidos) y los coeficientes de PesosConexiones.
+    - El archivo es un encabezado JSON seguido de los arrays en binario
+      (alineados a 8 bytes); al cargarlo se mapea en memoria (mmap) y los
+      arrays del grafo se usan directamente desde el archivo.
+    - La suma de control se calcula sobre el contenido de los CSV de origen:
+      si algún CSV cambió el snapshot deja de estar vigente.
+    - Los pesos guardados salen de las tarifas de los vehículos: el
+      encabezado lleva su huella (tarifas.huella_tarifas) y si cambió alguna
+      tarifa el snapshot deja de estar vigente (cargado igual, los pesos se
+      vuelven a calcular).
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self._mapa = None   # mmap abierto mientras se usen los arrays cargados
+
+    @staticmethod
+    def suma_de_control(archivos_csv):
+        """SHA-256 del contenido de los CSV de origen (y del formato del snapshot)"""
+        suma = hashlib.sha256(f"formato {FORMATO}".encode())
+        for archivo in archivos_csv:
+            if not archivo:
+                continue
+            with open(archivo, 'rb') as f:
+                for bloque in iter(lambda: f.read(1 << 20), b''):
+                    suma.update(bloque)
+            suma.update(b'\0')
+        return suma.hexdigest()
+
+    # --- Encabezado ---
+
+    def _leer_encabezado(self):
+        """(encabezado, inicio de los datos) o (None, 0) si el archivo no es un snapshot"""
+        try:
+            with open(self.archivo, 'rb') as f:
+                if f.read(len(MAGICO)) != MAGICO:
+                    return None, 0
+                largo, = struct.unpack('<Q', f.read(8))
+                encabezado = json.loads(f.read(largo).decode('utf-8'))
+        except (OSError, ValueError, struct.error):
+            return None, 0
+        return encabezado, self._alinear(len(MAGICO) + 8 + largo)
+
+    @staticmethod
+    def _alinear(posicion):
+        return -(-posicion // ALINEACION) * ALINEACION
+
+    def vigente(self, suma):
+        """
+        True si el archivo existe, es de este formato y máquina, corresponde
+        a la suma dada y sus pesos a las tarifas actuales
+        """
+        encabezado, _ = self._leer_encabezado()
+        return (encabezado is not None
+                and encabezado.get('formato') == FORMATO
+                and encabezado.get('suma') == suma
+                and encabezado.get('tarifas') == huella_tarifas()
+                and encabezado.get('orden_bytes') == sys.byteorder
+                and encabezado.get('tamanos') == self._tamanos())
+
+    @staticmethod
+    def _tamanos():
+        return {codigo: array(codigo).itemsize for codigo in 'bBid'}
+
+    # --- Guardar ---
+
+    def guardar(self, sistema, suma):
+        """
+        Escribe el snapshot de la red del sistema (compila el grafo si hace falta).
+        Se escribe en un archivo temporal y se reemplaza al final, así un
+        corte a mitad de camino no deja un snapshot roto.
+        """
+        grafo = sistema.obtener_grafo()
+        secciones = {}
+
+        def agregar(nombre, datos):
+            secciones[nombre] = datos if isinstance(datos, (array, bytearray, bytes)) else array(datos[0], datos[1])
+
+        # Red
+        agregar('nombres', '\0'.join(nodo.nombre for nodo in grafo.nodos).encode('utf-8'))
+        agregar('origen', grafo.origen)
+        agregar('destino', grafo.destino)
+        agregar('modo', grafo.modo)
+        agregar('distancia', grafo.distancia)
+        pares = {}   # {(restricción, valor): índice}
+        indices_restriccion = array('i', [0]) * len(grafo.conexiones)
+        for e, conexion in enumerate(grafo.conexiones):
+            indices_restriccion[e] = pares.setdefault((conexion.restriccion, conexion.valorRestriccion), len(pares))
+        agregar('restriccion', indices_restriccion)
+
+        solicitudes = sistema.solicitudes
+        agregar('ids_solicitudes', '\0'.join(solicitud.id_carga for solicitud in solicitudes).encode('utf-8'))
+        agregar('peso_solicitudes', ('d', (solicitud.peso_kg for solicitud in solicitudes)))
+        agregar('origen_solicitudes', ('i', (grafo.id_nodo(solicitud.origen) for solicitud in solicitudes)))
+        agregar('destino_solicitudes', ('i', (grafo.id_nodo(solicitud.destino) for solicitud in solicitudes)))
+
+        # Grafo compilado
+        for nombre in ('peso_max', 'velocidad_max', 'prob_mal_tiempo', 'maritimo'):
+            agregar(nombre, getattr(grafo, nombre))
+        claves_csr = [None] + list(grafo.modos)
+        for i, clave in enumerate(claves_csr):
+            for parte, datos in zip(('inicio', 'destinos', 'aristas'), grafo.adyacencias[clave]):
+                agregar(f'csr{i}_{parte}', datos)
+
+        # Pesos por conexión
+        pesos = sistema.pesos if sistema.pesos is not None and sistema.pesos.version == grafo.version else None
+        info_pesos = None
+        if pesos is not None:
+            prototipos = {}   # {id(vehículo): índice}
+            indices_prototipo = array('i', [-1]) * len(grafo.conexiones)
+            for e, vehiculo in enumerate(pesos.vehiculos):
+                if vehiculo is not None:
+                    indices_prototipo[e] = prototipos.setdefault(id(vehiculo), len(prototipos))
+            agregar('tiempo_nominal', pesos.tiempo_nominal)
+            agregar('costo_vehiculo', pesos.costo_vehiculo)
+            agregar('capacidad', pesos.capacidad)
+            agregar('prototipo', indices_prototipo)
+            info_pesos = {'modos': sorted(pesos.modos)}
+
+        # Disposición: cada sección alineada, con desplazamiento relativo al inicio de los datos
+        tabla = {}
+        desplazamiento = 0
+        for nombre, datos in secciones.items():
+            codigo = datos.typecode if isinstance(datos, array) else 'B'
+            tabla[nombre] = [desplazamiento, codigo, len(datos)]
+            desplazamiento = self._alinear(desplazamiento + len(datos) * (datos.itemsize if isinstance(datos, array) else 1))
+
+        encabezado = {
+            'formato': FORMATO,
+            'suma': suma,
+            'tarifas': huella_tarifas(),
+            'orden_bytes': sys.byteorder,
+            'tamanos': self._tamanos(),
+            'modos': list(grafo.modos),
+            'restricciones': [list(par) for par in pares],
+            'pesos': info_pesos,
+            'secciones': tabla
+        }
+        texto = json.dumps(encabezado).encode('utf-8')
+        inicio = self._alinear(len(MAGICO) + 8 + len(texto))
+
+        temporal = f"{self.archivo}.tmp{os.getpid()}"
+        with open(temporal, 'wb') as f:
+            f.write(MAGICO)
+            f.write(struct.pack('<Q', len(texto)))
+            f.write(texto)
+            for nombre, datos in secciones.items():
+                f.write(b'\0' * (inicio + tabla[nombre][0] - f.tell()))
+                f.write(datos if not isinstance(datos, array) else datos.tobytes())
+        os.replace(temporal, self.archivo)
+        return os.path.getsize(self.archivo)
+
+    # --- Cargar ---
+
+    def cargar(self, sistema):
+        """
+        Carga el snapshot en un SistemaTransporte vacío: crea los nodos,
+        conexiones y solicitudes sin volver a validarlos y deja el grafo
+        compilado (sobre el archivo mapeado) y los pesos listos para usar.
+        """
+        if sistema.nodos or sistema.conexiones or sistema.solicitudes:
+            raise ValueError("El snapshot se carga en un sistema vacío")
+        encabezado, inicio = self._leer_encabezado()
+        if encabezado is None:
+            raise ValueError(f"{self.archivo} no es un snapshot de red")
+
+        activo = gc.isenabled()
+        gc.disable()   # se crean muchos objetos de una vez (como en CargadorMasivo)
+        try:
+            return self._cargar(sistema, encabezado, inicio)
+        finally:
+            if activo:
+                gc.enable()
+
+    def _cargar(self, sistema, encabezado, inicio):
+        with open(self.archivo, 'rb') as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        vista = memoryview(self._mapa)
+        secciones = {}
+        for nombre, (desplazamiento, codigo, cantidad) in encabezado['secciones'].items():
+            tamano = cantidad * array(codigo).itemsize
+            secciones[nombre] = vista[inicio + desplazamiento:inicio + desplazamiento + tamano].cast(codigo)
+
+        # Red
+        nombres = bytes(secciones['nombres']).decode('utf-8').split('\0') if len(secciones['nombres']) else []
+        nodos = [Nodo(nombre) for nombre in nombres]
+        for nodo in nodos:
+            sistema.nodos[nodo.nombre] = nodo
+        sistema._invalidar_preprocesamiento()
+
+        modos = [intern(modo) for modo in encabezado['modos']]
+        pares = [(intern(restriccion) if restriccion else restriccion,
+                  intern(valor) if isinstance(valor, str) else valor)
+                 for restriccion, valor in encabezado['restricciones']]
+        for origen, destino, modo, distancia, restriccion in zip(
+                secciones['origen'], secciones['destino'], secciones['modo'],
+                secciones['distancia'], secciones['restriccion']):
+            conexion = Conexion.sin_validar(nodos[origen], nodos[destino], modos[modo], distancia, *pares[restriccion])
+            nodos[origen].agregarConexiones(conexion)
+            sistema.conexiones.append(conexion)
+        sistema._invalidar_preprocesamiento()
+
+        ids = bytes(secciones['ids_solicitudes']).decode('utf-8').split('\0') if len(secciones['peso_solicitudes']) else []
+        for id_carga, peso, origen, destino in zip(ids, secciones['peso_solicitudes'],
+                                                   secciones['origen_solicitudes'], secciones['destino_solicitudes']):
+            sistema.solicitudes.append(SolicitudTransporte(id_carga, peso, nodos[origen], nodos[destino]))
+
+        # Grafo compilado y pesos
+        adyacencias = {}
+        for i, clave in enumerate([None] + modos):
+            adyacencias[clave] = tuple(secciones[f'csr{i}_{parte}'] for parte in ('inicio', 'destinos', 'aristas'))
+        sistema.grafo = GrafoCompacto.desde_arrays(sistema, tuple(modos), secciones, adyacencias)
+        if encabezado['pesos'] is not None and encabezado.get('tarifas') == huella_tarifas():
+            sistema.pesos_guardados = (sistema.version, set(encabezado['pesos']['modos']),
+                                       {nombre: secciones[nombre] for nombre in
+                                        ('tiempo_nominal', 'costo_vehiculo', 'capacidad', 'prototipo')})
+        return sistema
+
+    def __repr__(self):
+        return f"SnapshotRed({self.archivo!r})"
+
+
+# Código de prueba
+if __name__ == "__main__":
+    import time
+    from sistema_transporte import SistemaTransporte
+
+    archivos = ('nodos.csv', 'conexiones.csv', 'solicitudes.csv')
+    snapshot = SnapshotRed(os.path.join('output', 'red.snapshot'))
+    os.makedirs('output', exist_ok=True)
+
+    inicio = time.perf_counter()
+    sistema = SistemaTransporte()
+    sistema.cargar_con_snapshot(*archivos, archivo_snapshot=snapshot.archivo)
+    print(f"Primera carga: {time.perf_counter() - inicio:.3f}s")
+
+    inicio = time.perf_counter()
+    copia = SistemaTransporte()
+    copia.cargar_con_snapshot(*archivos, archivo_snapshot=snapshot.archivo)
+    print(f"Carga desde snapshot: {time.perf_counter() - inicio:.3f}s")
+    print(f"Nodos: {len(copia.nodos)}, conexiones: {len(copia.conexiones)}, solicitudes: {len(copia.solicitudes)}")
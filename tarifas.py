@@ -0,0 +1,110 @@
+from vehiculos import Tren, Camion, Barco, Avion
+
+# Manejo de dependencias opcionales
+try:
+    import numpy as np
+    NUMPY_DISPONIBLE = True
+except ImportError:
+    NUMPY_DISPONIBLE = False
+
+
+def vehiculos_por_defecto():
+    """Un vehículo de cada clase, indexado por modo de transporte"""
+    vehiculos = [Tren(), Camion(), Barco('fluvial'), Barco('maritimo'), Avion()]
+    return {vehiculo.modo_de_transporte: vehiculo for vehiculo in vehiculos}
+
+
+def huella_tarifas():
+    """
+    SHA-256 de los atributos de los vehículos por defecto (los de sus
+    __slots__, también los de las subclases): cambia si cambia alguna tarifa.
+    """
+    import hashlib
+    tarifas = [(type(vehiculo).__name__, [getattr(vehiculo, atributo) for clase in type(vehiculo).__mro__
+                                          for atributo in getattr(clase, '__slots__', ())])
+               for vehiculo in vehiculos_por_defecto().values()]
+    return hashlib.sha256(repr(tarifas).encode()).hexdigest()
+
+
+def _validar_columna(valores, nombre):
+    """Valida una columna completa de una sola vez (en lugar de valor por valor)"""
+    if NUMPY_DISPONIBLE:
+        columna = np.asarray(valores, dtype=float)
+        if columna.ndim != 1:
+            raise ValueError(f"{nombre} debe ser una secuencia de números")
+        if np.isnan(columna).any() or (columna < 0).any():
+            raise ValueError(f"{nombre}: todos los valores deben ser positivos")
+        return columna
+
+    columna = [float(valor) for valor in valores]
+    if any(not valor >= 0 for valor in columna):
+        raise ValueError(f"{nombre}: todos los valores deben ser positivos")
+    return columna
+
+
+def _tiempos(vehiculo, distancias):
+    """Horas de viaje; en aviones el mal tiempo se sortea por tramo"""
+    prob_mal_tiempo = getattr(vehiculo, 'prob_mal_tiempo', 0)
+    if NUMPY_DISPONIBLE:
+        velocidades = np.full(len(distancias), float(vehiculo.velocidad_nominal))
+        if prob_mal_tiempo:
+            velocidades[np.random.random(len(distancias)) <= prob_mal_tiempo] = 400
+        return distancias / velocidades
+    return [distancia / vehiculo.getVelocidad() for distancia in distancias]
+
+
+def cotizar_lote(distancias, cargas, vehiculos=None):
+    """
+    Cotiza en bloque tramos de un solo vehículo para cada clase de vehículo.
+    distancias y cargas son secuencias de igual longitud (km y kg).
+    Devuelve {modo: {'tiempo', 'costo_tramo', 'costo_carga', 'costo_total'}}
+    con un valor por tramo: arrays de NumPy si está instalado, listas si no.
+    Los resultados coinciden con calcular_tiempo_decimal, calcular_costo_tramo
+    y calcular_costo_por_carga, pero sin ciclos por vehículo ni validaciones
+    por valor.
+    """
+    distancias = _validar_columna(distancias, "distancias")
+    cargas = _validar_columna(cargas, "cargas")
+    if len(distancias) != len(cargas):
+        raise ValueError("distancias y cargas deben tener la misma longitud")
+
+    if vehiculos is None:
+        vehiculos = vehiculos_por_defecto()
+    elif not isinstance(vehiculos, dict):
+        vehiculos = {vehiculo.modo_de_transporte: vehiculo for vehiculo in vehiculos}
+
+    resultados = {}
+    for modo, vehiculo in vehiculos.items():
+        if NUMPY_DISPONIBLE:
+            costo_tramo = vehiculo.costo_tramo_cerrado(distancias, cargas)
+            costo_carga = vehiculo.costo_carga_cerrado(cargas)
+            costo_total = costo_tramo + costo_carga
+        else:
+            costo_tramo = [vehiculo.costo_tramo_cerrado(d, c) for d, c in zip(distancias, cargas)]
+            costo_carga = [vehiculo.costo_carga_cerrado(c) for c in cargas]
+            costo_total = [tramo + carga for tramo, carga in zip(costo_tramo, costo_carga)]
+
+        resultados[modo] = {
+            'tiempo': _tiempos(vehiculo, distancias),
+            'costo_tramo': costo_tramo,
+            'costo_carga': costo_carga,
+            'costo_total': costo_total
+        }
+    return resultados
+
+
+# Código de prueba
+if __name__ == "__main__":
+    print(f"Probando cotización en bloque (NumPy {'disponible' if NUMPY_DISPONIBLE else 'no disponible'})...")
+
+    distancias = [85, 250, 384, 600]
+    cargas = [10000, 25000, 70000, 160000]
+    cotizaciones = cotizar_lote(distancias, cargas)
+
+    for modo, resultado in cotizaciones.items():
+        print(f"\n--- {modo.upper()} ---")
+        for i, (distancia, carga) in enumerate(zip(distancias, cargas)):
+            print(f"{distancia}km, {carga}kg: {resultado['tiempo'][i]:.2f}h, "
+                  f"${float(resultado['costo_total'][i]):.2f}")
+
+    print("\nPruebas completadas")
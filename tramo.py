@@ -6,16 +6,19 @@ class Tramo:
     Un segmento individual del viaje (vehículo entre dos nodos).
     Calcula automáticamente tiempo y costo basándose en el vehículo.
     """
+    __slots__ = ('vehiculo', 'origen', 'destino', 'distancia', 'carga', 'conexion', 'tiempo', 'costo')
 
-    def __init__(self, vehiculo, origen, destino, distancia, carga=0):
+    def __init__(self, vehiculo, origen, destino, distancia, carga=0, conexion=None, tiempo=None):
         self.vehiculo = validar_vehiculo(vehiculo)
         self.origen = origen  
         self.destino = destino
         self.distancia = validar_positivo(distancia)
         self.carga = validar_positivo(carga)
+        self.conexion = conexion  # Conexión de la red que recorre (si se conoce)
         
         # Cálculos automáticos basados en el vehículo
-        self.tiempo = self._calcular_tiempo_decimal()
+        # (el tiempo puede venir dado, por ejemplo con el clima ya sorteado)
+        self.tiempo = validar_positivo(tiempo) if tiempo is not None else self._calcular_tiempo_decimal()
         self.costo = self._calcular_costo()
     
     def _calcular_tiempo_decimal(self):
@@ -6,7 +6,11 @@ class Vehiculo:
     """
     Clase base para todos los vehículos de transporte.
     Define interfaz común y lógica de distribución de carga.
+    Usa __slots__ (sin __dict__ por instancia): las subclases que agregan
+    atributos los declaran en sus propios __slots__.
     """
+    __slots__ = ('velocidad_nominal', 'capacidad_de_carga', 'costo_fijo_uso', 'costo_km_recorrido',
+                 'costo_kg_transportado', 'modo_de_transporte')
     
     def __init__(self, velocidad_nominal, capacidad_carga, costo_fijo, costo_km, costo_kg):
         # Validar todos los parámetros
@@ -54,35 +58,31 @@ class Vehiculo:
         """
         validar_positivo(distancia)
         validar_positivo(carga)
-        
-        capacidad = self.capacidad_de_carga
-        cargas_por_vehiculo = []
-        
-        # Define carga fija por carga transportada
-        costo_total = 0
-        
-        # Algoritmo de distribución: llenar cada vehículo al máximo
-        while carga > 0:
-            if carga >= capacidad:  
-                cargas_por_vehiculo.append(capacidad)
-                carga -= capacidad
-            else:
-                cargas_por_vehiculo.append(carga)
-                carga = 0
-        
-        # Calcular costo total por todos los vehículos
-        cantidad_vehiculos = len(cargas_por_vehiculo)
-        costo = (self.costo_fijo_uso * cantidad_vehiculos + 
-                    self.costo_km_recorrido * distancia * cantidad_vehiculos)
-            
-        costo_total += costo  
-     
-        return costo_total
+        return self.costo_tramo_cerrado(distancia, carga)
     
     def calcular_costo_por_carga(self, carga):
         validar_positivo(carga)
-        costo_carga = self.costo_kg_transportado * carga
-        return costo_carga
+        return self.costo_carga_cerrado(carga)
+
+    # Fórmulas cerradas: sin ciclos ni validaciones, sirven tanto para
+    # números sueltos como para arrays de NumPy (ver tarifas.py)
+
+    def cantidad_vehiculos(self, carga):
+        """Vehículos necesarios llenando cada uno al máximo: techo(carga / capacidad)"""
+        return -(-carga // self.capacidad_de_carga)
+
+    def costo_km_efectivo(self, distancia):
+        """Costo por km aplicable a la distancia (las subclases pueden descontar)"""
+        return self.costo_km_recorrido
+
+    def costo_tramo_cerrado(self, distancia, carga):
+        """Costo fijo y por km de todos los vehículos necesarios"""
+        cantidad = self.cantidad_vehiculos(carga)
+        return cantidad * (self.costo_fijo_uso + self.costo_km_efectivo(distancia) * distancia)
+
+    def costo_carga_cerrado(self, carga):
+        """Costo por kg transportado"""
+        return self.costo_kg_transportado * carga
     
     def puede_transportar(self, peso_carga=0):
         """Verifica si puede transportar una carga (base: siempre True)"""
@@ -94,6 +94,7 @@ class Tren(Vehiculo):
     Vehículo ferroviario de alta capacidad.
     Aplica descuentos por distancia (economías de escala).
     """
+    __slots__ = ()
     
     def __init__(self,velocidad=100):
         try:
@@ -108,39 +109,10 @@ class Tren(Vehiculo):
                          costo_kg=3)              # $/kg
         self.modo_de_transporte = 'ferroviaria'
 
-    def calcular_costo_tramo(self, distancia, carga):
+    def costo_km_efectivo(self, distancia):
         """Aplica descuento del 25% para distancias largas (>200km)"""
-        validar_positivo(distancia)
-        validar_positivo(carga)    
-        
-        # CORREGIDO: Usar variable local en lugar de modificar self
-        costo_km = self.costo_km_recorrido
-        if distancia >= 200:
-            costo_km = self.costo_km_recorrido * 0.75  # Descuento 25%
-        
-        capacidad = self.capacidad_de_carga
-        cargas_por_vehiculo = []
-        
-        # Define carga fija por carga transportada
-        costo_total = 0
-        
-        # Algoritmo de distribución: llenar cada vehículo al máximo
-        while carga > 0:
-            if carga >= capacidad:  
-                cargas_por_vehiculo.append(capacidad)
-                carga -= capacidad
-            else:
-                cargas_por_vehiculo.append(carga)
-                carga = 0
-        
-        # Calcular costo total por todos los vehículos
-        cantidad_vehiculos = len(cargas_por_vehiculo)
-        costo = (self.costo_fijo_uso * cantidad_vehiculos + 
-                    costo_km * distancia * cantidad_vehiculos)
-            
-        costo_total += costo  
-     
-        return costo_total
+        # (distancia >= 200) vale 1 o 0, también elemento a elemento en arrays
+        return self.costo_km_recorrido * (1 - 0.25 * (distancia >= 200))
 
 
 class Camion(Vehiculo):
@@ -148,6 +120,7 @@ class Camion(Vehiculo):
     Vehículo automotor flexible.
     Aplica sobrecosto para cargas pesadas (>15 toneladas).
     """
+    __slots__ = ()
     
     def __init__(self):
         super().__init__(velocidad_nominal=80,     # km/h
@@ -157,34 +130,18 @@ class Camion(Vehiculo):
                          costo_kg=1)               # $/kg
         self.modo_de_transporte = 'automotor'  
     
-    def calcular_costo_por_carga(self, carga):
-        validar_positivo(carga)
-    
+    def costo_carga_cerrado(self, carga):
+        """
+        Los camiones se llenan al máximo: todos van completos salvo el último.
+        Cada camión con más de 15 toneladas paga el doble por kg (sobrecargo 100%).
+        """
         capacidad = self.capacidad_de_carga
-        cargas_por_vehiculo = []
-        
-        # Define carga fija por carga transportada
-        costo_total = 0
-        
-        # Algoritmo de distribución: llenar cada vehículo al máximo
-        while carga > 0:
-            if carga >= capacidad:  
-                cargas_por_vehiculo.append(capacidad)
-                carga -= capacidad
-            else:
-                cargas_por_vehiculo.append(carga)
-                carga = 0
+        completos = carga // capacidad
+        resto = carga - completos * capacidad
         
-        #Calcular costo por kg transportado por vehciulo
-        costo_kg = self.costo_kg_transportado
-        for carga_camion in cargas_por_vehiculo:
-            if carga_camion > 15000:
-                costo_kg = self.costo_kg_transportado*2  #Sobrecargo 100%
-            else: 
-                costo_kg = self.costo_kg_transportado
-            costo_total += carga_camion*costo_kg 
-                
-        return costo_total
+        costo_completos = completos * capacidad * self.costo_kg_transportado * (1 + (capacidad > 15000))
+        costo_resto = resto * self.costo_kg_transportado * (1 + (resto > 15000))
+        return costo_completos + costo_resto
         
 
 class Barco(Vehiculo):
@@ -192,6 +149,7 @@ class Barco(Vehiculo):
     Vehículo acuático con costos diferenciados.
     Fluvial: $500 base, Marítimo: $1500 base.
     """
+    __slots__ = ()
     
     def __init__(self, tipo_navegacion='maritimo'):
         # Costo diferente según tipo de navegación
@@ -214,6 +172,7 @@ class Avion(Vehiculo):
     Vehículo aéreo de alta velocidad.
     Velocidad variable según condiciones climáticas.
     """
+    __slots__ = ('prob_mal_tiempo',)
     
     def __init__(self, prob_mal_tiempo=0):
         super().__init__(velocidad_nominal=600,     # km/h - muy rápido